@@ -0,0 +1,95 @@
+import json
+import threading
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from structures.block import Block
+
+
+# Block layout in the BLOCKS database:
+#
+#   <epoch index>:<creator>:<index>    -> block JSON (same block id as the Go node)
+#   HEIGHT:<epoch index>:<creator>     -> highest index stored for that creator in that epoch
+#
+# A creator's blocks in an epoch are numbered 0, 1, 2, ... so the block id is the composite
+# (epoch, creator, index) key: point lookups are a single get, and ordered iteration is a walk
+# over consecutive ids up to the stored height, fetched in batches with get_many.
+
+HEIGHT_PREFIX = "HEIGHT:"
+
+RANGE_BATCH_SIZE = 100
+
+
+def get_block_id(epoch_index: int, creator: str, index: int) -> str:
+    return f"{epoch_index}:{creator}:{index}"
+
+
+def get_epoch_index(epoch_full_id: str) -> int:
+    # Block.epoch is "<epoch hash>#<epoch index>"
+    return int(epoch_full_id.rsplit("#", 1)[1])
+
+
+class BlockStore:
+
+    def __init__(self, db, on_block_stored: Optional[Callable[[str], None]] = None):
+        self.db = db
+        self.on_block_stored = on_block_stored # called with the block id after every put_block
+        self._lock = threading.Lock() # keeps a block and its height marker consistent
+
+    def put_block(self, block: Block) -> str:
+        epoch_index = get_epoch_index(block.epoch)
+        block_id = get_block_id(epoch_index, block.creator, block.index)
+        height_key = f"{HEIGHT_PREFIX}{epoch_index}:{block.creator}"
+
+        with self._lock:
+            height = self.get_height(epoch_index, block.creator)
+            items = {block_id: json.dumps(block.to_dict())}
+            if block.index > height:
+                items[height_key] = str(block.index)
+            self.db.put_many(items)
+
+        if self.on_block_stored is not None:
+            self.on_block_stored(block_id)
+
+        return block_id
+
+    def get_height(self, epoch_index: int, creator: str) -> int:
+        # Highest block index stored for the creator in the epoch, -1 when there are none
+        height = self.db.get(f"{HEIGHT_PREFIX}{epoch_index}:{creator}")
+        return int(height) if height is not None else -1
+
+    def get_raw_block(self, epoch_index: int, creator: str, index: int) -> Optional[str]:
+        return self.db.get(get_block_id(epoch_index, creator, index))
+
+    def get_block(self, epoch_index: int, creator: str, index: int) -> Optional[Block]:
+        raw = self.get_raw_block(epoch_index, creator, index)
+        return Block.from_dict(json.loads(raw)) if raw is not None else None
+
+    def has_block(self, epoch_index: int, creator: str, index: int) -> bool:
+        return self.db.contains(get_block_id(epoch_index, creator, index))
+
+    def get_raw_blocks_range(self, epoch_index: int, creator: str, start: int, end: Optional[int] = None, batch_size: int = RANGE_BATCH_SIZE) -> Iterator[Tuple[int, str]]:
+
+        """
+        Streams (index, block JSON) for start <= index <= end in index order, without parsing.
+        end defaults to the stored height. Stops at the first missing block, since a syncing
+        node can only apply a contiguous run.
+        """
+
+        height = self.get_height(epoch_index, creator)
+        last = height if end is None else min(end, height)
+
+        index = max(start, 0)
+        while index <= last:
+            batch_end = min(index + batch_size - 1, last)
+            ids: List[str] = [get_block_id(epoch_index, creator, i) for i in range(index, batch_end + 1)]
+            found = self.db.get_many(ids)
+            for block_id in ids:
+                raw = found.get(block_id)
+                if raw is None:
+                    return
+                yield index, raw
+                index += 1
+
+    def get_blocks_range(self, epoch_index: int, creator: str, start: int, end: Optional[int] = None, batch_size: int = RANGE_BATCH_SIZE) -> Iterator[Block]:
+        for _, raw in self.get_raw_blocks_range(epoch_index, creator, start, end, batch_size):
+            yield Block.from_dict(json.loads(raw))
@@ -0,0 +1,201 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+POLICY_LRU = "lru"
+POLICY_TTL = "ttl"
+POLICY_EPOCH = "epoch"
+
+# Rough per-entry bookkeeping cost (OrderedDict node + tuple) on top of the key/value objects
+_ENTRY_OVERHEAD = 100
+
+
+def _approximate_size(key: Any, value: Any) -> int:
+    # Shallow, containers count their own header only. Good enough to bound growth
+    return sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+
+class BoundedCache(MutableMapping):
+
+    """
+    In-memory dict replacement with a size limit, an eviction policy and counters.
+
+    * Bounded by max_entries and/or max_bytes (approximate), the least recently used entry goes first
+    * POLICY_LRU   - only the bounds above
+    * POLICY_TTL   - additionally entries expire ttl_ms after they were written
+    * POLICY_EPOCH - additionally entries written before the previous epoch are dropped on rotation
+    * Every lookup (get, [], in) counts as a hit or a miss, so use one lookup per access
+    """
+
+    def __init__(self, name: str, max_entries: int = 0, max_bytes: int = 0, policy: str = POLICY_LRU, ttl_ms: int = 0):
+        if max_entries <= 0 and max_bytes <= 0:
+            raise ValueError(f"Cache {name} needs max_entries or max_bytes")
+        if policy not in (POLICY_LRU, POLICY_TTL, POLICY_EPOCH):
+            raise ValueError(f"Unknown cache policy {policy}")
+        if policy == POLICY_TTL and ttl_ms <= 0:
+            raise ValueError(f"Cache {name} uses the TTL policy but ttl_ms is {ttl_ms}")
+
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttl_ms = ttl_ms
+
+        # key -> (value, size, tag). tag is the expiry time for TTL, the epoch index for epoch scoped caches
+        self._entries: "OrderedDict[Any, Tuple[Any, int, int]]" = OrderedDict()
+        self._bytes = 0
+        self._epoch = -1
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __getitem__(self, key: Any) -> Any:
+        found, value = self._lookup(key)
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def __contains__(self, key: Any) -> bool:
+        return self._lookup(key)[0]
+
+    def __setitem__(self, key: Any, value: Any):
+        size = _approximate_size(key, value)
+        tag = self._now_ms() + self.ttl_ms if self.policy == POLICY_TTL else self._epoch
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, tag)
+            self._bytes += size
+            self._enforce_limits()
+
+    def __delitem__(self, key: Any):
+        with self._lock:
+            value, size, _ = self._entries.pop(key)
+            self._bytes -= size
+
+    def __iter__(self) -> Iterator[Any]:
+        # Over a snapshot of the keys, so the cache can be modified while iterating
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        # Doesn't count as lookups and doesn't touch the LRU order
+        with self._lock:
+            return [(key, value) for key, (value, _, _) in self._entries.items()]
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return [value for value, _, _ in self._entries.values()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def set_epoch(self, epoch_index: int):
+        # Entries of the current and the previous epoch stay (AEFPs of the previous epoch are still checked)
+        with self._lock:
+            self._epoch = epoch_index
+            if self.policy != POLICY_EPOCH:
+                return
+            for key in [key for key, (_, _, tag) in self._entries.items() if tag < epoch_index - 1]:
+                _, size, _ = self._entries.pop(key)
+                self._bytes -= size
+                self._expirations += 1
+
+    def stats(self) -> Dict[str, Union[str, int, float]]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _lookup(self, key: Any) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.policy == POLICY_TTL and entry[2] <= self._now_ms():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, entry[0]
+
+    def _enforce_limits(self):
+        while self._entries and (
+            (self.max_entries > 0 and len(self._entries) > self.max_entries) or
+            (self.max_bytes > 0 and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+
+class CacheRegistry:
+
+    """
+    Named BoundedCaches, indexed like the dict it replaces (GLOBAL_CACHES["FINALIZATION_PROOFS"]).
+    """
+
+    def __init__(self):
+        self._caches: Dict[str, BoundedCache] = {}
+
+    def register(self, name: str, max_entries: int = 0, max_bytes: int = 0, policy: str = POLICY_LRU, ttl_ms: int = 0) -> BoundedCache:
+        if name in self._caches:
+            raise ValueError(f"Cache {name} is already registered")
+        cache = BoundedCache(name, max_entries, max_bytes, policy, ttl_ms)
+        self._caches[name] = cache
+        return cache
+
+    def __getitem__(self, name: str) -> BoundedCache:
+        return self._caches[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._caches
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._caches)
+
+    def get(self, name: str) -> Optional[BoundedCache]:
+        return self._caches.get(name)
+
+    def on_epoch_change(self, epoch_index: int):
+        # Called on epoch rotation, epoch scoped caches drop what belongs to older epochs
+        for cache in self._caches.values():
+            cache.set_epoch(epoch_index)
+
+    def stats(self) -> List[Dict[str, Union[str, int, float]]]:
+        return [cache.stats() for cache in self._caches.values()]
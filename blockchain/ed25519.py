@@ -0,0 +1,64 @@
+import base64
+from typing import Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+
+# Same conventions as the Go node's ed25519 package:
+#   public keys  - base58 of the raw 32 bytes (PUBLIC_KEY in configs.toml)
+#   private keys - base64 of the PKCS#8 DER (PRIVATE_KEY in configs.toml)
+#   signatures   - base64 of the raw 64 bytes
+
+
+_BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+_BASE58_INDEX = {char: index for index, char in enumerate(_BASE58_ALPHABET)}
+
+
+def base58_encode(raw: bytes) -> str:
+    number = int.from_bytes(raw, 'big')
+    encoded = ''
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(raw) - len(raw.lstrip(b'\0'))
+    return '1' * leading_zeros + encoded
+
+
+def base58_decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        if char not in _BASE58_INDEX:
+            raise ValueError(f"Invalid base58 character {char!r}")
+        number = number * 58 + _BASE58_INDEX[char]
+    leading_zeros = len(text) - len(text.lstrip('1'))
+    return b'\0' * leading_zeros + (number.to_bytes((number.bit_length() + 7) // 8, 'big') if number else b'')
+
+
+def _as_bytes(message: Union[str, bytes]) -> bytes:
+    return message.encode() if isinstance(message, str) else message
+
+
+def generate_keypair() -> tuple:
+    # (base58 public key, base64 PKCS#8 private key)
+    private_key = Ed25519PrivateKey.generate()
+    public_raw = private_key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    private_der = private_key.private_bytes(serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    return base58_encode(public_raw), base64.b64encode(private_der).decode()
+
+
+def generate_signature(private_key: str, message: Union[str, bytes]) -> str:
+    key = serialization.load_der_private_key(base64.b64decode(private_key), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise ValueError("Private key is not an ed25519 key")
+    return base64.b64encode(key.sign(_as_bytes(message))).decode()
+
+
+def verify_signature(message: Union[str, bytes], pubkey: str, signature: str) -> bool:
+    try:
+        key = Ed25519PublicKey.from_public_bytes(base58_decode(pubkey))
+        key.verify(base64.b64decode(signature, validate=True), _as_bytes(message))
+        return True
+    except (InvalidSignature, ValueError):
+        return False
@@ -0,0 +1,237 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, List, MutableMapping, Optional, Sequence, Set, Tuple
+
+from structures.transaction import Transaction
+
+
+# Parallel execution of a block's transactions.
+#
+# Every transaction declares the accounts it touches (its creator plus the accounts named in the
+# payload). Transactions sharing an account end up in the same group (union-find), groups never
+# share an account, so running each group in block order on its own gives exactly the state that
+# running the whole block in order would. Groups are packed into one bin per worker and the bins
+# run on a process pool. A block that is one big conflict simply becomes one serial group.
+#
+# Fees are summed per bin and added up at the end instead of being credited to a shared account
+# inside the transactions, otherwise every transaction would conflict with every other.
+
+# Payload fields holding an account id
+ACCOUNT_PAYLOAD_KEYS = ("to",)
+
+# Below this many transactions a block is executed in process, shipping it to workers costs more
+PARALLEL_EXECUTION_THRESHOLD = 256
+
+# (creator, nonce, fee, tx type, payload), what workers receive instead of Transaction objects
+ExecutionTx = Tuple[str, int, str, str, Dict[str, Any]]
+
+
+@dataclass
+class ExecutionResult:
+    receipts: List[bool] # per transaction in block order, False when it was rejected
+    fees: int
+    groups: int
+    parallel: bool
+
+
+def new_account() -> Dict[str, int]:
+    # nonce is the next nonce the account may use
+    return {"balance": 0, "nonce": 0}
+
+
+def is_empty_account(account: Dict[str, int]) -> bool:
+    # Accounts missing from the state act as new ones and only get stored once a tx changes them,
+    # so a rejected tx naming an unknown account can't grow the state
+    return account == new_account()
+
+
+def to_execution_tx(tx: Transaction) -> ExecutionTx:
+    return (tx.creator, tx.nonce, tx.fee, tx.tx_type, tx.payload)
+
+
+def get_touched_accounts(tx: ExecutionTx) -> Set[str]:
+    creator, _, _, _, payload = tx
+    touched = {creator}
+    for key in ACCOUNT_PAYLOAD_KEYS:
+        value = payload.get(key)
+        if isinstance(value, str):
+            touched.add(value)
+    return touched
+
+
+def apply_transaction(tx: ExecutionTx, accounts: Dict[str, Dict[str, int]]) -> Tuple[bool, int]:
+
+    # (applied, fee paid). accounts holds every account the tx touches, a rejected tx changes nothing
+
+    creator, nonce, fee_raw, _, payload = tx
+
+    try:
+        fee = int(fee_raw)
+        amount = int(payload.get("amount", 0))
+    except (TypeError, ValueError):
+        return False, 0
+
+    sender = accounts[creator]
+
+    if fee < 0 or amount < 0 or nonce != sender["nonce"] or sender["balance"] < fee + amount:
+        return False, 0
+
+    sender["balance"] -= fee + amount
+    sender["nonce"] += 1
+
+    recipient = payload.get("to")
+    if isinstance(recipient, str) and amount:
+        accounts[recipient]["balance"] += amount
+
+    return True, fee
+
+
+def partition_transactions(txs: Sequence[ExecutionTx]) -> List[List[int]]:
+
+    # Groups of transaction indexes that share no account with any other group, each in block order
+
+    parent: Dict[str, str] = {}
+
+    def find(account: str) -> str:
+        root = account
+        while parent[root] != root:
+            root = parent[root]
+        while parent[account] != root:
+            parent[account], account = root, parent[account]
+        return root
+
+    touched_per_tx = []
+
+    for tx in txs:
+        touched = get_touched_accounts(tx)
+        touched_per_tx.append(touched)
+        roots = set()
+        for account in touched:
+            if account not in parent:
+                parent[account] = account
+            roots.add(find(account))
+        first, *rest = roots
+        for root in rest:
+            parent[root] = first
+
+    groups: Dict[str, List[int]] = {}
+    for index, touched in enumerate(touched_per_tx):
+        groups.setdefault(find(next(iter(touched))), []).append(index)
+
+    return list(groups.values())
+
+
+def execute_bin(items: List[Tuple[int, ExecutionTx]], accounts: Dict[str, Dict[str, int]]) -> Tuple[List[Tuple[int, bool]], Dict[str, Dict[str, int]], int]:
+
+    # Runs on a worker: the transactions of some groups in block order, against copies of their accounts
+
+    receipts = []
+    fees = 0
+
+    for index, tx in items:
+        applied, fee = apply_transaction(tx, accounts)
+        receipts.append((index, applied))
+        fees += fee
+
+    return receipts, accounts, fees
+
+
+class ExecutionEngine:
+
+    """
+    Executes blocks against an account state (any mapping of account id -> account dict).
+
+    With workers > 1 and blocks of at least PARALLEL_EXECUTION_THRESHOLD transactions the
+    conflict-free groups run on a process pool. The resulting state, receipts and fees are
+    always the same as executing the block serially.
+    """
+
+    def __init__(self, workers: Optional[int] = None, parallel_threshold: int = PARALLEL_EXECUTION_THRESHOLD):
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def execute(self, transactions: Sequence[Transaction], state: MutableMapping[str, Dict[str, int]]) -> ExecutionResult:
+        txs = [to_execution_tx(tx) for tx in transactions]
+
+        if self.workers <= 1 or len(txs) < self.parallel_threshold:
+            return execute_serial(txs, state)
+
+        groups = partition_transactions(txs)
+        if len(groups) == 1:
+            return execute_serial(txs, state)
+
+        # Biggest groups first onto the least loaded bin, so one long conflict chain doesn't sit behind others
+        bins: List[List[int]] = [[] for _ in range(min(self.workers, len(groups)))]
+        loads = [0] * len(bins)
+        for group in sorted(groups, key=len, reverse=True):
+            lightest = loads.index(min(loads))
+            bins[lightest].extend(group)
+            loads[lightest] += len(group)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+
+        futures = []
+        for indexes in bins:
+            indexes.sort()
+            items = [(index, txs[index]) for index in indexes]
+            accounts = {account: dict(state.get(account) or new_account()) for _, tx in items for account in get_touched_accounts(tx)}
+            futures.append(self._pool.submit(execute_bin, items, accounts))
+
+        # Nothing is applied until every bin came back, a failed worker leaves the state untouched
+        # and the block is executed serially instead
+        try:
+            results = [future.result() for future in futures]
+        except Exception as error:
+            for future in futures:
+                future.cancel()
+            if isinstance(error, BrokenProcessPool):
+                # A worker died and the pool can't be used anymore, the next parallel block starts a new one
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            return execute_serial(txs, state)
+
+        receipts = [False] * len(txs)
+        fees = 0
+
+        for bin_receipts, accounts, bin_fees in results:
+            for index, applied in bin_receipts:
+                receipts[index] = applied
+            for account, value in accounts.items():
+                if account in state or not is_empty_account(value):
+                    state[account] = value
+            fees += bin_fees
+
+        return ExecutionResult(receipts=receipts, fees=fees, groups=len(groups), parallel=True)
+
+
+def execute_serial(txs: Sequence[ExecutionTx], state: MutableMapping[str, Dict[str, int]]) -> ExecutionResult:
+    receipts = []
+    fees = 0
+
+    for tx in txs:
+        accounts = {}
+        created = []
+        for account in get_touched_accounts(tx):
+            if account in state:
+                accounts[account] = state[account]
+            else:
+                accounts[account] = new_account()
+                created.append(account)
+        applied, fee = apply_transaction(tx, accounts)
+        if applied:
+            for account in created:
+                if not is_empty_account(accounts[account]):
+                    state[account] = accounts[account]
+        receipts.append(applied)
+        fees += fee
+
+    return ExecutionResult(receipts=receipts, fees=fees, groups=1, parallel=False)
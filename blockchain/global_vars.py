@@ -5,6 +5,12 @@ from typing import Dict, List, Any
 import toml
 
 from kv_storage import SimpleSQLiteDB
+from kv_log_storage import LogStructuredDB
+from kv_cache import CachedDB
+from cache_registry import CacheRegistry, POLICY_EPOCH, POLICY_TTL
+from mempool import Mempool, DEFAULT_MEMPOOL_SIZE
+from block_store import BlockStore
+from scheduler import SCHEDULER, EVENT_NEW_BLOCK
 
 from structures.transaction import Transaction
 from structures.threads_metadata_handlers import EpochHandler,ApprovementThreadMetadataHandler,GenerationThreadMetadataHandler
@@ -14,9 +20,28 @@ def sha256(data: str) -> str:
     return hashlib.sha256(data.encode()).hexdigest()
 
 
-def resolve_database(name: str) -> SimpleSQLiteDB:
-    db_path: str = os.path.join(os.environ.get(CHAINDATA_PATH,''), f"{name}.db")
-    return SimpleSQLiteDB(db_path)
+def resolve_database(name: str, profile: str = "wal", cache_bytes: int = 0, backend: str = "") -> SimpleSQLiteDB | LogStructuredDB | CachedDB:
+    # Backend per database: "sqlite" (default) or "log" for the append-only segment log.
+    # Picked with the argument or the <NAME>_DB_BACKEND environment variable, e.g. BLOCKS_DB_BACKEND=log
+    backend = backend or os.environ.get(f"{name}_DB_BACKEND", "sqlite")
+
+    if backend == "sqlite":
+        db = SimpleSQLiteDB(os.path.join(CHAINDATA_PATH, f"{name}.db"), profile=profile)
+    elif backend == "log":
+        db = LogStructuredDB(os.path.join(CHAINDATA_PATH, f"{name}_LOG"))
+    else:
+        raise ValueError(f"Unknown database backend '{backend}' for {name}, expected 'sqlite' or 'log'")
+
+    return CachedDB(db, name, cache_bytes) if cache_bytes else db
+
+
+def get_database_cache_stats() -> List[Dict[str, Any]]:
+    return [db.stats() for db in (BLOCKS_DB, EPOCH_DATA_DB, APPROVEMENT_THREAD_METADATA_DB, FINALIZATION_VOTING_STATS_DB) if isinstance(db, CachedDB)]
+
+
+def get_cache_stats() -> Dict[str, List[Dict[str, Any]]]:
+    # Everything the node caches, in memory and in front of the databases
+    return {"memory": GLOBAL_CACHES.stats(), "databases": get_database_cache_stats()}
 
 
 # Read the main path
@@ -40,15 +65,25 @@ with open('version.txt', 'r') as vf:
     CORE_MAJOR_VERSION: int = int(vf.read().strip())
 
 
-MEMPOOL: Dict[str, Transaction]
+# Node configuration, optional. Must be loaded before anything below reads its overrides
+
+configs_path = os.path.join(CHAINDATA_PATH, "configs.toml")
 
 CONFIGURATION: Dict[str, Any] = {}
 
-GLOBAL_CACHES: Dict[str, Any] = {
-    "APPROVEMENT_THREAD_CACHE": {},  # type: Dict[str, Any]
-    "FINALIZATION_PROOFS": {},  # type: Dict[str, Dict[str, str]]
-    "TEMP_CACHE": {}  # type: Dict[str, Any]
-}
+if os.path.isfile(configs_path):
+    with open(configs_path, "r") as f:
+        CONFIGURATION = toml.load(f)
+
+MEMPOOL = Mempool(max_size=CONFIGURATION.get("TXS_MEMPOOL_SIZE", DEFAULT_MEMPOOL_SIZE))
+
+# Every in-memory cache is bounded, sizes can be overridden with <NAME>_CACHE_SIZE in CONFIGURATION
+GLOBAL_CACHES = CacheRegistry()
+
+GLOBAL_CACHES.register("APPROVEMENT_THREAD_CACHE", max_entries=CONFIGURATION.get("APPROVEMENT_THREAD_CACHE_SIZE", 100_000))  # pool id -> PoolStorage
+GLOBAL_CACHES.register("FINALIZATION_PROOFS", max_entries=CONFIGURATION.get("FINALIZATION_PROOFS_CACHE_SIZE", 200_000), policy=POLICY_EPOCH)  # verified proof digests
+GLOBAL_CACHES.register("EPOCH_QUORUM", max_entries=4)  # epoch full id -> EpochQuorumData
+GLOBAL_CACHES.register("TEMP_CACHE", max_entries=CONFIGURATION.get("TEMP_CACHE_SIZE", 10_000), policy=POLICY_TTL, ttl_ms=60_000)
 
 
 
@@ -65,17 +100,23 @@ GENERATION_THREAD = GenerationThreadMetadataHandler(
 APPROVEMENT_THREAD = ApprovementThreadMetadataHandler(
     core_major_version=-1,
     network_parameters={},
-    epoch=EpochHandler(),  # Make sure EpochHandler has a default constructor
-    cache={}
+    epoch=EpochHandler(),
+    cache=GLOBAL_CACHES["APPROVEMENT_THREAD_CACHE"]
 )
 
 
 # Databases
 
-BLOCKS_DB = resolve_database("BLOCKS")
+# Blocks are written constantly, so they group-commit through the write-behind queue. Voting stats
+# are what stops the node from signing twice, so each write is fsynced before the signature leaves.
+# All four sit behind a read-through LRU, the working threads keep re-reading the same hot keys
+
+BLOCKS_DB = resolve_database("BLOCKS", profile="high_throughput", cache_bytes=64 * 1024 * 1024)
+
+EPOCH_DATA_DB = resolve_database("EPOCH_DATA", cache_bytes=16 * 1024 * 1024)
 
-EPOCH_DATA_DB = resolve_database("EPOCH_DATA")
+APPROVEMENT_THREAD_METADATA_DB = resolve_database("APPROVEMENT_THREAD_METADATA", cache_bytes=16 * 1024 * 1024)
 
-APPROVEMENT_THREAD_METADATA_DB = resolve_database("APPROVEMENT_THREAD_METADATA")
+FINALIZATION_VOTING_STATS_DB = resolve_database("FINALIZATION_VOTING_STATS", profile="wal_durable", cache_bytes=16 * 1024 * 1024)
 
-FINALIZATION_VOTING_STATS_DB = resolve_database("FINALIZATION_VOTING_STATS")
\ No newline at end of file
+BLOCK_STORE = BlockStore(BLOCKS_DB, on_block_stored=lambda block_id: SCHEDULER.notify(EVENT_NEW_BLOCK))
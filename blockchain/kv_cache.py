@@ -0,0 +1,206 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from kv_storage import SimpleSQLiteDB
+from kv_log_storage import LogStructuredDB
+
+
+# Stored in the LRU for keys known to be absent, so repeated misses skip SQLite too
+_MISSING = object()
+
+# Rough per-entry bookkeeping cost (OrderedDict node + tuple) on top of the key/value objects
+_ENTRY_OVERHEAD = 100
+
+
+class CachedDB:
+
+    """
+    Read-through LRU cache in front of a SimpleSQLiteDB (or LogStructuredDB) with the same API.
+
+    * The cache is bounded by an approximate byte size of keys + values
+    * Writes go to the database first and then update the cache (write-through). Writers are
+      serialized across both steps, so the cache always ends with the value written last
+    * Misses are cached as well, so polling for a key that does not exist yet stays in memory
+    * Keys written by atomic_put are not cached until atomic_commit decides their fate,
+      so a rolled back batch can never leave stale values behind
+    """
+
+    def __init__(self, db: Union[SimpleSQLiteDB, LogStructuredDB], name: str, max_bytes: int = 16 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError(f"Cache size for {name} must be positive, got {max_bytes}")
+
+        self.db = db
+        self.name = name
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, Tuple[object, int]]" = OrderedDict() # key -> (value or _MISSING, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # held across the database write and the cache update, readers don't take it
+        self._atomic_keys: Set[str] = set()
+        # Bumped by every write. A read that raced with a write doesn't get cached, it might be stale
+        self._generation = 0
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # Reads
+
+    def get(self, key: str) -> Optional[str]:
+        cached, value = self._lookup(key)
+        return value if cached else self._load(key)
+
+    def contains(self, key: str) -> bool:
+        cached, value = self._lookup(key)
+        return (value if cached else self._load(key)) is not None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        result: Dict[str, str] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            cached, value = self._lookup(key)
+            if not cached:
+                missing.append(key)
+            elif value is not None:
+                result[key] = value
+
+        if missing:
+            generation = self._generation
+            found = self.db.get_many(missing)
+            for key in missing:
+                self._remember(key, found.get(key), generation)
+            result.update(found)
+
+        return result
+
+    # Range reads go straight to the database so a full scan can't flush the hot set
+
+    def keys(self):
+        return self.db.keys()
+
+    def iter_keys(self, prefix: str = '', **kwargs) -> Iterator[str]:
+        return self.db.iter_keys(prefix, **kwargs)
+
+    def scan_prefix(self, prefix: str, **kwargs) -> Iterator[Tuple[str, str]]:
+        return self.db.scan_prefix(prefix, **kwargs)
+
+    def scan_range(self, start: str, end: Optional[str] = None, **kwargs) -> Iterator[Tuple[str, str]]:
+        return self.db.scan_range(start, end, **kwargs)
+
+    # Writes
+
+    def put(self, key: str, value: str):
+        with self._write_lock:
+            self.db.put(key, value)
+            self._store(key, value)
+
+    def put_many(self, items: Union[Dict[str, str], Iterable[Tuple[str, str]]]):
+        pairs = list(items.items()) if isinstance(items, dict) else list(items)
+        with self._write_lock:
+            self.db.put_many(pairs)
+            for key, value in pairs:
+                self._store(key, value)
+
+    def delete(self, key: str):
+        with self._write_lock:
+            self.db.delete(key)
+            self._store(key, None)
+
+    def atomic_put(self, key: str, value: str):
+        with self._lock:
+            self._generation += 1
+            self._atomic_keys.add(key)
+            self._drop(key)
+        self.db.atomic_put(key, value)
+
+    def atomic_commit(self) -> bool:
+        committed = self.db.atomic_commit()
+        with self._lock:
+            # Either way the next read for these keys goes to the database
+            self._generation += 1
+            for key in self._atomic_keys:
+                self._drop(key)
+            self._atomic_keys.clear()
+        return committed
+
+    def flush(self):
+        self.db.flush()
+
+    def close(self):
+        self.clear()
+        self.db.close()
+
+    # Cache management
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Union[str, int, float]]:
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._negative_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[str]]:
+        # (True, value) on a hit, where a negative hit has value None. (False, None) on a miss
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if entry[0] is _MISSING:
+                self._negative_hits += 1
+                return True, None
+            self._hits += 1
+            return True, entry[0] # type: ignore
+
+    def _load(self, key: str) -> Optional[str]:
+        generation = self._generation
+        value = self.db.get(key)
+        self._remember(key, value, generation)
+        return value
+
+    def _remember(self, key: str, value: Optional[str], generation: int):
+        # Caches the result of a database read, unless a write happened meanwhile or an open atomic batch touched the key
+        with self._lock:
+            if generation != self._generation or key in self._atomic_keys:
+                return
+            self._insert(key, value)
+
+    def _store(self, key: str, value: Optional[str]):
+        with self._lock:
+            self._generation += 1
+            self._insert(key, value)
+
+    def _insert(self, key: str, value: Optional[str]):
+        size = sys.getsizeof(key) + (sys.getsizeof(value) if value is not None else 0) + _ENTRY_OVERHEAD
+        self._drop(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (_MISSING if value is None else value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._evictions += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
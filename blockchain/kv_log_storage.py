@@ -0,0 +1,386 @@
+import os
+import struct
+import threading
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from itertools import takewhile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# Append-only, log-structured alternative to SimpleSQLiteDB for write-once data like blocks and proofs.
+#
+# Every write is appended to the active segment file (000001.log, 000002.log, ...) and an in-memory
+# hash index maps each live key to where its value sits on disk, so a read is one dict lookup plus one pread.
+# A sorted list of the same keys serves the ordered scans, a scan seeks into it and stops at the end of its range.
+#
+# Record layout (little endian):
+#
+#   crc32(4) | type(1) | key length(4) | value length(4) | key | value
+#
+# The checksum covers everything after itself. A BATCH record carries a sequence of PUT/DELETE entries
+# (same layout without the checksum) as its value, so put_many and atomic_commit land all or nothing.
+#
+# On open every segment is replayed in order to rebuild the index. A crash can only tear the tail of the
+# newest segment, which is truncated back to the last complete record.
+#
+# Overwritten and deleted values stay in the log as dead bytes until compaction rewrites the live
+# records into fresh segments and removes the old ones.
+
+SEGMENT_SUFFIX = '.log'
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+# Keys a scan reads from the sorted index per locked step
+SCAN_BATCH_SIZE = 500
+
+# Compaction runs when a segment is sealed and at least this share of the log is dead
+COMPACTION_DEAD_RATIO = 0.5
+
+_CRC = struct.Struct('<I')
+_ENTRY = struct.Struct('<BII') # type, key length, value length
+
+_PUT = 1
+_DELETE = 2
+_BATCH = 3
+
+
+class LogStructuredDB:
+
+    def __init__(self, directory: str, segment_max_bytes: int = SEGMENT_MAX_BYTES, sync_writes: bool = False, compaction_ratio: float = COMPACTION_DEAD_RATIO):
+        # sync_writes=False hands every record to the OS right away (survives a process crash) and fsyncs
+        # on flush(), segment rotation and close(). With sync_writes=True every write is fsynced
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.sync_writes = sync_writes
+        self.compaction_ratio = compaction_ratio
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int, int, int]] = {} # key -> (segment id, value offset, value length, entry size)
+        self._ordered_keys: Optional[List[str]] = None # the index keys sorted, built once recovery has replayed the log
+        self._segment_sizes: Dict[int, int] = {}
+        self._readers: Dict[int, int] = {} # segment id -> read only fd
+        self._live_bytes = 0
+        self._batch: Optional[Dict[str, Optional[str]]] = None
+        self._compacting = False
+
+        self._active_id = 0
+        self._writer = -1
+        self._recover()
+
+    # Reads
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if self._batch is not None and key in self._batch:
+                return self._batch[key]
+            location = self._index.get(key)
+            if location is None:
+                return None
+            return self._read_value(location)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        # Returns only the keys that exist
+        result: Dict[str, str] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                value = self.get(key)
+                if value is not None:
+                    result[key] = value
+        return result
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            if self._batch is not None and key in self._batch:
+                return self._batch[key] is not None
+            return key in self._index
+
+    def keys(self):
+        with self._lock:
+            return list(self._index)
+
+    def scan_prefix(self, prefix: str, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        # Streams (key, value) pairs for keys starting with prefix, in key order
+        for key in self._scan_keys(prefix, lambda k: k.startswith(prefix), batch_size):
+            value = self.get(key)
+            if value is not None:
+                yield key, value
+
+    def scan_range(self, start: str, end: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        # Streams (key, value) pairs with start <= key < end (no upper limit when end is None), values read lazily
+        for key in self._scan_keys(start, lambda k: end is None or k < end, batch_size):
+            value = self.get(key)
+            if value is not None:
+                yield key, value
+
+    def iter_keys(self, prefix: str = '', batch_size: int = SCAN_BATCH_SIZE) -> Iterator[str]:
+        yield from self._scan_keys(prefix, lambda k: k.startswith(prefix), batch_size)
+
+    # Writes
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._drop_staged([key])
+            self._append([(_PUT, key, value)])
+
+    def put_many(self, items: Union[Dict[str, str], Iterable[Tuple[str, str]]]):
+        # All pairs go in as one BATCH record
+        pairs = list(items.items()) if isinstance(items, dict) else list(items)
+        if pairs:
+            with self._lock:
+                self._drop_staged([key for key, _ in pairs])
+                self._append([(_PUT, key, value) for key, value in pairs])
+
+    def delete(self, key: str):
+        with self._lock:
+            self._drop_staged([key])
+            if key in self._index:
+                self._append([(_DELETE, key, None)])
+
+    def atomic_put(self, key: str, value: str):
+        # Staged in memory (and visible to reads) until atomic_commit writes the batch
+        with self._lock:
+            if self._batch is None:
+                self._batch = {}
+            self._batch[key] = value
+
+    def atomic_commit(self) -> bool:
+        with self._lock:
+            if self._batch is None:
+                return True
+            batch, self._batch = self._batch, None
+            if not batch:
+                return True
+            try:
+                self._append([(_PUT, key, value) for key, value in batch.items()])
+                return True
+            except OSError:
+                return False
+
+    def flush(self):
+        with self._lock:
+            os.fsync(self._writer)
+
+    def compact(self):
+        # Rewrites every live record into new segments after the active one, then removes the old ones.
+        # Old segments are removed oldest first, so a crash half way can't resurrect deleted keys
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            try:
+                old_segments = sorted(self._segment_sizes)
+                self._open_segment(self._active_id + 1)
+                for key, location in list(self._index.items()):
+                    self._append([(_PUT, key, self._read_value(location))])
+                os.fsync(self._writer)
+
+                for segment_id in old_segments:
+                    reader = self._readers.pop(segment_id, None)
+                    if reader is not None:
+                        os.close(reader)
+                    del self._segment_sizes[segment_id]
+                    os.remove(self._segment_path(segment_id))
+            finally:
+                self._compacting = False
+
+    def close(self):
+        with self._lock:
+            # Same as SQLite: an uncommitted atomic batch is dropped
+            self._batch = None
+            if self._writer >= 0:
+                os.fsync(self._writer)
+                os.close(self._writer)
+                self._writer = -1
+            for reader in self._readers.values():
+                os.close(reader)
+            self._readers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            total = sum(self._segment_sizes.values())
+            return {
+                "keys": len(self._index),
+                "segments": len(self._segment_sizes),
+                "total_bytes": total,
+                "live_bytes": self._live_bytes,
+                "dead_bytes": total - self._live_bytes
+            }
+
+    # Internals
+
+    def _drop_staged(self, keys: List[str]):
+        # A plain write after atomic_put wins, the staged value must not come back on atomic_commit
+        if self._batch:
+            for key in keys:
+                self._batch.pop(key, None)
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:06d}{SEGMENT_SUFFIX}")
+
+    def _scan_keys(self, start: str, in_range, batch_size: int) -> Iterator[str]:
+        # Keys from start on, in order, while in_range(key) holds. Each page is a bisect into the sorted index
+        # under the lock, which isn't held while the caller iterates, so the next page resumes after the last key.
+        # Staged keys not in the index yet are merged into the page they fall in
+        batch_size = max(batch_size, 1)
+        last: Optional[str] = None
+
+        while True:
+            with self._lock:
+                ordered = self._ordered_keys
+                position = bisect_left(ordered, start) if last is None else bisect_right(ordered, last)
+                page = list(takewhile(in_range, ordered[position:position + batch_size]))
+                complete = len(page) < batch_size
+                if self._batch:
+                    staged = [
+                        key for key in self._batch
+                        if key not in self._index and (key >= start if last is None else key > last)
+                        and in_range(key) and (complete or key < page[-1])
+                    ]
+                    if staged:
+                        # In a full page they all sort below its last key, which stays where the next page resumes
+                        page.extend(staged)
+                        page.sort()
+
+            yield from page
+            if complete:
+                return
+            last = page[-1]
+
+    def _read_value(self, location: Tuple[int, int, int, int]) -> str:
+        segment_id, offset, length, _ = location
+        reader = self._readers.get(segment_id)
+        if reader is None:
+            reader = self._readers[segment_id] = os.open(self._segment_path(segment_id), os.O_RDONLY)
+        return os.pread(reader, length, offset).decode()
+
+    def _open_segment(self, segment_id: int):
+        if self._writer >= 0:
+            os.fsync(self._writer)
+            os.close(self._writer)
+        self._writer = os.open(self._segment_path(segment_id), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._active_id = segment_id
+        self._segment_sizes.setdefault(segment_id, os.fstat(self._writer).st_size)
+
+    def _append(self, entries: List[Tuple[int, str, Optional[str]]]):
+        # Encodes the entries as one record (a BATCH when there is more than one) and appends it
+        encoded = [(kind, key, key.encode(), b'' if value is None else value.encode()) for kind, key, value in entries]
+
+        with self._lock:
+            size = _CRC.size + sum(_ENTRY.size + len(k) + len(v) for _, _, k, v in encoded)
+            if len(encoded) > 1:
+                size += _ENTRY.size # BATCH header
+            active_size = self._segment_sizes[self._active_id]
+            if active_size and active_size + size > self.segment_max_bytes:
+                self._rotate()
+                active_size = self._segment_sizes[self._active_id]
+
+            parts = []
+            updates = []
+            if len(encoded) == 1:
+                kind, key, key_bytes, value_bytes = encoded[0]
+                parts.append(_ENTRY.pack(kind, len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+                updates.append((kind, key, active_size + _CRC.size + _ENTRY.size + len(key_bytes), len(value_bytes), size - _CRC.size))
+            else:
+                position = active_size + _CRC.size + _ENTRY.size
+                parts.append(_ENTRY.pack(_BATCH, 0, size - _CRC.size - _ENTRY.size))
+                for kind, key, key_bytes, value_bytes in encoded:
+                    parts.append(_ENTRY.pack(kind, len(key_bytes), len(value_bytes)) + key_bytes + value_bytes)
+                    updates.append((kind, key, position + _ENTRY.size + len(key_bytes), len(value_bytes), _ENTRY.size + len(key_bytes) + len(value_bytes)))
+                    position += _ENTRY.size + len(key_bytes) + len(value_bytes)
+
+            body = b''.join(parts)
+            record = _CRC.pack(zlib.crc32(body)) + body
+            try:
+                written = os.write(self._writer, record)
+                if written != len(record):
+                    raise OSError(f"Short write to {self._segment_path(self._active_id)}")
+                if self.sync_writes:
+                    os.fsync(self._writer)
+            except OSError:
+                # Never leave a partial record behind the index's back
+                os.ftruncate(self._writer, active_size)
+                raise
+
+            self._segment_sizes[self._active_id] = active_size + len(record)
+            for kind, key, offset, length, entry_size in updates:
+                self._apply(kind, key, self._active_id, offset, length, entry_size)
+
+    def _apply(self, kind: int, key: str, segment_id: int, offset: int, length: int, entry_size: int):
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._live_bytes -= previous[3]
+        if kind == _PUT:
+            self._index[key] = (segment_id, offset, length, entry_size)
+            self._live_bytes += entry_size
+
+        # Only new and deleted keys move the sorted index, overwrites and compaction leave it alone
+        ordered = self._ordered_keys
+        if ordered is not None:
+            if kind == _PUT and previous is None:
+                insort(ordered, key)
+            elif kind == _DELETE and previous is not None:
+                del ordered[bisect_left(ordered, key)]
+
+    def _rotate(self):
+        self._open_segment(self._active_id + 1)
+        if self._compacting:
+            return
+        total = sum(self._segment_sizes.values())
+        if total and (total - self._live_bytes) / total >= self.compaction_ratio:
+            self.compact()
+
+    def _recover(self):
+        segment_ids = sorted(
+            int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+        for position, segment_id in enumerate(segment_ids):
+            path = self._segment_path(segment_id)
+            with open(path, 'rb') as file:
+                data = file.read()
+            valid_end = self._replay(segment_id, data)
+
+            if valid_end < len(data):
+                if position != len(segment_ids) - 1:
+                    raise RuntimeError(f"Corrupted record at offset {valid_end} in sealed segment {path}")
+                # Torn write from a crash, drop it
+                with open(path, 'r+b') as file:
+                    file.truncate(valid_end)
+            self._segment_sizes[segment_id] = valid_end
+
+        # One sort after the replay instead of an insort per key while it runs
+        self._ordered_keys = sorted(self._index)
+        self._open_segment(segment_ids[-1] if segment_ids else 1)
+
+    def _replay(self, segment_id: int, data: bytes) -> int:
+        # Applies every complete record to the index and returns where the valid data ends
+        view = memoryview(data)
+        position = 0
+        header_size = _CRC.size + _ENTRY.size
+
+        while position + header_size <= len(data):
+            (crc,) = _CRC.unpack_from(data, position)
+            kind, key_length, value_length = _ENTRY.unpack_from(data, position + _CRC.size)
+            end = position + header_size + key_length + value_length
+            if end > len(data) or zlib.crc32(view[position + _CRC.size:end]) != crc:
+                break
+
+            if kind == _BATCH:
+                entry = position + header_size
+                while entry < end:
+                    sub_kind, sub_key_length, sub_value_length = _ENTRY.unpack_from(data, entry)
+                    key_start = entry + _ENTRY.size
+                    entry_size = _ENTRY.size + sub_key_length + sub_value_length
+                    key = bytes(view[key_start:key_start + sub_key_length]).decode()
+                    self._apply(sub_kind, key, segment_id, key_start + sub_key_length, sub_value_length, entry_size)
+                    entry += entry_size
+            else:
+                key_start = position + header_size
+                key = bytes(view[key_start:key_start + key_length]).decode()
+                self._apply(kind, key, segment_id, key_start + key_length, value_length, end - position - _CRC.size)
+
+            position = end
+
+        return position
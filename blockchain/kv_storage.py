@@ -1,65 +1,305 @@
 import sqlite3
-from typing import Optional
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# Statements are module constants so sqlite3's per-connection statement cache
+# compiles each of them once and reuses the prepared statement afterwards
+CREATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS kv_store (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+'''
+UPSERT_SQL = '''
+    INSERT INTO kv_store (key, value) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value=excluded.value
+'''
+SELECT_VALUE_SQL = 'SELECT value FROM kv_store WHERE key=?'
+SELECT_EXISTS_SQL = 'SELECT 1 FROM kv_store WHERE key=?'
+SELECT_KEYS_SQL = 'SELECT key FROM kv_store'
+DELETE_SQL = 'DELETE FROM kv_store WHERE key=?'
+# Range scans page through the primary key index, never the whole table at once
+SCAN_RANGE_SQL = 'SELECT key, value FROM kv_store WHERE key > ? AND key < ? ORDER BY key LIMIT ?'
+SCAN_FROM_SQL = 'SELECT key, value FROM kv_store WHERE key > ? ORDER BY key LIMIT ?'
+SCAN_KEYS_RANGE_SQL = 'SELECT key FROM kv_store WHERE key > ? AND key < ? ORDER BY key LIMIT ?'
+SCAN_KEYS_FROM_SQL = 'SELECT key FROM kv_store WHERE key > ? ORDER BY key LIMIT ?'
+# get_many with more keys than fit in one IN (...) list joins against a temp table instead
+CREATE_LOOKUP_SQL = 'CREATE TEMP TABLE IF NOT EXISTS kv_lookup (key TEXT PRIMARY KEY)'
+INSERT_LOOKUP_SQL = 'INSERT OR IGNORE INTO kv_lookup (key) VALUES (?)'
+SELECT_LOOKUP_SQL = 'SELECT kv_store.key, kv_store.value FROM kv_store JOIN kv_lookup ON kv_store.key = kv_lookup.key'
+CLEAR_LOOKUP_SQL = 'DELETE FROM kv_lookup'
+
+MAX_IN_PARAMS = 500
+SCAN_BATCH_SIZE = 500
+
+STATEMENT_CACHE_SIZE = 256
+
+
+# Performance profiles
+#
+# default          - rollback journal, every put is its own durable transaction
+# wal              - WAL journal with tuned pragmas, every put still commits immediately
+# wal_durable      - same as wal, but each commit is fsynced before it returns (synchronous=FULL),
+#                    for records that must survive a power loss once written
+# high_throughput  - WAL pragmas plus a write-behind queue that group-commits puts
+#                    every GROUP_COMMIT_INTERVAL_MS or GROUP_COMMIT_MAX_OPS writes.
+#                    Reads see queued writes, but a crash loses at most one interval.
+#                    Writes made while an atomic batch is open go into that batch instead
+
+WAL_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',     # 64 MiB page cache
+    'PRAGMA mmap_size=268435456',   # 256 MiB memory mapped reads
+    'PRAGMA temp_store=MEMORY',
+)
+
+WAL_DURABLE_PRAGMAS = tuple('PRAGMA synchronous=FULL' if pragma.startswith('PRAGMA synchronous') else pragma for pragma in WAL_PRAGMAS)
+
+SQLITE_PROFILES = {
+    'default': {'pragmas': (), 'write_behind': False},
+    'wal': {'pragmas': WAL_PRAGMAS, 'write_behind': False},
+    'wal_durable': {'pragmas': WAL_DURABLE_PRAGMAS, 'write_behind': False},
+    'high_throughput': {'pragmas': WAL_PRAGMAS, 'write_behind': True},
+}
+
+GROUP_COMMIT_INTERVAL_MS = 5
+GROUP_COMMIT_MAX_OPS = 1000
+
+# Marks a queued delete in the write-behind buffer
+_DELETED = object()
+
 
 class SimpleSQLiteDB:
-    
-    def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.execute('''
-            CREATE TABLE IF NOT EXISTS kv_store (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
+
+    def __init__(
+        self,
+        db_path: str,
+        profile: str = 'default',
+        group_commit_interval_ms: int = GROUP_COMMIT_INTERVAL_MS,
+        group_commit_max_ops: int = GROUP_COMMIT_MAX_OPS
+    ):
+        if profile not in SQLITE_PROFILES:
+            raise ValueError(f"Unknown SQLite profile '{profile}', expected one of {list(SQLITE_PROFILES)}")
+
+        self.profile = profile
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in SQLITE_PROFILES[profile]['pragmas']:
+            self.conn.execute(pragma)
+        self.conn.execute(CREATE_TABLE_SQL)
         self.conn.commit()
         self._transaction_active = False
 
+        # Guards the connection and the write-behind buffer, which are shared with the flusher thread
+        self._lock = threading.RLock()
+        self._write_behind = SQLITE_PROFILES[profile]['write_behind']
+        self._pending: Dict[str, object] = {}
+        self._pending_changed = threading.Condition(self._lock)
+        self._closing = False
+        self._flusher: Optional[threading.Thread] = None
+
+        if self._write_behind:
+            self.group_commit_interval = group_commit_interval_ms / 1000
+            self.group_commit_max_ops = group_commit_max_ops
+            self._flusher = threading.Thread(target=self._flush_loop, name=f'GroupCommit-{db_path}', daemon=True)
+            self._flusher.start()
+
     def put(self, key: str, value: str):
-        with self.conn:
-            self.conn.execute('''
-                INSERT INTO kv_store (key, value) VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET value=excluded.value
-            ''', (key, value))
+        # While an atomic batch is open, writes join it so they stay ordered with its atomic_put calls
+        with self._lock:
+            if self._transaction_active:
+                self.conn.execute(UPSERT_SQL, (key, value))
+            elif self._write_behind:
+                self._queue_pending(((key, value),))
+            else:
+                with self.conn:
+                    self.conn.execute(UPSERT_SQL, (key, value))
+
+    def put_many(self, items: Union[Dict[str, str], Iterable[Tuple[str, str]]]):
+        # All pairs go in with one transaction (or one trip to the write-behind buffer)
+        pairs = list(items.items()) if isinstance(items, dict) else list(items)
+        if not pairs:
+            return
+
+        with self._lock:
+            if self._transaction_active:
+                self.conn.executemany(UPSERT_SQL, pairs)
+            elif self._write_behind:
+                self._queue_pending(pairs)
+            else:
+                with self.conn:
+                    self.conn.executemany(UPSERT_SQL, pairs)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        # Returns only the keys that exist
+        result: Dict[str, str] = {}
+        with self._lock:
+            missing: List[str] = []
+            for key in dict.fromkeys(keys):
+                if key in self._pending:
+                    value = self._pending[key]
+                    if value is not _DELETED:
+                        result[key] = value # type: ignore
+                else:
+                    missing.append(key)
+
+            if not missing:
+                return result
+
+            if len(missing) <= MAX_IN_PARAMS:
+                placeholders = ','.join('?' * len(missing))
+                rows = self.conn.execute(f'SELECT key, value FROM kv_store WHERE key IN ({placeholders})', missing).fetchall()
+            else:
+                self.conn.execute(CREATE_LOOKUP_SQL)
+                self.conn.executemany(INSERT_LOOKUP_SQL, ((key,) for key in missing))
+                rows = self.conn.execute(SELECT_LOOKUP_SQL).fetchall()
+                self.conn.execute(CLEAR_LOOKUP_SQL)
+                if not self._transaction_active:
+                    self.conn.commit()
+
+        result.update(rows)
+        return result
+
+    def scan_prefix(self, prefix: str, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        # Streams (key, value) pairs for keys starting with prefix, in key order
+        return self.scan_range(prefix, _prefix_upper_bound(prefix), batch_size)
+
+    def scan_range(self, start: str, end: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE) -> Iterator[Tuple[str, str]]:
+        # Streams (key, value) pairs with start <= key < end (no upper limit when end is None).
+        # Each batch is a separate indexed query, so the lock is not held while the caller iterates
+        yield from self._scan(start, end, batch_size, keys_only=False)
+
+    def iter_keys(self, prefix: str = '', batch_size: int = SCAN_BATCH_SIZE) -> Iterator[str]:
+        # Same as keys() but streamed
+        yield from self._scan(prefix, _prefix_upper_bound(prefix), batch_size, keys_only=True)
+
+    def _scan(self, start: str, end: Optional[str], batch_size: int, keys_only: bool) -> Iterator:
+        with self._lock:
+            self.flush()
+            row = self.conn.execute(SELECT_VALUE_SQL, (start,)).fetchone()
+        # Pages below are exclusive of the last key seen, so the start key is checked on its own
+        if row is not None and (end is None or start < end):
+            yield start if keys_only else (start, row[0])
+
+        last_key = start
+        while True:
+            with self._lock:
+                self.flush()
+                if keys_only:
+                    sql, params = (SCAN_KEYS_FROM_SQL, (last_key, batch_size)) if end is None else (SCAN_KEYS_RANGE_SQL, (last_key, end, batch_size))
+                else:
+                    sql, params = (SCAN_FROM_SQL, (last_key, batch_size)) if end is None else (SCAN_RANGE_SQL, (last_key, end, batch_size))
+                rows = self.conn.execute(sql, params).fetchall()
+
+            for row in rows:
+                yield row[0] if keys_only else (row[0], row[1])
+
+            if len(rows) < batch_size:
+                return
+            last_key = rows[-1][0]
 
     def get(self, key: str) -> Optional[str]:
-        cursor = self.conn.execute('SELECT value FROM kv_store WHERE key=?', (key,))
-        row = cursor.fetchone()
+        with self._lock:
+            if key in self._pending:
+                value = self._pending[key]
+                return None if value is _DELETED else value # type: ignore
+            row = self.conn.execute(SELECT_VALUE_SQL, (key,)).fetchone()
         return row[0] if row else None
 
     def delete(self, key: str):
-        with self.conn:
-            self.conn.execute('DELETE FROM kv_store WHERE key=?', (key,))
+        with self._lock:
+            if self._transaction_active:
+                self.conn.execute(DELETE_SQL, (key,))
+            elif self._write_behind:
+                self._queue_pending(((key, _DELETED),))
+            else:
+                with self.conn:
+                    self.conn.execute(DELETE_SQL, (key,))
 
     def contains(self, key: str) -> bool:
-        cursor = self.conn.execute('SELECT 1 FROM kv_store WHERE key=?', (key,))
-        return cursor.fetchone() is not None
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key] is not _DELETED
+            return self.conn.execute(SELECT_EXISTS_SQL, (key,)).fetchone() is not None
 
     def keys(self):
-        cursor = self.conn.execute('SELECT key FROM kv_store')
-        return [row[0] for row in cursor.fetchall()]
+        with self._lock:
+            self.flush()
+            cursor = self.conn.execute(SELECT_KEYS_SQL)
+            return [row[0] for row in cursor.fetchall()]
 
     def atomic_put(self, key: str, value: str):
-        if not self._transaction_active:
-            self.conn.execute('BEGIN')
-            self._transaction_active = True
-        self.conn.execute('''
-            INSERT INTO kv_store (key, value) VALUES (?, ?)
-            ON CONFLICT(key) DO UPDATE SET value=excluded.value
-        ''', (key, value))
+        with self._lock:
+            if not self._transaction_active:
+                # Queued writes happened before this batch, so they must land first
+                self.flush()
+                self.conn.execute('BEGIN')
+                self._transaction_active = True
+            self.conn.execute(UPSERT_SQL, (key, value))
 
     def atomic_commit(self) -> bool:
-        if not self._transaction_active:
-            return True
-        try:
-            self.conn.commit()
-            self._transaction_active = False
-            return True
-        except sqlite3.Error:
-            self.conn.rollback()
-            self._transaction_active = False
-            return False
+        with self._lock:
+            if not self._transaction_active:
+                return True
+            try:
+                self.conn.commit()
+                self._transaction_active = False
+                return True
+            except sqlite3.Error:
+                self.conn.rollback()
+                self._transaction_active = False
+                return False
+
+    def flush(self):
+        # Commits everything in the write-behind buffer as one transaction.
+        # Skipped while an atomic batch is open, the flusher retries after it commits
+        with self._lock:
+            if not self._pending or self._transaction_active:
+                return
+            batch, self._pending = self._pending, {}
+            with self.conn:
+                self.conn.executemany(UPSERT_SQL, [(k, v) for k, v in batch.items() if v is not _DELETED])
+                self.conn.executemany(DELETE_SQL, [(k,) for k, v in batch.items() if v is _DELETED])
+
+    def _queue_pending(self, items: Iterable[Tuple[str, object]]):
+        # Caller holds the lock and no atomic batch is open (it flushed the buffer when it began)
+        self._pending.update(items)
+        if len(self._pending) >= self.group_commit_max_ops:
+            self._pending_changed.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self._pending_changed:
+                self._pending_changed.wait_for(
+                    lambda: self._closing or (len(self._pending) >= self.group_commit_max_ops and not self._transaction_active),
+                    timeout=self.group_commit_interval
+                )
+                closing = self._closing
+            self.flush()
+            if closing:
+                return
 
     def close(self):
-        if self._transaction_active:
-            self.conn.rollback()
-        self.conn.close()
+        if self._flusher is not None:
+            with self._pending_changed:
+                self._closing = True
+                self._pending_changed.notify()
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            if self._transaction_active:
+                self.conn.rollback()
+                self._transaction_active = False
+            self.flush()
+            self.conn.close()
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    # Smallest string greater than every string starting with prefix (None if there is none)
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
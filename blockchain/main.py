@@ -1,5 +1,7 @@
 import asyncio
 from tcp_server.server import start_tcp_server
+from prepare_blockchain import prepare_blockchain
+from snapshots import periodic_snapshots
 
 from working_threads.block_generation import block_generation
 from working_threads.block_sharing_and_proofs_grabbing import block_sharing
@@ -11,6 +13,8 @@ from working_threads.verification_thread_aligner import verification_thread_alig
 
 async def main():
 
+    prepare_blockchain()
+
     server_task = asyncio.create_task(start_tcp_server())
 
     worker_tasks = [
@@ -19,7 +23,8 @@ async def main():
         asyncio.create_task(find_new_epoch()),
         asyncio.create_task(leader_rotation()),
         asyncio.create_task(next_epoch_proposer()),
-        asyncio.create_task(verification_thread_aligner())
+        asyncio.create_task(verification_thread_aligner()),
+        asyncio.create_task(periodic_snapshots())
     ]
 
     all_tasks = [server_task] + worker_tasks
@@ -0,0 +1,281 @@
+import heapq
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from structures.compact import PUBKEYS, CompactTransaction, PubkeyRegistry
+from structures.transaction import Transaction
+
+
+DEFAULT_MEMPOOL_SIZE = 300_000
+
+# Lazily deleted heap entries are dropped once they outnumber live ones by this factor
+HEAP_GARBAGE_FACTOR = 2
+
+
+@dataclass(slots=True)
+class MempoolEntry:
+    tx: CompactTransaction
+    fee: int
+    size: int # bytes in the canonical encoding
+    seq: int  # arrival order, breaks fee ties first come first served
+
+
+class NonceQueue:
+
+    """
+    One creator's queued txs, nonce -> tx hash, with the lowest and highest nonce in O(log k).
+
+    Both ends are heaps with lazy deletion: a nonce that is no longer queued is dropped when it
+    surfaces, and the heaps are rebuilt once stale nonces outnumber live ones.
+    """
+
+    __slots__ = ("_hashes", "_low", "_high")
+
+    def __init__(self):
+        self._hashes: Dict[int, bytes] = {}
+        self._low: List[int] = []
+        self._high: List[int] = [] # negated nonces
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def get(self, nonce: int) -> Optional[bytes]:
+        return self._hashes.get(nonce)
+
+    def put(self, nonce: int, tx_hash: bytes):
+        if nonce not in self._hashes:
+            heapq.heappush(self._low, nonce)
+            heapq.heappush(self._high, -nonce)
+            if len(self._low) > HEAP_GARBAGE_FACTOR * len(self._hashes) + 16:
+                self._low = list(self._hashes)
+                heapq.heapify(self._low)
+                self._high = [-nonce for nonce in self._hashes]
+                heapq.heapify(self._high)
+        self._hashes[nonce] = tx_hash
+
+    def pop(self, nonce: int) -> bytes:
+        return self._hashes.pop(nonce)
+
+    def lowest(self) -> int:
+        low = self._low
+        while low[0] not in self._hashes:
+            heapq.heappop(low)
+        return low[0]
+
+    def highest(self) -> int:
+        high = self._high
+        while -high[0] not in self._hashes:
+            heapq.heappop(high)
+        return -high[0]
+
+
+class Mempool:
+
+    """
+    Pending transactions ordered by fee, with per-creator nonce queues.
+
+    * Only a creator's next executable nonce competes for block space, later nonces
+      follow once it is included. With get_account_nonce, the head must match the
+      account's next nonce, otherwise the lowest queued nonce is the head
+    * A transaction with the same creator and nonce replaces the queued one only with a higher fee
+    * When full, the lowest fee entry among the creators' last queued nonces (queue tails) is evicted
+      if the newcomer pays more, otherwise it is rejected. Evicting from the tail never leaves a
+      creator's queue starting at a nonce that isn't executable yet
+    * Entries are CompactTransaction, select_for_block hands out regular Transaction objects
+
+    Both heaps use lazy deletion, stale entries are skipped when they surface.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MEMPOOL_SIZE, get_account_nonce: Optional[Callable[[str], int]] = None, registry: PubkeyRegistry = PUBKEYS):
+        self.max_size = max_size
+        self.get_account_nonce = get_account_nonce
+        self.registry = registry
+
+        self._lock = threading.RLock()
+        self._entries: Dict[bytes, MempoolEntry] = {} # tx hash -> entry
+        self._queues: Dict[int, NonceQueue] = {} # creator id -> its queued txs
+        self._heads: Dict[int, bytes] = {} # creator id -> hash of its executable head
+        self._ready: List[Tuple[int, int, bytes]] = [] # max-heap of heads: (-fee, seq, hash)
+        self._cheapest: List[Tuple[int, int, bytes]] = [] # min-heap of queue tails: (fee, -seq, hash)
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, tx_hash: str) -> bool:
+        return bytes.fromhex(tx_hash) in self._entries
+
+    def get(self, tx_hash: str) -> Optional[Transaction]:
+        entry = self._entries.get(bytes.fromhex(tx_hash))
+        return entry.tx.to_transaction(self.registry) if entry else None
+
+    def add(self, tx: Transaction) -> bool:
+        # Returns False for duplicates, stale nonces, underpriced replacements and when full of better paying txs
+        try:
+            fee = int(tx.fee)
+        except ValueError:
+            return False
+
+        tx_hash = tx.get_hash_bytes()
+
+        with self._lock:
+            if tx_hash in self._entries:
+                return False
+
+            if self.get_account_nonce is not None and tx.nonce < self.get_account_nonce(tx.creator):
+                return False
+
+            creator_id = self.registry.intern(tx.creator)
+            queue = self._queues.get(creator_id)
+            replaced = queue.get(tx.nonce) if queue else None
+
+            if replaced is not None:
+                if fee <= self._entries[replaced].fee:
+                    return False
+                self._remove(replaced)
+            elif len(self._entries) >= self.max_size:
+                cheapest = self._peek_cheapest()
+                if cheapest is None or fee <= cheapest.fee:
+                    return False
+                # Evicting our own predecessor would leave the newcomer behind a gap
+                if cheapest.tx.creator_id == creator_id and cheapest.tx.nonce < tx.nonce:
+                    return False
+                self._remove(cheapest.tx.hash)
+
+            self._seq += 1
+            entry = MempoolEntry(CompactTransaction.from_transaction(tx, self.registry), fee, len(tx.to_bytes()), self._seq)
+            self._entries[tx_hash] = entry
+            queue = self._queues.get(creator_id)
+            if queue is None:
+                queue = self._queues[creator_id] = NonceQueue()
+            queue.put(tx.nonce, tx_hash)
+            if tx.nonce == queue.highest():
+                heapq.heappush(self._cheapest, (fee, -entry.seq, tx_hash))
+            self._update_head(creator_id)
+            self._collect_garbage()
+            return True
+
+    def remove(self, tx_hash: str) -> bool:
+        with self._lock:
+            return self._remove(bytes.fromhex(tx_hash))
+
+    def remove_included(self, transactions: Iterable[Transaction]):
+        # Called once a block is applied: drops the included txs and anything they made stale (same creator, lower or equal nonce)
+        with self._lock:
+            for tx in transactions:
+                self._remove(tx.get_hash_bytes())
+                creator_id = self.registry.intern(tx.creator)
+                queue = self._queues.get(creator_id)
+                while queue and queue.lowest() <= tx.nonce:
+                    self._remove(queue.get(queue.lowest()))
+                # The account nonce moved, a queued tx may have become executable
+                self._update_head(creator_id)
+            self._collect_garbage()
+
+    def select_for_block(self, max_txs: int, max_bytes: int) -> List[Transaction]:
+        # Best paying executable txs first, each creator's nonces in order. The mempool isn't modified,
+        # the selection is removed by remove_included once the block is accepted
+        selected: List[Transaction] = []
+        last_nonces: Dict[int, int] = {} # creator id -> nonce selected last
+
+        with self._lock:
+            # Heads are popped off the shared heap and pushed back afterwards, followers of the selected
+            # heads go to a local heap. O((k + stale) log n) for k selected, not a copy of the whole heap
+            ready = self._ready
+            followers: List[Tuple[int, int, bytes]] = []
+            popped_heads: List[Tuple[int, int, bytes]] = []
+            bytes_left = max_bytes
+
+            while (ready or followers) and len(selected) < max_txs:
+                if followers and (not ready or followers[0] < ready[0]):
+                    _, _, tx_hash = heapq.heappop(followers)
+                else:
+                    item = heapq.heappop(ready)
+                    tx_hash = item[2]
+                    if tx_hash in self._entries and self._heads.get(self._entries[tx_hash].tx.creator_id) == tx_hash:
+                        popped_heads.append(item)
+                    # Anything else was stale and stays dropped
+
+                entry = self._entries.get(tx_hash)
+                if entry is None:
+                    continue
+
+                # Stale heap entries: no longer the head, or a creator whose chain already moved past them
+                creator_id = entry.tx.creator_id
+                last_nonce = last_nonces.get(creator_id)
+                if last_nonce is None:
+                    if self._heads.get(creator_id) != tx_hash:
+                        continue
+                elif entry.tx.nonce != last_nonce + 1:
+                    continue
+
+                if entry.size > bytes_left:
+                    # Later nonces of this creator can't go in without it
+                    continue
+
+                selected.append(entry.tx.to_transaction(self.registry))
+                bytes_left -= entry.size
+                last_nonces[creator_id] = entry.tx.nonce
+
+                next_hash = self._queues[creator_id].get(entry.tx.nonce + 1)
+                if next_hash is not None:
+                    follower = self._entries[next_hash]
+                    heapq.heappush(followers, (-follower.fee, follower.seq, next_hash))
+
+            for item in popped_heads:
+                heapq.heappush(ready, item)
+
+        return selected
+
+    def _peek_cheapest(self) -> Optional[MempoolEntry]:
+        # Entries that are gone or no longer their creator's tail are dropped, a tail is pushed again when it becomes one
+        while self._cheapest:
+            _, _, tx_hash = self._cheapest[0]
+            entry = self._entries.get(tx_hash)
+            if entry is not None and entry.tx.nonce == self._queues[entry.tx.creator_id].highest():
+                return entry
+            heapq.heappop(self._cheapest)
+        return None
+
+    def _remove(self, tx_hash: bytes) -> bool:
+        entry = self._entries.pop(tx_hash, None)
+        if entry is None:
+            return False
+
+        creator_id = entry.tx.creator_id
+        queue = self._queues[creator_id]
+        queue.pop(entry.tx.nonce)
+        if not queue:
+            del self._queues[creator_id]
+        elif entry.tx.nonce > queue.highest():
+            # The previous nonce is the tail now, it becomes evictable
+            tail = self._entries[queue.get(queue.highest())]
+            heapq.heappush(self._cheapest, (tail.fee, -tail.seq, tail.tx.hash))
+        if self._heads.get(creator_id) == tx_hash:
+            self._update_head(creator_id)
+        return True
+
+    def _update_head(self, creator_id: int):
+        queue = self._queues.get(creator_id)
+        head: Optional[bytes] = None
+        if queue:
+            nonce = queue.lowest()
+            if self.get_account_nonce is None or nonce == self.get_account_nonce(self.registry.lookup(creator_id)):
+                head = queue.get(nonce)
+
+        if head is None:
+            self._heads.pop(creator_id, None)
+        elif self._heads.get(creator_id) != head:
+            self._heads[creator_id] = head
+            entry = self._entries[head]
+            heapq.heappush(self._ready, (-entry.fee, entry.seq, head))
+
+    def _collect_garbage(self):
+        if len(self._cheapest) > HEAP_GARBAGE_FACTOR * len(self._entries) + 1024:
+            self._cheapest = [item for item in self._cheapest if item[2] in self._entries]
+            heapq.heapify(self._cheapest)
+        if len(self._ready) > HEAP_GARBAGE_FACTOR * len(self._heads) + 1024:
+            heads = set(self._heads.values())
+            self._ready = [item for item in self._ready if item[2] in heads]
+            heapq.heapify(self._ready)
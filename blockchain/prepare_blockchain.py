@@ -2,7 +2,9 @@ import os
 import json
 import global_vars
 from structures.threads_metadata_handlers import GenerationThreadMetadataHandler, ApprovementThreadMetadataHandler
-from utils import sha256
+from block_store import get_epoch_index
+from snapshots import get_snapshots_dir, load_latest_snapshot, replay_generation_tail, restore_state
+from utils import set_new_epoch, sha256
 
 
 def prepare_blockchain():
@@ -15,6 +17,52 @@ def prepare_blockchain():
             print(f"failed to create CHAINDATA directory: {e}")
         return
 
+    # The newest valid snapshot is the quickest way back. The AT and GT records in the DB are written
+    # on every change though (leader rotation, new epoch), so whichever of the two is further along wins
+    snapshot = load_latest_snapshot(get_snapshots_dir())
+
+    if snapshot is not None:
+        restore_state(snapshot)
+
+    if not load_handlers_from_db():
+        return
+
+    # A snapshot restores the epoch in place, epoch scoped caches still have to follow it
+    global_vars.GLOBAL_CACHES.on_epoch_change(global_vars.APPROVEMENT_THREAD.epoch.id)
+
+    # Blocks of ours stored after the snapshot (or the last GT save) move the GT forward
+    my_pubkey = global_vars.CONFIGURATION.get("PUBLIC_KEY", "")
+
+    if my_pubkey:
+        replay_generation_tail(global_vars.GENERATION_THREAD, my_pubkey, global_vars.BLOCKCHAIN_GENESIS["NETWORK_ID"])
+
+    # Initialize genesis state if version is -1
+    if global_vars.APPROVEMENT_THREAD.core_major_version == -1:
+
+        set_genesis_to_state()
+
+        try:
+            serialized = json.dumps(
+                global_vars.APPROVEMENT_THREAD.to_dict()
+            )
+            global_vars.APPROVEMENT_THREAD_METADATA_DB.put("AT", serialized)
+        except Exception as e:
+            print(f"failed to save APPROVEMENT_THREAD: {e}")
+            return
+
+
+def get_approvement_thread_progress(handler: ApprovementThreadMetadataHandler) -> tuple:
+    return (handler.epoch.id, handler.epoch.current_leader_index)
+
+
+def get_generation_thread_progress(handler: GenerationThreadMetadataHandler) -> tuple:
+    return (get_epoch_index(handler.epoch_full_id), handler.next_index)
+
+
+def load_handlers_from_db() -> bool:
+
+    # Each stored handler replaces the one in memory unless that one (restored from a snapshot) is further along
+
     # Load GT - Generation Thread handler
     data = global_vars.BLOCKS_DB.get("GT")
 
@@ -22,11 +70,16 @@ def prepare_blockchain():
         try:
             gt_dict = json.loads(data)
             gt_handler = GenerationThreadMetadataHandler.from_dict(gt_dict)
-            global_vars.GENERATION_THREAD_METADATA_HANDLER = gt_handler
+            gt_is_newer = get_generation_thread_progress(gt_handler) >= get_generation_thread_progress(global_vars.GENERATION_THREAD)
         except Exception as e:
             print(f"failed to unmarshal GENERATION_THREAD: {e}")
-            return
-    
+            return False
+
+        if gt_is_newer:
+            global_vars.GENERATION_THREAD.epoch_full_id = gt_handler.epoch_full_id
+            global_vars.GENERATION_THREAD.prev_hash = gt_handler.prev_hash
+            global_vars.GENERATION_THREAD.next_index = gt_handler.next_index
+
     # Load AT - Approvement Thread handler
     data = global_vars.APPROVEMENT_THREAD_METADATA_DB.get("AT")
 
@@ -34,30 +87,19 @@ def prepare_blockchain():
         try:
             at_dict = json.loads(data)
             at_handler = ApprovementThreadMetadataHandler.from_dict(at_dict)
-            if at_handler.Cache is None:
-                at_handler.Cache = {}
-            global_vars.APPROVEMENT_THREAD_METADATA_HANDLER.Handler = at_handler
         except Exception as e:
             print(f"failed to unmarshal APPROVEMENT_THREAD: {e}")
-            return
+            return False
 
+        if get_approvement_thread_progress(at_handler) >= get_approvement_thread_progress(global_vars.APPROVEMENT_THREAD):
+            global_vars.APPROVEMENT_THREAD.core_major_version = at_handler.core_major_version
+            global_vars.APPROVEMENT_THREAD.network_parameters = at_handler.network_parameters
+            set_new_epoch(global_vars.APPROVEMENT_THREAD, at_handler.epoch)
 
-    # Initialize genesis state if version is -1
-    if global_vars.APPROVEMENT_THREAD_METADATA_HANDLER.Handler.CoreMajorVersion == -1:
-        
-        set_genesis_to_state()
-
-        try:
-            serialized = json.dumps(
-                global_vars.APPROVEMENT_THREAD_METADATA_HANDLER.Handler.to_dict()
-            )
-            global_vars.APPROVEMENT_THREAD_METADATA_DB.put("AT", serialized)
-        except Exception as e:
-            print(f"failed to save APPROVEMENT_THREAD: {e}")
-            return
+    return True
 
 
 
 
 def set_genesis_to_state():
-    pass # stub
\ No newline at end of file
+    pass # stub
@@ -0,0 +1,88 @@
+import time
+import asyncio
+from typing import Dict, Iterable, Optional, Set
+
+
+# Events the working threads wait on besides their deadlines
+EVENT_NEW_BLOCK = "NEW_BLOCK"
+EVENT_NEW_PROOF = "NEW_PROOF"
+EVENT_LEADER_CHANGED = "LEADER_CHANGED"
+EVENT_EPOCH_CHANGED = "EPOCH_CHANGED"
+
+# Longest a worker sleeps without a deadline of its own. Events are only an early wake up, a worker
+# must never depend on one firing to make progress
+FALLBACK_RECHECK_MS = 3000
+
+
+class DeadlineScheduler:
+
+    """
+    Wakes working threads at their next deadline or on an event, whichever comes first.
+
+    A worker computes when it next has something to do (end of the leader timeframe, end of
+    the epoch, ...) and calls wait(deadline, events). Deadlines go on the event loop's timer
+    heap, so a sleeping worker costs nothing and wakes within a few ms of the deadline.
+    notify(event) wakes every worker waiting on that event right away, and can be called
+    from any thread.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def wait(self, deadline: Optional[int] = None, events: Iterable[str] = ()) -> Optional[str]:
+
+        # deadline is a UTC timestamp in ms like get_utc_timestamp, None waits for events only
+        # (workers always pass one, see FALLBACK_RECHECK_MS). Returns the event that woke the worker, None when the deadline came first
+
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+
+        future = loop.create_future()
+        events = tuple(events)
+
+        for event in events:
+            self._waiters.setdefault(event, set()).add(future)
+
+        timer = None
+        if deadline is not None:
+            delay = max(0.0, deadline / 1000 - time.time())
+            timer = loop.call_later(delay, _resolve, future, None)
+
+        try:
+            return await future
+        finally:
+            if timer is not None:
+                timer.cancel()
+            for event in events:
+                waiters = self._waiters.get(event)
+                if waiters is not None:
+                    waiters.discard(future)
+                    if not waiters:
+                        del self._waiters[event]
+
+    def notify(self, event: str):
+        loop = self._loop
+        if loop is None:
+            # Nobody has waited yet
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake(event)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake, event)
+
+    def _wake(self, event: str):
+        for future in self._waiters.pop(event, ()):
+            _resolve(future, event)
+
+
+def _resolve(future: asyncio.Future, result: Optional[str]):
+    if not future.done():
+        future.set_result(result)
+
+
+SCHEDULER = DeadlineScheduler()
@@ -0,0 +1,182 @@
+import os
+import struct
+import asyncio
+import hashlib
+import dataclasses
+from typing import Any, Dict, List, Optional, Tuple
+
+import global_vars
+from block_store import get_epoch_index
+from structures.encoding import decode_value, encode_value
+from structures.misc import PoolStorage
+from structures.threads_metadata_handlers import ApprovementThreadMetadataHandler, GenerationThreadMetadataHandler
+from utils import get_utc_timestamp
+
+
+# Snapshots of the thread handlers, so a restart doesn't rebuild them from the whole chain.
+#
+# File layout, one snapshot per <sequence>.snap file in CHAINDATA_PATH/SNAPSHOTS:
+#
+#   magic (8) | sequence (u64) | payload length (u64) | sha256 of payload (32) | payload
+#
+# The payload is the structures.encoding binary form of the AT and GT handlers plus the AT pool
+# cache. Files are written to a temp name, fsynced and renamed, so a crash leaves either the old
+# or the new snapshot, never a torn one. On startup the newest file that passes the checks wins
+# and only the blocks stored after it are replayed.
+
+SNAPSHOT_MAGIC = b"UNDSNAP1"
+
+SNAPSHOT_HEADER = struct.Struct(">8sQQ32s")
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+SNAPSHOTS_TO_KEEP = 3
+
+SNAPSHOT_INTERVAL_SECONDS = global_vars.CONFIGURATION.get("SNAPSHOT_INTERVAL_SECONDS", 60)
+
+
+def get_snapshots_dir() -> str:
+    return os.path.join(global_vars.CHAINDATA_PATH, "SNAPSHOTS")
+
+
+def list_snapshots(directory: str) -> List[Tuple[int, str]]:
+    # (sequence, path), newest first
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        stem, ext = os.path.splitext(name)
+        if ext == ".snap" and stem.isdigit():
+            found.append((int(stem), os.path.join(directory, name)))
+    return sorted(found, reverse=True)
+
+
+def write_snapshot(directory: str, state: Dict[str, Any]) -> str:
+    return write_snapshot_payload(directory, encode_value(state))
+
+
+def write_snapshot_payload(directory: str, payload: bytes) -> str:
+    # File I/O only, safe to run off the event loop
+    os.makedirs(directory, exist_ok=True)
+
+    existing = list_snapshots(directory)
+    sequence = existing[0][0] + 1 if existing else 1
+
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, sequence, len(payload), hashlib.sha256(payload).digest())
+
+    path = os.path.join(directory, f"{sequence:012d}.snap")
+    temp_path = path + ".tmp"
+
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp_path, path)
+    _fsync_dir(directory)
+
+    for _, old_path in list_snapshots(directory)[SNAPSHOTS_TO_KEEP:]:
+        os.remove(old_path)
+
+    return path
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    # Raises ValueError when the file is truncated, corrupted or not a snapshot
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("Snapshot is shorter than its header")
+
+    magic, _, length, checksum = SNAPSHOT_HEADER.unpack_from(data)
+    payload = data[SNAPSHOT_HEADER.size:]
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a snapshot file")
+    if len(payload) != length:
+        raise ValueError(f"Snapshot payload is {len(payload)} bytes, header says {length}")
+    if hashlib.sha256(payload).digest() != checksum:
+        raise ValueError("Snapshot checksum mismatch")
+
+    state = decode_value(payload)
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError("Unsupported snapshot format")
+    return state
+
+
+def load_latest_snapshot(directory: str) -> Optional[Dict[str, Any]]:
+    for _, path in list_snapshots(directory):
+        try:
+            return read_snapshot(path)
+        except (OSError, ValueError) as e:
+            print(f"skipping snapshot {path}: {e}")
+    return None
+
+
+def capture_state() -> Dict[str, Any]:
+    # Only the handlers and the pool cache. The result still references live lists and dicts (quorum,
+    # stakers, ...), so it's a consistent cut only until the event loop moves on: encode it right away
+    return {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "createdAt": get_utc_timestamp(),
+        "at": global_vars.APPROVEMENT_THREAD.to_dict(),
+        "atCache": {key: value.to_dict() for key, value in global_vars.APPROVEMENT_THREAD.cache.items() if isinstance(value, PoolStorage)},
+        "gt": global_vars.GENERATION_THREAD.to_dict()
+    }
+
+
+def restore_state(state: Dict[str, Any]):
+    # In place, other modules hold references to the handler objects
+    approvement_thread = ApprovementThreadMetadataHandler.from_dict(state["at"])
+    approvement_thread.cache = global_vars.APPROVEMENT_THREAD.cache # the registered, bounded cache stays
+    _copy_fields(approvement_thread, global_vars.APPROVEMENT_THREAD)
+
+    approvement_thread.cache.clear()
+    for key, value in state.get("atCache", {}).items():
+        approvement_thread.cache[key] = PoolStorage.from_dict(value)
+
+    _copy_fields(GenerationThreadMetadataHandler.from_dict(state["gt"]), global_vars.GENERATION_THREAD)
+
+
+def replay_generation_tail(generation_thread: GenerationThreadMetadataHandler, creator: str, network_id: str) -> int:
+
+    # Moves the GT past blocks of ours that were stored after the snapshot was taken, returns how many
+
+    epoch_index = get_epoch_index(generation_thread.epoch_full_id)
+
+    replayed = 0
+
+    for block in global_vars.BLOCK_STORE.get_blocks_range(epoch_index, creator, generation_thread.next_index):
+        generation_thread.prev_hash = block.get_hash(network_id)
+        generation_thread.next_index = block.index + 1
+        replayed += 1
+
+    return replayed
+
+
+async def periodic_snapshots(interval: float = SNAPSHOT_INTERVAL_SECONDS):
+    directory = get_snapshots_dir()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Encoded on the loop, so nothing changes while it's copied out. Only the writes and fsyncs go to a thread
+            payload = encode_value(capture_state())
+            await asyncio.to_thread(write_snapshot_payload, directory, payload)
+        except Exception as e:
+            # A failed snapshot only costs a longer replay on restart, the task must keep running
+            print(f"failed to write snapshot: {e}")
+
+
+def _copy_fields(source, target):
+    for f in dataclasses.fields(source):
+        setattr(target, f.name, getattr(source, f.name))
+
+
+def _fsync_dir(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,80 @@
+import hashlib
+from typing import Dict, Iterator, MutableMapping, Optional, Set
+
+from structures.encoding import encode_value
+from structures.sparse_merkle import SparseMerkleTrie, StateProof, hash_state_key, verify_state_proof
+
+
+def hash_account(account: Dict[str, int]) -> bytes:
+    return hashlib.sha256(encode_value(account)).digest()
+
+
+class AuthenticatedState(MutableMapping):
+
+    """
+    Account state (account id -> account dict) committed to by a sparse Merkle trie.
+
+    Drop in for the plain dict the ExecutionEngine runs against. Every account read or written
+    through the mapping is remembered as touched, since the engine mutates account dicts in
+    place, and commit() rehashes only those into the trie. So the state root after a block
+    costs the accounts that block touched, not the size of the state.
+    """
+
+    def __init__(self, accounts: Optional[Dict[str, Dict[str, int]]] = None):
+        self._accounts: Dict[str, Dict[str, int]] = {}
+        self._dirty: Set[str] = set()
+        self._trie = SparseMerkleTrie()
+        if accounts:
+            self.update(accounts)
+            self.commit()
+
+    def __getitem__(self, account: str) -> Dict[str, int]:
+        value = self._accounts[account]
+        self._dirty.add(account)
+        return value
+
+    def __setitem__(self, account: str, value: Dict[str, int]):
+        self._accounts[account] = value
+        self._dirty.add(account)
+
+    def __delitem__(self, account: str):
+        del self._accounts[account]
+        self._dirty.add(account)
+
+    def __contains__(self, account) -> bool:
+        return account in self._accounts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._accounts)
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def peek(self, account: str) -> Optional[Dict[str, int]]:
+        # Read without marking the account dirty, the returned dict must not be changed
+        return self._accounts.get(account)
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def commit(self) -> bytes:
+        # Folds every touched account into the trie and returns the new state root
+        for account in self._dirty:
+            value = self._accounts.get(account)
+            self._trie.update(hash_state_key(account), hash_account(value) if value is not None else None)
+        self._dirty.clear()
+        return self._trie.root()
+
+    def root(self) -> bytes:
+        # Root as of the last commit
+        return self._trie.root()
+
+    def get_proof(self, account: str) -> StateProof:
+        # Against the last committed root, commit() first if the account may have changed since
+        return self._trie.proof(hash_state_key(account))
+
+
+def verify_account_proof(root: bytes, account: str, value: Optional[Dict[str, int]], proof: StateProof) -> bool:
+    # value None checks that the account doesn't exist
+    return verify_state_proof(root, hash_state_key(account), hash_account(value) if value is not None else None, proof)
@@ -1,32 +1,36 @@
-import json
 import hashlib
 import time
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Any, Dict, List
 
-from proofs import AggregatedLeaderRotationProof, AggregatedEpochFinalizationProof
-from transaction import Transaction
+from ed25519 import generate_signature, verify_signature
+from structures.encoding import encode_int, encode_str, encode_uvarint, encode_value
+from structures.merkle import MerkleProof, MerkleTree, build_merkle_tree
+from structures.proofs import AggregatedLeaderRotationProof, AggregatedEpochFinalizationProof
+from structures.transaction import Transaction
 
 
 def get_utc_timestamp_millis():
     return int(time.time() * 1000)
 
 
-def generate_signature(private_key: str, message: str) -> str:
-    # stub
-    return f"sig({message[:10]}...)"
-
-def verify_signature(message: str, pubkey: str, signature: str) -> bool:
-    # stub
-    return signature.startswith("sig(")
-
-
 @dataclass
 class DelayedTxsBatch:
     epoch_index: int
     delayed_transaction: List[Dict[str, str]]
     proofs: Dict[str, str]
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"epochIndex": self.epoch_index, "delayedTransactions": self.delayed_transaction, "proofs": self.proofs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DelayedTxsBatch":
+        return cls(
+            epoch_index=data.get("epochIndex", 0),
+            delayed_transaction=data.get("delayedTransactions") or [],
+            proofs=data.get("proofs") or {}
+        )
+
 
 @dataclass
 class ExtraData:
@@ -35,6 +39,26 @@ class ExtraData:
     delayed_txs_batch: DelayedTxsBatch
     aggregated_leaders_rotation_proofs: Dict[str, AggregatedLeaderRotationProof] # leader -> proof
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rest": self.rest,
+            "aefpForPreviousEpoch": self.aefp_for_previous_epoch.to_dict() if self.aefp_for_previous_epoch else None,
+            "delayedTxsBatch": self.delayed_txs_batch.to_dict(),
+            "aggregatedLeadersRotationProofs": {leader: proof.to_dict() for leader, proof in self.aggregated_leaders_rotation_proofs.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExtraData":
+        return cls(
+            rest=data.get("rest") or {},
+            aefp_for_previous_epoch=AggregatedEpochFinalizationProof.from_dict(data.get("aefpForPreviousEpoch")), # type: ignore
+            delayed_txs_batch=DelayedTxsBatch.from_dict(data.get("delayedTxsBatch") or {}),
+            aggregated_leaders_rotation_proofs={
+                leader: AggregatedLeaderRotationProof.from_dict(proof)
+                for leader, proof in (data.get("aggregatedLeadersRotationProofs") or {}).items()
+            }
+        )
+
 
 @dataclass
 class Block:
@@ -46,22 +70,122 @@ class Block:
     index: int
     prev_hash: str
     sig: str = ""
+    merkle_root: str = "" # root of the Merkle tree over transaction hashes, set when the block is signed
+
+    # get_hash is memoized per network id and Merkle root, header fields drop the memo when they are
+    # assigned. The Merkle tree remembers the tx hashes it was built from: appending to the list is
+    # picked up incrementally, anything else (pop, replacing a tx, assigning a tx field) rebuilds it.
+    # As with Transaction, mutating a payload dict in place needs tx.invalidate()
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == 'transactions':
+            object.__setattr__(self, '_merkle_tree', None)
+        # Neither the signature nor the stored root are hash inputs, so setting them keeps the memo
+        if name[0] != '_' and name not in ('sig', 'merkle_root'):
+            object.__setattr__(self, '_hash_cache', None)
+
+    def invalidate(self):
+        object.__setattr__(self, '_hash_cache', None)
+        object.__setattr__(self, '_merkle_tree', None)
+
+    def add_transaction(self, tx: Transaction):
+        self.transactions.append(tx)
+        self._sync_merkle_tree()
+
+    def get_merkle_root(self) -> str:
+        # Computed from the transactions, unlike the merkle_root field which is what the block carries
+        return self._sync_merkle_tree().root().hex()
+
+    def get_transaction_proof(self, index: int) -> MerkleProof:
+        return self._sync_merkle_tree().proof(index)
+
+    def verify_merkle_root(self) -> bool:
+        return self.merkle_root == self.get_merkle_root()
+
+    def _sync_merkle_tree(self) -> MerkleTree:
+        # Transactions memoize their hashes, so this is a pass over cached values unless something changed
+        tx_hashes = [tx.get_hash_bytes() for tx in self.transactions]
+        tree = self._merkle_tree
+        built_from = self._merkle_tx_hashes if tree is not None else []
+        count = len(built_from)
+        if tree is None or count > len(tx_hashes) or tx_hashes[:count] != built_from:
+            tree = build_merkle_tree(tx_hashes)
+            object.__setattr__(self, '_merkle_tree', tree)
+        else:
+            for tx_hash in tx_hashes[count:]:
+                tree.append(tx_hash)
+        object.__setattr__(self, '_merkle_tx_hashes', tx_hashes)
+        return tree
+
+    def get_hash(self, network_id: str) -> str:
+        merkle_root = self._sync_merkle_tree().root()
+
+        cached = self._hash_cache
+        if cached is not None and cached[0] == network_id and cached[1] == merkle_root:
+            return cached[2]
+
+        # The header commits to the transactions through the Merkle root
+        data_to_hash = b''.join((
+            encode_str(self.creator),
+            encode_int(self.time),
+            encode_str(network_id),
+            encode_str(self.epoch),
+            encode_int(self.index),
+            encode_str(self.prev_hash),
+            encode_uvarint(len(self.transactions)),
+            merkle_root
+        ))
+        block_hash = hashlib.sha256(data_to_hash).hexdigest()
+        object.__setattr__(self, '_hash_cache', (network_id, merkle_root, block_hash))
+        return block_hash
+
+    def to_bytes(self) -> bytes:
+        # Full canonical encoding, including the signature and extra data which the hash doesn't cover
+        return b''.join((
+            encode_str(self.creator),
+            encode_int(self.time),
+            encode_str(self.epoch),
+            encode_uvarint(len(self.transactions)),
+            *[tx.to_bytes() for tx in self.transactions],
+            encode_value(self.extra_data),
+            encode_int(self.index),
+            encode_str(self.prev_hash),
+            encode_str(self.sig),
+            encode_str(self.merkle_root)
+        ))
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Same field names as the Go node's JSON, plus the Merkle root
+        return {
+            "creator": self.creator,
+            "time": self.time,
+            "epoch": self.epoch,
+            "transactions": [tx.to_dict() for tx in self.transactions],
+            "extraData": self.extra_data.to_dict(),
+            "index": self.index,
+            "prevHash": self.prev_hash,
+            "sig": self.sig,
+            "merkleRoot": self.merkle_root
+        }
 
-    def get_hash(self,network_id) -> str:
-        jsoned_transactions = json.dumps([t.__dict__ for t in self.transactions], sort_keys=True)
-        data_to_hash = (
-            self.creator +
-            str(self.time) +
-            jsoned_transactions +
-            network_id +
-            self.epoch +
-            str(self.index) +
-            self.prev_hash
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Block":
+        return cls(
+            creator=data.get("creator", ""),
+            time=data.get("time", 0),
+            epoch=data.get("epoch", ""),
+            transactions=[Transaction.from_dict(tx) for tx in data.get("transactions") or []],
+            extra_data=ExtraData.from_dict(data.get("extraData") or {}),
+            index=data.get("index", 0),
+            prev_hash=data.get("prevHash", ""),
+            sig=data.get("sig", ""),
+            merkle_root=data.get("merkleRoot", "")
         )
-        return hashlib.sha256(data_to_hash.encode()).hexdigest()
 
-    def sign_block(self,private_key):
-        self.sig = generate_signature(private_key, self.get_hash())
+    def sign_block(self, private_key, network_id: str):
+        self.merkle_root = self.get_merkle_root()
+        self.sig = generate_signature(private_key, self.get_hash(network_id))
 
-    def verify_signature(self) -> bool:
-        return verify_signature(self.get_hash(), self.creator, self.sig)
\ No newline at end of file
+    def verify_signature(self, network_id: str) -> bool:
+        return self.verify_merkle_root() and verify_signature(self.get_hash(network_id), self.creator, self.sig)
@@ -0,0 +1,237 @@
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from structures.block import Block
+from structures.proofs import AggregatedEpochFinalizationProof, AggregatedFinalizationProof, AggregatedLeaderRotationProof
+from structures.transaction import Transaction
+
+
+# Compact, slotted forms of the chain structures for holding lots of them in memory (mempool, caches).
+#
+# Compared with the regular dataclasses:
+#   * no per-instance __dict__ (slots)
+#   * hashes and signatures are kept as raw bytes instead of hex strings (half the size, no str header)
+#   * public keys are replaced by small integer ids from a shared PubkeyRegistry
+#   * repeated short strings (tx types, signature types) are interned
+#
+# Every compact form converts back to the regular dataclass losslessly. Values that are not lowercase
+# hex (base64 signatures, placeholder hashes) are kept as they are, so the round trip never changes data.
+
+
+HexOrRaw = Union[bytes, str]
+
+
+def pack_hex(value: str) -> HexOrRaw:
+    if len(value) % 2 == 0:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        if raw.hex() == value:
+            return raw
+    return value
+
+
+def unpack_hex(value: HexOrRaw) -> str:
+    return value.hex() if isinstance(value, bytes) else value
+
+
+class PubkeyRegistry:
+
+    """
+    Interns public keys as small integer ids. Ids are never reused, so a compact
+    object stays valid for as long as the registry lives.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, pubkey: str) -> int:
+        pubkey_id = self._ids.get(pubkey)
+        if pubkey_id is None:
+            with self._lock:
+                pubkey_id = self._ids.get(pubkey)
+                if pubkey_id is None:
+                    pubkey_id = len(self._keys)
+                    self._keys.append(pubkey)
+                    self._ids[pubkey] = pubkey_id
+        return pubkey_id
+
+    def lookup(self, pubkey_id: int) -> str:
+        return self._keys[pubkey_id]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+# Shared by default so the same key gets the same id everywhere in the node
+PUBKEYS = PubkeyRegistry()
+
+
+def _pack_proofs(proofs: Dict[str, str], registry: PubkeyRegistry) -> Tuple[Tuple[int, HexOrRaw], ...]:
+    return tuple((registry.intern(pubkey), pack_hex(signature)) for pubkey, signature in proofs.items())
+
+
+def _unpack_proofs(proofs: Tuple[Tuple[int, HexOrRaw], ...], registry: PubkeyRegistry) -> Dict[str, str]:
+    return {registry.lookup(pubkey_id): unpack_hex(signature) for pubkey_id, signature in proofs}
+
+
+@dataclass(slots=True, frozen=True)
+class CompactTransaction:
+    v: int
+    fee: str
+    creator_id: int
+    sig: HexOrRaw
+    tx_type: str
+    sig_type: str
+    nonce: int
+    payload: Optional[Dict[str, Any]] # None instead of an empty dict
+    hash: bytes
+
+    @classmethod
+    def from_transaction(cls, tx: Transaction, registry: PubkeyRegistry = PUBKEYS) -> "CompactTransaction":
+        return cls(
+            v=tx.v,
+            fee=tx.fee,
+            creator_id=registry.intern(tx.creator),
+            sig=pack_hex(tx.sig),
+            tx_type=sys.intern(tx.tx_type),
+            sig_type=sys.intern(tx.sig_type),
+            nonce=tx.nonce,
+            payload=tx.payload or None,
+            hash=tx.get_hash_bytes()
+        )
+
+    def to_transaction(self, registry: PubkeyRegistry = PUBKEYS) -> Transaction:
+        return Transaction(
+            v=self.v,
+            fee=self.fee,
+            creator=registry.lookup(self.creator_id),
+            sig=unpack_hex(self.sig),
+            tx_type=self.tx_type,
+            sig_type=self.sig_type,
+            nonce=self.nonce,
+            payload=dict(self.payload) if self.payload else {}
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CompactAggregatedFinalizationProof:
+    prev_block_hash: HexOrRaw
+    block_id: str
+    block_hash: HexOrRaw
+    proofs: Tuple[Tuple[int, HexOrRaw], ...] # (pubkey id, signature)
+
+    @classmethod
+    def from_proof(cls, proof: AggregatedFinalizationProof, registry: PubkeyRegistry = PUBKEYS) -> "CompactAggregatedFinalizationProof":
+        return cls(
+            prev_block_hash=pack_hex(proof.prev_block_hash),
+            block_id=proof.block_id,
+            block_hash=pack_hex(proof.block_hash),
+            proofs=_pack_proofs(proof.proofs, registry)
+        )
+
+    def to_proof(self, registry: PubkeyRegistry = PUBKEYS) -> AggregatedFinalizationProof:
+        return AggregatedFinalizationProof(
+            prev_block_hash=unpack_hex(self.prev_block_hash),
+            block_id=self.block_id,
+            block_hash=unpack_hex(self.block_hash),
+            proofs=_unpack_proofs(self.proofs, registry)
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CompactAggregatedEpochFinalizationProof:
+    last_leader: int
+    last_index: int
+    last_hash: HexOrRaw
+    hash_of_first_block_by_last_leader: HexOrRaw
+    proofs: Tuple[Tuple[int, HexOrRaw], ...]
+
+    @classmethod
+    def from_proof(cls, proof: AggregatedEpochFinalizationProof, registry: PubkeyRegistry = PUBKEYS) -> "CompactAggregatedEpochFinalizationProof":
+        return cls(
+            last_leader=proof.last_leader,
+            last_index=proof.last_index,
+            last_hash=pack_hex(proof.last_hash),
+            hash_of_first_block_by_last_leader=pack_hex(proof.hash_of_first_block_by_last_leader),
+            proofs=_pack_proofs(proof.proofs, registry)
+        )
+
+    def to_proof(self, registry: PubkeyRegistry = PUBKEYS) -> AggregatedEpochFinalizationProof:
+        return AggregatedEpochFinalizationProof(
+            last_leader=self.last_leader,
+            last_index=self.last_index,
+            last_hash=unpack_hex(self.last_hash),
+            hash_of_first_block_by_last_leader=unpack_hex(self.hash_of_first_block_by_last_leader),
+            proofs=_unpack_proofs(self.proofs, registry)
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CompactAggregatedLeaderRotationProof:
+    first_block_hash: HexOrRaw
+    skip_index: int
+    skip_hash: HexOrRaw
+    proofs: Tuple[Tuple[int, HexOrRaw], ...]
+
+    @classmethod
+    def from_proof(cls, proof: AggregatedLeaderRotationProof, registry: PubkeyRegistry = PUBKEYS) -> "CompactAggregatedLeaderRotationProof":
+        return cls(
+            first_block_hash=pack_hex(proof.first_block_hash),
+            skip_index=proof.skip_index,
+            skip_hash=pack_hex(proof.skip_hash),
+            proofs=_pack_proofs(proof.proofs, registry)
+        )
+
+    def to_proof(self, registry: PubkeyRegistry = PUBKEYS) -> AggregatedLeaderRotationProof:
+        return AggregatedLeaderRotationProof(
+            first_block_hash=unpack_hex(self.first_block_hash),
+            skip_index=self.skip_index,
+            skip_hash=unpack_hex(self.skip_hash),
+            proofs=_unpack_proofs(self.proofs, registry)
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class CompactBlock:
+    creator_id: int
+    time: int
+    epoch: str
+    transactions: Tuple[CompactTransaction, ...]
+    extra_data: Any # kept as is, there is one per block
+    index: int
+    prev_hash: HexOrRaw
+    sig: HexOrRaw
+    merkle_root: HexOrRaw
+
+    @classmethod
+    def from_block(cls, block: Block, registry: PubkeyRegistry = PUBKEYS) -> "CompactBlock":
+        return cls(
+            creator_id=registry.intern(block.creator),
+            time=block.time,
+            epoch=sys.intern(block.epoch),
+            transactions=tuple(CompactTransaction.from_transaction(tx, registry) for tx in block.transactions),
+            extra_data=block.extra_data,
+            index=block.index,
+            prev_hash=pack_hex(block.prev_hash),
+            sig=pack_hex(block.sig),
+            merkle_root=pack_hex(block.merkle_root)
+        )
+
+    def to_block(self, registry: PubkeyRegistry = PUBKEYS) -> Block:
+        return Block(
+            creator=registry.lookup(self.creator_id),
+            time=self.time,
+            epoch=self.epoch,
+            transactions=[tx.to_transaction(registry) for tx in self.transactions],
+            extra_data=self.extra_data,
+            index=self.index,
+            prev_hash=unpack_hex(self.prev_hash),
+            sig=unpack_hex(self.sig),
+            merkle_root=unpack_hex(self.merkle_root)
+        )
@@ -0,0 +1,171 @@
+import struct
+import dataclasses
+from typing import Any, List, Tuple
+
+
+# Canonical compact binary encoding used for hashing blocks and transactions.
+#
+# Every value is self-delimiting, so encodings can be concatenated without separators:
+#
+#   int    - zigzag varint
+#   str    - varint byte length + utf-8
+#   bytes  - varint length + raw bytes
+#
+# Dynamic values (transaction payloads, extra data) carry a one byte tag first.
+# Dict keys are sorted, so the same data always produces the same bytes.
+# decode_value reverses encode_value, dataclasses come back as dicts
+
+
+_TAG_NONE = b'N'
+_TAG_FALSE = b'F'
+_TAG_TRUE = b'T'
+_TAG_INT = b'I'
+_TAG_FLOAT = b'D'
+_TAG_STR = b'S'
+_TAG_BYTES = b'B'
+_TAG_LIST = b'L'
+_TAG_DICT = b'M'
+
+_DOUBLE = struct.Struct('>d')
+
+
+def encode_uvarint(number: int) -> bytes:
+    if number < 0x80:
+        return bytes((number,))
+    out = bytearray()
+    while number >= 0x80:
+        out.append((number & 0x7F) | 0x80)
+        number >>= 7
+    out.append(number)
+    return bytes(out)
+
+
+def encode_int(number: int) -> bytes:
+    return encode_uvarint(number << 1 if number >= 0 else ((-number) << 1) - 1)
+
+
+def encode_str(text: str) -> bytes:
+    raw = text.encode()
+    return encode_uvarint(len(raw)) + raw
+
+
+def encode_bytes(raw: bytes) -> bytes:
+    return encode_uvarint(len(raw)) + raw
+
+
+def encode_value(value: Any) -> bytes:
+    out: List[bytes] = []
+    _encode_into(value, out)
+    return b''.join(out)
+
+
+def _encode_into(value: Any, out: List[bytes]):
+    # bool has to be checked before int, it is a subclass
+    if value is None:
+        out.append(_TAG_NONE)
+    elif value is True:
+        out.append(_TAG_TRUE)
+    elif value is False:
+        out.append(_TAG_FALSE)
+    elif isinstance(value, int):
+        out.append(_TAG_INT + encode_int(value))
+    elif isinstance(value, float):
+        out.append(_TAG_FLOAT + _DOUBLE.pack(value))
+    elif isinstance(value, str):
+        out.append(_TAG_STR + encode_str(value))
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_TAG_BYTES + encode_bytes(bytes(value)))
+    elif isinstance(value, (list, tuple)):
+        out.append(_TAG_LIST + encode_uvarint(len(value)))
+        for item in value:
+            _encode_into(item, out)
+    elif isinstance(value, dict):
+        out.append(_TAG_DICT + encode_uvarint(len(value)))
+        for key in sorted(value):
+            if not isinstance(key, str):
+                raise TypeError(f"Only str dict keys can be encoded, got {type(key).__name__}")
+            out.append(encode_str(key))
+            _encode_into(value[key], out)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # Encoded like a dict of its fields
+        _encode_into({f.name: getattr(value, f.name) for f in dataclasses.fields(value)}, out)
+    else:
+        raise TypeError(f"Can't encode value of type {type(value).__name__}")
+
+
+def decode_uvarint(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    # (number, offset after it)
+    number = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+
+def decode_int(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    zigzag, offset = decode_uvarint(data, offset)
+    return (zigzag >> 1) ^ -(zigzag & 1), offset
+
+
+def decode_bytes(data: bytes, offset: int = 0) -> Tuple[bytes, int]:
+    length, offset = decode_uvarint(data, offset)
+    end = offset + length
+    if end > len(data):
+        raise ValueError("Truncated bytes")
+    return bytes(data[offset:end]), end
+
+
+def decode_str(data: bytes, offset: int = 0) -> Tuple[str, int]:
+    raw, offset = decode_bytes(data, offset)
+    return raw.decode(), offset
+
+
+def decode_value(data: bytes) -> Any:
+    value, offset = _decode_from(data, 0)
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} trailing bytes after the value")
+    return value
+
+
+def _decode_from(data: bytes, offset: int) -> Tuple[Any, int]:
+    if offset >= len(data):
+        raise ValueError("Truncated value")
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == _TAG_NONE:
+        return None, offset
+    if tag == _TAG_TRUE:
+        return True, offset
+    if tag == _TAG_FALSE:
+        return False, offset
+    if tag == _TAG_INT:
+        return decode_int(data, offset)
+    if tag == _TAG_FLOAT:
+        if offset + _DOUBLE.size > len(data):
+            raise ValueError("Truncated float")
+        return _DOUBLE.unpack_from(data, offset)[0], offset + _DOUBLE.size
+    if tag == _TAG_STR:
+        return decode_str(data, offset)
+    if tag == _TAG_BYTES:
+        return decode_bytes(data, offset)
+    if tag == _TAG_LIST:
+        count, offset = decode_uvarint(data, offset)
+        items = []
+        for _ in range(count):
+            item, offset = _decode_from(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _TAG_DICT:
+        count, offset = decode_uvarint(data, offset)
+        result = {}
+        for _ in range(count):
+            key, offset = decode_str(data, offset)
+            result[key], offset = _decode_from(data, offset)
+        return result, offset
+    raise ValueError(f"Unknown tag {tag!r}")
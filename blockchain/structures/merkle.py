@@ -0,0 +1,144 @@
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+# Merkle tree over transaction hashes.
+#
+# Leaves and inner nodes are hashed with different prefixes, so an inner node can never be passed off
+# as a transaction. A node without a right sibling is promoted to the next level unchanged (no
+# duplication of the last node), which keeps every tree shape unambiguous.
+#
+# The tree is built incrementally as transactions are appended during block generation. Appends only
+# mark the right edge stale and the next root() / proof() rehashes that edge, so the root can be read
+# at any point and a full build from scratch stays O(n).
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+EMPTY_ROOT = hashlib.sha256(b'').digest()
+
+
+def hash_leaf(tx_hash: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + tx_hash).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+@dataclass
+class MerkleProof:
+    index: int
+    leaf_count: int
+    siblings: List[bytes] # bottom up, only for levels where the node has a sibling
+
+    def to_dict(self):
+        return {"index": self.index, "leaf_count": self.leaf_count, "siblings": [s.hex() for s in self.siblings]}
+
+    @classmethod
+    def from_dict(cls, data) -> "MerkleProof":
+        return cls(index=data["index"], leaf_count=data["leaf_count"], siblings=[bytes.fromhex(s) for s in data["siblings"]])
+
+
+class MerkleTree:
+
+    def __init__(self):
+        self._levels: List[List[bytes]] = [[]] # levels[0] are the leaves, levels[-1] has the root
+        self._dirty_from: Optional[int] = None # first leaf whose ancestors haven't been rehashed yet
+
+    @property
+    def leaf_count(self) -> int:
+        return len(self._levels[0])
+
+    def append(self, tx_hash: bytes):
+        if self._dirty_from is None:
+            self._dirty_from = len(self._levels[0])
+        self._levels[0].append(hash_leaf(tx_hash))
+
+    def _refresh(self):
+        # Rehashes only the right edge that appends made stale, O(k + log n) for k new leaves
+        if self._dirty_from is None:
+            return
+
+        position = self._dirty_from
+        level = 0
+        while len(self._levels[level]) > 1:
+            nodes = self._levels[level]
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            parents = self._levels[level + 1]
+
+            position //= 2
+            del parents[position:]
+            for left in range(position * 2, len(nodes), 2):
+                # A node without a right sibling is promoted unchanged
+                parents.append(hash_node(nodes[left], nodes[left + 1]) if left + 1 < len(nodes) else nodes[left])
+            level += 1
+
+        self._dirty_from = None
+
+    def root(self) -> bytes:
+        if not self._levels[0]:
+            return EMPTY_ROOT
+        self._refresh()
+        return self._levels[-1][0]
+
+    def proof(self, index: int) -> MerkleProof:
+        if not 0 <= index < self.leaf_count:
+            raise IndexError(f"Leaf {index} is out of range for a tree of {self.leaf_count}")
+
+        self._refresh()
+        siblings: List[bytes] = []
+        position = index
+        for nodes in self._levels[:-1]:
+            sibling = position ^ 1
+            if sibling < len(nodes):
+                siblings.append(nodes[sibling])
+            position //= 2
+        return MerkleProof(index=index, leaf_count=self.leaf_count, siblings=siblings)
+
+
+def build_merkle_tree(tx_hashes: List[bytes]) -> MerkleTree:
+    tree = MerkleTree()
+    for tx_hash in tx_hashes:
+        tree.append(tx_hash)
+    return tree
+
+
+def compute_root_from_proof(tx_hash: bytes, proof: MerkleProof) -> bytes:
+    # Walks up from the leaf, the index and leaf count tell on which side each sibling sits
+    if not 0 <= proof.index < proof.leaf_count:
+        raise ValueError("Proof index is out of range")
+
+    node = hash_leaf(tx_hash)
+    position = proof.index
+    level_size = proof.leaf_count
+    siblings = iter(proof.siblings)
+
+    while level_size > 1:
+        if position % 2 == 1:
+            node = hash_node(next(siblings), node)
+        elif position + 1 < level_size:
+            node = hash_node(node, next(siblings))
+        position //= 2
+        level_size = (level_size + 1) // 2
+
+    if next(siblings, None) is not None:
+        raise ValueError("Proof has more siblings than the tree has levels")
+    return node
+
+
+def verify_merkle_proof(tx_hash: bytes, proof: MerkleProof, root: bytes) -> bool:
+    try:
+        return compute_root_from_proof(tx_hash, proof) == root
+    except (ValueError, StopIteration):
+        return False
+
+
+def verify_transaction_inclusion(tx_hash: str, proof: MerkleProof, merkle_root: str) -> bool:
+    # Hex variant for light clients: tx hash from Transaction.get_hash(), root from the block header
+    try:
+        return verify_merkle_proof(bytes.fromhex(tx_hash), proof, bytes.fromhex(merkle_root))
+    except ValueError:
+        return False
@@ -1,4 +1,45 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+
 @dataclass
 class QuorumMemberData:
     PubKey: str
-    Url: str
\ No newline at end of file
+    Url: str
+
+
+@dataclass
+class EpochQuorumData:
+    epoch_full_id: str
+    quorum: List[str] # the epoch handler's list, to notice when it gets replaced
+    members: List[QuorumMemberData]
+    positions: Dict[str, int] # lowercased pubkey -> position in the quorum
+    majority: int
+
+
+@dataclass
+class PoolStorage:
+    percentage: int = 0
+    total_staked: str = "0"
+    stakers: Dict[str, Any] = field(default_factory=dict)
+    pool_url: str = ""
+    wss_pool_url: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "percentage": self.percentage,
+            "totalStaked": self.total_staked,
+            "stakers": self.stakers,
+            "poolURL": self.pool_url,
+            "wssPoolURL": self.wss_pool_url
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PoolStorage":
+        return cls(
+            percentage=data.get("percentage", 0),
+            total_staked=str(data.get("totalStaked", "0")),
+            stakers=data.get("stakers", {}),
+            pool_url=data.get("poolURL", ""),
+            wss_pool_url=data.get("wssPoolURL", "")
+        )
@@ -1,14 +1,26 @@
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Dict, Optional
 
-@dataclass
+@dataclass(slots=True)
 class AggregatedFinalizationProof:
     prev_block_hash: str
     block_id: str
     block_hash: str
     proofs: Dict[str, str]
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {"prevBlockHash": self.prev_block_hash, "blockId": self.block_id, "blockHash": self.block_hash, "proofs": self.proofs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AggregatedFinalizationProof":
+        return cls(
+            prev_block_hash=data.get("prevBlockHash", ""),
+            block_id=data.get("blockId", ""),
+            block_hash=data.get("blockHash", ""),
+            proofs=data.get("proofs") or {}
+        )
+
+@dataclass(slots=True)
 class AggregatedEpochFinalizationProof:
     last_leader: int
     last_index: int
@@ -16,16 +28,50 @@ class AggregatedEpochFinalizationProof:
     hash_of_first_block_by_last_leader: str
     proofs: Dict[str, str]
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lastLeader": self.last_leader,
+            "lastIndex": self.last_index,
+            "lastHash": self.last_hash,
+            "hashOfFirstBlockByLastLeader": self.hash_of_first_block_by_last_leader,
+            "proofs": self.proofs
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["AggregatedEpochFinalizationProof"]:
+        # The Go node sends null when there is no AEFP (first epoch)
+        if data is None:
+            return None
+        return cls(
+            last_leader=data.get("lastLeader", 0),
+            last_index=data.get("lastIndex", 0),
+            last_hash=data.get("lastHash", ""),
+            hash_of_first_block_by_last_leader=data.get("hashOfFirstBlockByLastLeader", ""),
+            proofs=data.get("proofs") or {}
+        )
 
-@dataclass
+
+@dataclass(slots=True)
 class AggregatedLeaderRotationProof:
     first_block_hash: str
     skip_index: int
     skip_hash: str
     proofs: Dict[str, str]
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"firstBlockHash": self.first_block_hash, "skipIndex": self.skip_index, "skipHash": self.skip_hash, "proofs": self.proofs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AggregatedLeaderRotationProof":
+        return cls(
+            first_block_hash=data.get("firstBlockHash", ""),
+            skip_index=data.get("skipIndex", -1),
+            skip_hash=data.get("skipHash", ""),
+            proofs=data.get("proofs") or {}
+        )
+
 
-@dataclass
+@dataclass(slots=True)
 class PoolVotingStat:
     index: int = -1
     hash: str = "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
@@ -41,7 +87,7 @@ def new_pool_voting_stat_template() -> PoolVotingStat:
     return PoolVotingStat()
 
 
-@dataclass
+@dataclass(slots=True)
 class AlrpSkeleton:
     afp_for_first_block: AggregatedFinalizationProof = field(default_factory=lambda: AggregatedFinalizationProof("", "", "", {}))
     skip_data: PoolVotingStat = field(default_factory=lambda: new_pool_voting_stat_template())
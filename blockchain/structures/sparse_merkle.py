@@ -0,0 +1,229 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Sparse Merkle trie over 256 bit keys (sha256 of the account id), used to commit to account state.
+#
+# A subtree holding a single leaf is represented by that leaf, hoisted as high as it goes, and an
+# empty subtree hashes to EMPTY_NODE. So the path to a key is only as deep as the point where it
+# parts from its nearest neighbour, ~log2(n) for n accounts, instead of 256 levels.
+#
+#   leaf     = sha256(0x00 | key | value hash)        (depth independent, that's what makes hoisting sound)
+#   internal = sha256(0x01 | left | right)            (only ever has two non-empty subtrees below it in total)
+#
+# Internal nodes cache their hash. Updates clear the cache along their path only, and root() rehashes
+# just those cleared nodes, so a block changing k accounts costs O(k log n) hashes however big the state is.
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+EMPTY_NODE = b'\x00' * 32
+
+KEY_BITS = 256
+
+
+def hash_state_key(account: str) -> bytes:
+    return hashlib.sha256(account.encode()).digest()
+
+
+def hash_state_leaf(key: bytes, value_hash: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + key + value_hash).digest()
+
+
+def hash_state_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def _bit(key: bytes, depth: int) -> int:
+    return (key[depth >> 3] >> (7 - (depth & 7))) & 1
+
+
+class _Leaf:
+    __slots__ = ("key", "value_hash", "hash")
+
+    def __init__(self, key: bytes, value_hash: bytes):
+        self.key = key
+        self.value_hash = value_hash
+        self.hash = hash_state_leaf(key, value_hash)
+
+
+class _Internal:
+    __slots__ = ("left", "right", "hash")
+
+    def __init__(self, left: "_Node", right: "_Node"):
+        self.left = left
+        self.right = right
+        self.hash: Optional[bytes] = None # None while stale
+
+
+_Node = Union[_Leaf, _Internal, None]
+
+
+@dataclass
+class StateProof:
+    siblings: List[bytes] # top down, one per internal node on the path
+    leaf_key: Optional[bytes] = None # the leaf the path ends at, if any. May be another key (proof of absence)
+    leaf_value_hash: Optional[bytes] = None
+
+    def to_dict(self):
+        return {
+            "siblings": [s.hex() for s in self.siblings],
+            "leafKey": self.leaf_key.hex() if self.leaf_key is not None else None,
+            "leafValueHash": self.leaf_value_hash.hex() if self.leaf_value_hash is not None else None
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "StateProof":
+        return cls(
+            siblings=[bytes.fromhex(s) for s in data["siblings"]],
+            leaf_key=bytes.fromhex(data["leafKey"]) if data.get("leafKey") else None,
+            leaf_value_hash=bytes.fromhex(data["leafValueHash"]) if data.get("leafValueHash") else None
+        )
+
+
+class SparseMerkleTrie:
+
+    def __init__(self):
+        self._root: _Node = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def update(self, key: bytes, value_hash: Optional[bytes]):
+        # value_hash None deletes the key
+        if value_hash is None:
+            self._root = self._delete(self._root, key, 0)
+        else:
+            self._root = self._insert(self._root, key, value_hash, 0)
+
+    def update_many(self, items: Iterable[Tuple[bytes, Optional[bytes]]]):
+        # Paths shared by several updates are rehashed once, on the next root()
+        for key, value_hash in items:
+            self.update(key, value_hash)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        node = self._root
+        depth = 0
+        while isinstance(node, _Internal):
+            node = node.right if _bit(key, depth) else node.left
+            depth += 1
+        return node.value_hash if node is not None and node.key == key else None
+
+    def root(self) -> bytes:
+        return self._hash(self._root)
+
+    def proof(self, key: bytes) -> StateProof:
+        self.root()
+        siblings = []
+        node = self._root
+        depth = 0
+        while isinstance(node, _Internal):
+            if _bit(key, depth):
+                siblings.append(self._hash(node.left))
+                node = node.right
+            else:
+                siblings.append(self._hash(node.right))
+                node = node.left
+            depth += 1
+        if node is None:
+            return StateProof(siblings)
+        return StateProof(siblings, node.key, node.value_hash)
+
+    def _insert(self, node: _Node, key: bytes, value_hash: bytes, depth: int) -> _Node:
+        if node is None:
+            self._size += 1
+            return _Leaf(key, value_hash)
+
+        if isinstance(node, _Leaf):
+            if node.key == key:
+                return _Leaf(key, value_hash)
+            self._size += 1
+            return self._split(node, _Leaf(key, value_hash), depth)
+
+        node.hash = None
+        if _bit(key, depth):
+            node.right = self._insert(node.right, key, value_hash, depth + 1)
+        else:
+            node.left = self._insert(node.left, key, value_hash, depth + 1)
+        return node
+
+    def _split(self, existing: _Leaf, new: _Leaf, depth: int) -> _Internal:
+        # Internal nodes down to the first bit where the two keys differ
+        differs_at = depth
+        while _bit(existing.key, differs_at) == _bit(new.key, differs_at):
+            differs_at += 1
+
+        node = _Internal(new, existing) if _bit(existing.key, differs_at) else _Internal(existing, new)
+        for level in range(differs_at - 1, depth - 1, -1):
+            node = _Internal(None, node) if _bit(new.key, level) else _Internal(node, None)
+        return node
+
+    def _delete(self, node: _Node, key: bytes, depth: int) -> _Node:
+        if node is None:
+            return None
+
+        if isinstance(node, _Leaf):
+            if node.key == key:
+                self._size -= 1
+                return None
+            return node
+
+        if _bit(key, depth):
+            node.right = self._delete(node.right, key, depth + 1)
+        else:
+            node.left = self._delete(node.left, key, depth + 1)
+        node.hash = None
+
+        # A subtree left with a single leaf collapses into it
+        if node.left is None and (node.right is None or isinstance(node.right, _Leaf)):
+            return node.right
+        if node.right is None and isinstance(node.left, _Leaf):
+            return node.left
+        return node
+
+    def _hash(self, node: _Node) -> bytes:
+        if node is None:
+            return EMPTY_NODE
+        if node.hash is None:
+            # Only stale internal nodes get here, clean subtrees return their cached hash right away
+            node.hash = hash_state_node(self._hash(node.left), self._hash(node.right))
+        return node.hash
+
+
+def verify_state_proof(root: bytes, key: bytes, value_hash: Optional[bytes], proof: StateProof) -> bool:
+
+    # value_hash None checks that the key is absent
+
+    depth = len(proof.siblings)
+
+    if depth > KEY_BITS:
+        return False
+
+    if value_hash is not None:
+        if proof.leaf_key != key or proof.leaf_value_hash != value_hash:
+            return False
+        node = hash_state_leaf(key, value_hash)
+    elif proof.leaf_key is None:
+        node = EMPTY_NODE
+    else:
+        # Absence shown by another leaf sitting where the key would be
+        if proof.leaf_key == key or proof.leaf_value_hash is None:
+            return False
+        if any(_bit(proof.leaf_key, level) != _bit(key, level) for level in range(depth)):
+            return False
+        node = hash_state_leaf(proof.leaf_key, proof.leaf_value_hash)
+
+    for level in range(depth - 1, -1, -1):
+        sibling = proof.siblings[level]
+        node = hash_state_node(sibling, node) if _bit(key, level) else hash_state_node(node, sibling)
+
+    return node == root
+
+
+def build_state_root(items: Dict[bytes, bytes]) -> bytes:
+    # From scratch, the reference the incremental trie must agree with
+    trie = SparseMerkleTrie()
+    trie.update_many(items.items())
+    return trie.root()
@@ -3,13 +3,36 @@ from typing import Dict, List, Any
 
 @dataclass
 class EpochHandler:
-    id: int
-    hash: str
-    pools_registry: Dict[str, None]
-    quorum: List[str]
-    leaders_sequence: List[str]
-    start_timestamp: int
-    current_leader_index: int
+    id: int = -1
+    hash: str = ""
+    pools_registry: Dict[str, None] = field(default_factory=dict)
+    quorum: List[str] = field(default_factory=list)
+    leaders_sequence: List[str] = field(default_factory=list)
+    start_timestamp: int = 0
+    current_leader_index: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "hash": self.hash,
+            "poolsRegistry": {pool: {} for pool in self.pools_registry},
+            "quorum": self.quorum,
+            "leadersSequence": self.leaders_sequence,
+            "startTimestamp": self.start_timestamp,
+            "currentLeaderIndex": self.current_leader_index
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EpochHandler":
+        return cls(
+            id=data.get("id", -1),
+            hash=data.get("hash", ""),
+            pools_registry=dict.fromkeys(data.get("poolsRegistry") or {}),
+            quorum=list(data.get("quorum") or []),
+            leaders_sequence=list(data.get("leadersSequence") or []),
+            start_timestamp=data.get("startTimestamp", 0),
+            current_leader_index=data.get("currentLeaderIndex", 0)
+        )
 
 @dataclass
 class ApprovementThreadMetadataHandler:
@@ -18,6 +41,18 @@ class ApprovementThreadMetadataHandler:
     epoch: EpochHandler
     cache: Dict[str, Any] = field(default_factory=dict)
 
+    # cache isn't serialized, same as the Go node
+    def to_dict(self) -> Dict[str, Any]:
+        return {"coreMajorVersion": self.core_major_version, "networkParameters": self.network_parameters, "epoch": self.epoch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ApprovementThreadMetadataHandler":
+        return cls(
+            core_major_version=data.get("coreMajorVersion", -1),
+            network_parameters=data.get("networkParameters") or {},
+            epoch=EpochHandler.from_dict(data.get("epoch") or {})
+        )
+
 @dataclass
 class ExecutionThreadMetadataHandler:
     core_major_version: int
@@ -32,4 +67,13 @@ class GenerationThreadMetadataHandler:
     prev_hash: str
     next_index: int
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"epochFullId": self.epoch_full_id, "prevHash": self.prev_hash, "nextIndex": self.next_index}
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationThreadMetadataHandler":
+        return cls(
+            epoch_full_id=data.get("epochFullId", ""),
+            prev_hash=data.get("prevHash", ""),
+            next_index=data.get("nextIndex", 0)
+        )
@@ -1,6 +1,9 @@
+import hashlib
 from dataclasses import dataclass, field
 from typing import Any, Dict
 
+from structures.encoding import encode_int, encode_str, encode_value
+
 @dataclass
 class Transaction:
     v: int
@@ -10,4 +13,81 @@ class Transaction:
     tx_type: str
     sig_type: str
     nonce: int
-    payload: Dict[str, Any] = field(default_factory=dict)
\ No newline at end of file
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    # The encoding and hash are memoized and dropped whenever a field is assigned.
+    # Mutating the payload dict in place isn't seen, call invalidate() after doing that
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name[0] != '_':
+            object.__setattr__(self, '_encoded', None)
+            object.__setattr__(self, '_hash', None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Same field names as the Go node's JSON
+        return {
+            "v": self.v,
+            "fee": self.fee,
+            "creator": self.creator,
+            "sig": self.sig,
+            "type": self.tx_type,
+            "sigType": self.sig_type,
+            "nonce": self.nonce,
+            "payload": self.payload
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Transaction":
+        return cls(
+            v=data.get("v", 0),
+            fee=str(data.get("fee", "0")),
+            creator=data.get("creator", ""),
+            sig=data.get("sig", ""),
+            tx_type=data.get("type", ""),
+            sig_type=data.get("sigType", ""),
+            nonce=data.get("nonce", 0),
+            payload=data.get("payload") or {}
+        )
+
+    def invalidate(self):
+        object.__setattr__(self, '_encoded', None)
+        object.__setattr__(self, '_hash', None)
+
+    def to_bytes(self) -> bytes:
+        encoded = self._encoded
+        if encoded is None:
+            encoded = b''.join((
+                encode_int(self.v),
+                encode_str(self.fee),
+                encode_str(self.creator),
+                encode_str(self.sig),
+                encode_str(self.tx_type),
+                encode_str(self.sig_type),
+                encode_int(self.nonce),
+                encode_value(self.payload)
+            ))
+            object.__setattr__(self, '_encoded', encoded)
+        return encoded
+
+    def get_signing_bytes(self) -> bytes:
+        # What the creator signs: every field except the signature itself
+        return b''.join((
+            encode_int(self.v),
+            encode_str(self.fee),
+            encode_str(self.creator),
+            encode_str(self.tx_type),
+            encode_str(self.sig_type),
+            encode_int(self.nonce),
+            encode_value(self.payload)
+        ))
+
+    def get_hash_bytes(self) -> bytes:
+        tx_hash = self._hash
+        if tx_hash is None:
+            tx_hash = hashlib.sha256(self.to_bytes()).digest()
+            object.__setattr__(self, '_hash', tx_hash)
+        return tx_hash
+
+    def get_hash(self) -> str:
+        return self.get_hash_bytes().hex()
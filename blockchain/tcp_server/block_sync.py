@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from block_store import get_block_id
+from global_vars import BLOCK_STORE, CONFIGURATION, EPOCH_DATA_DB
+
+
+# Streaming block sync.
+#
+# A "sync_blocks" request names a creator's block range in an epoch:
+#
+#   {"command": "sync_blocks", "epoch_index": 3, "creator": "<pubkey>", "start": 0, "end": 5000}
+#
+# or continues an earlier stream with {"command": "sync_blocks", "resume": "<token>"}. The answer is
+# a sequence of frames for the same request id, each with a batch of consecutive blocks and their AFPs:
+#
+#   {"blocks": [{"block": {...}, "afp": {...} | null}, ...], "resume": "<token>", "more": true}
+#
+# The last frame has "more": false. The stream ends at `end`, at the creator's stored height, or at
+# the first block this node doesn't have. The resume token of any frame points right after its
+# last block, so an interrupted sync (or one that reached the tip) picks up from there.
+#
+# Every stream is paced to SYNC_RATE_BYTES_PER_SECOND and at most MAX_SYNC_STREAMS run at once,
+# so catching up nodes can't starve the consensus traffic.
+
+SYNC_BATCH_BLOCKS = 100
+
+SYNC_BATCH_BYTES = 1024 * 1024
+
+SYNC_RATE_BYTES_PER_SECOND = CONFIGURATION.get("SYNC_RATE_BYTES_PER_SECOND", 16 * 1024 * 1024)
+
+MAX_SYNC_STREAMS = CONFIGURATION.get("MAX_SYNC_STREAMS", 8)
+
+_sync_streams = asyncio.Semaphore(MAX_SYNC_STREAMS)
+
+
+def make_resume_token(epoch_index: int, creator: str, next_index: int) -> str:
+    return get_block_id(epoch_index, creator, next_index)
+
+
+def parse_resume_token(token: str) -> Tuple[int, str, int]:
+    epoch_index, creator, next_index = token.split(":")
+    return int(epoch_index), creator, int(next_index)
+
+
+def read_sync_batch(epoch_index: int, creator: str, start: int, end: Optional[int]) -> Tuple[List[Dict[str, Any]], int, bool]:
+
+    # Up to SYNC_BATCH_BLOCKS consecutive blocks from start (fewer when SYNC_BATCH_BYTES is reached
+    # first), each paired with its AFP. Returns (batch, bytes read, whether a limit cut it short).
+    # Blocking, runs in a worker thread
+
+    raw_blocks: List[Tuple[str, str]] = []
+    batch_bytes = 0
+    full = False
+
+    for index, raw in BLOCK_STORE.get_raw_blocks_range(epoch_index, creator, start, end, SYNC_BATCH_BLOCKS):
+        raw_blocks.append((get_block_id(epoch_index, creator, index), raw))
+        batch_bytes += len(raw)
+        if len(raw_blocks) >= SYNC_BATCH_BLOCKS or batch_bytes >= SYNC_BATCH_BYTES:
+            full = True
+            break
+
+    afps = EPOCH_DATA_DB.get_many(["AFP:" + block_id for block_id, _ in raw_blocks])
+
+    batch = []
+
+    for block_id, raw in raw_blocks:
+        afp = afps.get("AFP:" + block_id)
+        batch_bytes += len(afp) if afp is not None else 0
+        batch.append({"block": json.loads(raw), "afp": json.loads(afp) if afp is not None else None})
+
+    return batch, batch_bytes, full
+
+
+async def stream_blocks(data: dict) -> AsyncIterator[Dict[str, Any]]:
+
+    try:
+        if "resume" in data:
+            epoch_index, creator, start = parse_resume_token(data["resume"])
+        else:
+            epoch_index, creator, start = int(data["epoch_index"]), str(data["creator"]), int(data.get("start", 0))
+        end = data.get("end")
+        end = int(end) if end is not None else None
+    except (KeyError, TypeError, ValueError):
+        yield {"error": "Invalid value", "more": False}
+        return
+
+    async with _sync_streams:
+
+        started = time.monotonic()
+        sent_bytes = 0
+        next_index = max(start, 0)
+
+        while True:
+            batch, batch_bytes, full = await asyncio.to_thread(read_sync_batch, epoch_index, creator, next_index, end)
+
+            next_index += len(batch)
+            more = full and (end is None or next_index <= end)
+
+            message = {"blocks": batch, "resume": make_resume_token(epoch_index, creator, next_index), "more": more}
+            yield message
+
+            if not more:
+                return
+
+            # Pace the stream: sleep until the bytes sent so far fit the rate
+            sent_bytes += batch_bytes
+            ahead = sent_bytes / SYNC_RATE_BYTES_PER_SECOND - (time.monotonic() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from tcp_server.protocol import BINARY_MAGIC, MAX_IN_FLIGHT_PER_CONNECTION, MAX_REQUEST_ID, encode_frame, read_frame
+
+
+class PipelinedClient:
+
+    """
+    Binary mode client for another node's TCP server.
+
+    request() can be called from many tasks at once, every call goes out as soon as a slot
+    is free (max_in_flight per connection, matching the server limit) and is resolved by the
+    response carrying its request id, whatever order responses arrive in.
+
+    stream() is the same for commands answered with several messages (sync_blocks), it yields
+    them until one comes without "more": True.
+
+    Once the connection is lost, requests still waiting and any made afterwards fail with
+    ConnectionError, connect() again to reuse the client.
+    """
+
+    def __init__(self, host: str, port: int, max_in_flight: int = MAX_IN_FLIGHT_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._pending: Dict[int, Union[asyncio.Future, asyncio.Queue]] = {} # request id -> future, or queue for streams
+        self._next_id = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._connection_error: Optional[ConnectionError] = None # set once the read loop has ended
+
+    async def connect(self):
+        self._connection_error = None
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(BINARY_MAGIC)
+        await self._writer.drain()
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        if self._read_task is not None:
+            await asyncio.gather(self._read_task, return_exceptions=True)
+        self._writer = None
+
+    async def __aenter__(self) -> "PipelinedClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def request(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        # timeout covers the whole request, waiting for a free slot included
+        return await asyncio.wait_for(self._request(message), timeout)
+
+    async def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_connected()
+
+        async with self._in_flight:
+            future = asyncio.get_running_loop().create_future()
+            request_id = self._register(future)
+            try:
+                self._writer.write(encode_frame(request_id, message))
+                await self._writer.drain()
+                return await future
+            finally:
+                self._pending.pop(request_id, None)
+
+    async def stream(self, message: Dict[str, Any], timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        # timeout applies to the wait for each message, not the whole stream
+        self._check_connected()
+
+        async with self._in_flight:
+            messages: asyncio.Queue = asyncio.Queue()
+            request_id = self._register(messages)
+            try:
+                self._writer.write(encode_frame(request_id, message))
+                await self._writer.drain()
+                while True:
+                    received = await asyncio.wait_for(messages.get(), timeout)
+                    if isinstance(received, Exception):
+                        raise received
+                    yield received
+                    if not received.get("more"):
+                        return
+            finally:
+                self._pending.pop(request_id, None)
+
+    async def sync_blocks(self, epoch_index: int, creator: str, start: int = 0, end: Optional[int] = None, resume: Optional[str] = None) -> AsyncIterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], str]]:
+
+        """
+        Yields (block, afp, resume token) for the creator's blocks from start (or the resume
+        token) up to end or the peer's tip. Pass the last token back as resume to continue later.
+        """
+
+        request: Dict[str, Any] = {"command": "sync_blocks", "epoch_index": epoch_index, "creator": creator, "start": start, "end": end}
+        if resume is not None:
+            request["resume"] = resume
+
+        async for message in self.stream(request):
+            if "error" in message:
+                raise ValueError(message["error"])
+            for item in message["blocks"]:
+                yield item["block"], item["afp"], message["resume"]
+
+    async def get_block(self, block_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.request({"command": "get_block", "block_id": block_id})).get("block")
+
+    async def get_afp(self, block_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.request({"command": "get_afp", "block_id": block_id})).get("afp")
+
+    async def get_blocks_with_afps(self, block_ids: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        # All block and AFP requests go out back to back instead of one round trip each
+        results = await asyncio.gather(*(self.get_block(block_id) for block_id in block_ids), *(self.get_afp(block_id) for block_id in block_ids))
+        return list(zip(results[:len(block_ids)], results[len(block_ids):]))
+
+    def _check_connected(self):
+        if self._connection_error is not None:
+            raise ConnectionError(f"Connection to {self.host}:{self.port} is closed") from self._connection_error
+        if self._writer is None:
+            raise ConnectionError("Client is not connected")
+
+    def _register(self, waiter: Union[asyncio.Future, asyncio.Queue]) -> int:
+        # Checked again after waiting for a slot, the read loop may have ended meanwhile. There's no await
+        # between the check and the registration, so a waiter can't slip in after the loop failed the others
+        self._check_connected()
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & MAX_REQUEST_ID
+        self._pending[request_id] = waiter
+        return request_id
+
+    async def _read_loop(self):
+        error = ConnectionError("Connection closed")
+        try:
+            while True:
+                frame = await read_frame(self._reader)
+                if frame is None:
+                    break
+                request_id, payload = frame
+                waiter = self._pending.get(request_id)
+                if isinstance(waiter, asyncio.Queue):
+                    waiter.put_nowait(json.loads(payload))
+                elif waiter is not None and not waiter.done():
+                    waiter.set_result(json.loads(payload))
+        except Exception as e:
+            if isinstance(e, ConnectionError):
+                error = e
+            else:
+                # Malformed frames and the like, the connection is just as unusable
+                error = ConnectionError(f"Connection lost: {e!r}")
+                error.__cause__ = e
+        finally:
+            self._connection_error = error
+            for waiter in self._pending.values():
+                if isinstance(waiter, asyncio.Queue):
+                    waiter.put_nowait(error)
+                elif not waiter.done():
+                    waiter.set_exception(error)
@@ -8,16 +8,46 @@ TODOs:
 
 API routes
 
-1. GET Handler to return block by ID
-2. GET Handler to return AFP (aggregated finalization proof) by block ID
-3. GET Handler to return AEFP (aggregated epoch finalization proof) by epoch index
-4. GET Handler to return assumption about first block
+1. GET Handler to return AEFP (aggregated epoch finalization proof) by epoch index
+2. GET Handler to return assumption about first block
+
+Block ranges with their AFPs are streamed by sync_blocks, see tcp_server/block_sync.py
 
 '''
 
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from global_vars import BLOCKS_DB, EPOCH_DATA_DB
+from tcp_server.block_sync import stream_blocks
+
 
 async def handle_request(data: dict) -> dict:
     command = data.get("command")
     if command == "ping":
         return {"response": "pong"}
+    if command == "get_block":
+        return await get_stored_json(BLOCKS_DB, data.get("block_id"), "block")
+    if command == "get_afp":
+        return await get_stored_json(EPOCH_DATA_DB, "AFP:" + str(data.get("block_id")), "afp")
     return {"error": "Unknown command"}
+
+
+def open_stream(data: dict) -> Optional[AsyncIterator[dict]]:
+    # Commands answered with several messages, the last one has "more": False
+    if data.get("command") == "sync_blocks":
+        return stream_blocks(data)
+    return None
+
+
+async def get_stored_json(db, key, field: str) -> dict:
+    if not isinstance(key, str):
+        return {"error": "Invalid value"}
+
+    # Off the event loop, so pipelined requests on a connection wait on disk concurrently
+    raw = await asyncio.to_thread(db.get, key)
+
+    if raw is None:
+        return {"error": "Not found"}
+    return {field: json.loads(raw)}
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+
+# The server speaks two protocols on the same port, told apart by the first bytes of a connection:
+#
+#   JSON mode   - one JSON object per line, one request at a time. Handy with netcat for debugging
+#   binary mode - the client opens with BINARY_MAGIC, then both sides exchange frames:
+#
+#       <payload length: u32 BE><request id: u32 BE><payload: JSON>
+#
+# In binary mode the client may send many requests without waiting. The server handles up to
+# MAX_IN_FLIGHT_PER_CONNECTION of them concurrently and each response carries the request id
+# it answers, so responses come back in whatever order they finish.
+
+BINARY_MAGIC = b"\x00UND"
+
+FRAME_HEADER = struct.Struct(">II")
+
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+MAX_IN_FLIGHT_PER_CONNECTION = 64
+
+MAX_REQUEST_ID = 0xFFFFFFFF
+
+
+class FrameTooLarge(Exception):
+    pass
+
+
+def encode_frame(request_id: int, message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode()
+    if len(payload) > MAX_FRAME_BYTES:
+        raise FrameTooLarge(f"Frame of {len(payload)} bytes is over the {MAX_FRAME_BYTES} limit")
+    return FRAME_HEADER.pack(len(payload), request_id) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Tuple[int, bytes]]:
+    # (request id, payload), None on a clean end of stream
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise
+        return None
+
+    length, request_id = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise FrameTooLarge(f"Peer announced a {length} byte frame, limit is {MAX_FRAME_BYTES}")
+
+    return request_id, await reader.readexactly(length)
@@ -1,27 +1,114 @@
 import asyncio
 import json
-from tcp_server.handlers import handle_request
+from tcp_server.handlers import handle_request, open_stream
+from tcp_server.protocol import BINARY_MAGIC, MAX_IN_FLIGHT_PER_CONNECTION, FrameTooLarge, encode_frame, read_frame
 
 async def handle_client(reader, writer):
     addr = writer.get_extra_info('peername')
     print(f"[+] Connected: {addr}")
 
-    while True:
-        line = await reader.readline()
-        if not line:
-            break
+    try:
+        opening = await reader.readexactly(1)
+        if opening == BINARY_MAGIC[:1]:
+            rest = await reader.readexactly(len(BINARY_MAGIC) - 1)
+            if rest == BINARY_MAGIC[1:]:
+                await serve_binary(reader, writer)
+            else:
+                # Neither protocol, tell the peer in the one it's more likely to read before closing
+                print(f"[!] Dropping {addr}: unknown protocol magic {(opening + rest)!r}")
+                writer.write((json.dumps({"error": "Unknown protocol"}) + "\n").encode())
+                await writer.drain()
+        else:
+            await serve_json(reader, writer, opening)
+    except (asyncio.IncompleteReadError, ConnectionError, FrameTooLarge) as e:
+        print(f"[!] Dropping {addr}: {e}")
+
+    print(f"[-] Disconnected: {addr}")
+    writer.close()
+    await writer.wait_closed()
+
+async def serve_json(reader, writer, opening=b""):
+    line = opening + await reader.readline()
+
+    while line:
         try:
             request = json.loads(line.decode())
+            stream = open_stream(request)
+            if stream is not None:
+                async for message in stream:
+                    writer.write((json.dumps(message) + "\n").encode())
+                    await writer.drain()
+                line = await reader.readline()
+                continue
             response = await handle_request(request)
+        except ConnectionError:
+            raise
         except Exception as e:
             response = {"error": str(e)}
 
         writer.write((json.dumps(response) + "\n").encode())
         await writer.drain()
 
-    print(f"[-] Disconnected: {addr}")
-    writer.close()
-    await writer.wait_closed()
+        line = await reader.readline()
+
+async def serve_binary(reader, writer):
+    # Frames are read as long as fewer than MAX_IN_FLIGHT_PER_CONNECTION requests are being handled,
+    # past that the connection stops being read and TCP pushes back on the client
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT_PER_CONNECTION)
+    tasks = set()
+
+    try:
+        while True:
+            await in_flight.acquire()
+            frame = await read_frame(reader)
+            if frame is None:
+                in_flight.release()
+                break
+            task = asyncio.create_task(serve_frame(writer, in_flight, *frame))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except BaseException:
+        # The connection broke (or the server is stopping), nobody is waiting for the answers
+        for task in tasks:
+            task.cancel()
+        raise
+
+    # A clean end of stream may just be the peer half-closing after pipelining its requests,
+    # the answers still go out before the connection is closed
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def serve_frame(writer, in_flight, request_id, payload):
+    try:
+        try:
+            request = json.loads(payload)
+            stream = open_stream(request)
+            if stream is not None:
+                # Each message is its own frame, drain() between them keeps the stream at the pace the peer reads
+                async for message in stream:
+                    await write_frame(writer, request_id, message)
+                return
+            response = await handle_request(request)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            response = {"error": str(e), "more": False}
+
+        await write_frame(writer, request_id, response)
+    except ConnectionError:
+        pass
+    finally:
+        in_flight.release()
+
+async def write_frame(writer, request_id, message):
+    try:
+        frame = encode_frame(request_id, message)
+    except FrameTooLarge as e:
+        frame = encode_frame(request_id, {"error": str(e), "more": False})
+
+    # write() appends the whole frame to the transport buffer, so concurrent responses never interleave
+    writer.write(frame)
+    await writer.drain()
 
 async def start_tcp_server(host="127.0.0.1", port=9000):
     server = await asyncio.start_server(handle_client, host, port)
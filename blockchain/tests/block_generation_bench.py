@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import atexit
+import shutil
+import socket
+import resource
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# global_vars needs a chaindata directory with a genesis file before it's imported
+CHAINDATA = tempfile.mkdtemp(prefix="block_generation_bench_")
+with open(os.path.join(CHAINDATA, "genesis.toml"), "w") as f:
+    f.write('NETWORK_ID = "bench_network"\n')
+os.environ["CHAINDATA_PATH"] = CHAINDATA
+atexit.register(shutil.rmtree, CHAINDATA, True)
+
+import global_vars
+from ed25519 import generate_keypair, verify_signature
+from mempool import Mempool
+from structures.block import Block, DelayedTxsBatch, ExtraData, get_utc_timestamp_millis
+from structures.transaction import Transaction
+from tcp_server.protocol import encode_frame
+
+
+# Block generation throughput: a mempool filled with synthetic transactions is drained block after
+# block through every stage a leader goes through, each stage timed on its own:
+#
+#   select    - best paying txs out of the mempool, then dropping them once the block is made
+#   hash      - building the block and its header hash (Merkle root over the txs included)
+#   sign      - ed25519 signature over the hash
+#   persist   - BLOCK_STORE.put_block
+#   broadcast - one binary frame with the block written to every peer (loopback sockets drained by threads)
+#
+# Run from the blockchain directory:
+#   python tests/block_generation_bench.py [txs per block] [blocks] [peers] [payload bytes]
+#
+# BLOCKS_DB_BACKEND=log switches persist to the log structured backend.
+
+
+NETWORK_ID = "bench_network"
+EPOCH_FULL_ID = "0" * 64 + "#0"
+SENDERS = 1000
+STAGES = ("select", "hash", "sign", "persist", "broadcast")
+
+# Transactions aren't verified on the way into the mempool, a placeholder of a real signature's size will do
+PLACEHOLDER_SIG = "A" * 86 + "=="
+
+
+def make_transactions(count: int, payload_bytes: int):
+    senders = [generate_keypair()[0] for _ in range(SENDERS)]
+    memo = "m" * payload_bytes
+    return [
+        Transaction(v=1, fee=str(1 + i % 1000), creator=senders[i % SENDERS], sig=PLACEHOLDER_SIG, tx_type="TX", sig_type="D", nonce=i // SENDERS, payload={"to": senders[(i + 1) % SENDERS], "amount": i, "memo": memo})
+        for i in range(count)
+    ]
+
+
+class LoopbackPeers:
+
+    # Stand in for the quorum, each peer reads and throws away whatever it gets
+
+    def __init__(self, count: int):
+        self.sockets = []
+        self.threads = []
+        for _ in range(count):
+            ours, theirs = socket.socketpair()
+            thread = threading.Thread(target=self._drain, args=(theirs,), daemon=True)
+            thread.start()
+            self.sockets.append(ours)
+            self.threads.append(thread)
+
+    @staticmethod
+    def _drain(sock: socket.socket):
+        while sock.recv(1 << 20):
+            pass
+        sock.close()
+
+    def broadcast(self, frame: bytes):
+        for sock in self.sockets:
+            sock.sendall(frame)
+
+    def close(self):
+        for sock in self.sockets:
+            sock.close()
+        for thread in self.threads:
+            thread.join()
+
+
+def percentile(samples, share: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def close_databases():
+    # Flushes the write-behind queues and stops their threads before the directory goes away
+    for db in (global_vars.BLOCKS_DB, global_vars.EPOCH_DATA_DB, global_vars.APPROVEMENT_THREAD_METADATA_DB, global_vars.FINALIZATION_VOTING_STATS_DB):
+        db.close()
+
+
+def main():
+    txs_per_block = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    peers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    payload_bytes = int(sys.argv[4]) if len(sys.argv) > 4 else 64
+
+    creator, private_key = generate_keypair()
+    max_block_bytes = int(global_vars.APPROVEMENT_THREAD.network_parameters.get("MAX_BLOCK_SIZE_IN_BYTES", 12_288_000))
+
+    mempool = Mempool(max_size=txs_per_block * blocks)
+    for tx in make_transactions(txs_per_block * blocks, payload_bytes):
+        mempool.add(tx)
+
+    peer_sockets = LoopbackPeers(peers)
+    timings = {stage: [] for stage in STAGES}
+    prev_hash = "0" * 64
+    included = 0
+
+    started = time.perf_counter()
+
+    for index in range(blocks):
+
+        stage_started = time.perf_counter()
+        transactions = mempool.select_for_block(txs_per_block, max_block_bytes)
+        mempool.remove_included(transactions)
+        now = time.perf_counter()
+        timings["select"].append(now - stage_started)
+
+        stage_started = now
+        extra_data = ExtraData(rest={}, aefp_for_previous_epoch=None, delayed_txs_batch=DelayedTxsBatch(0, [], {}), aggregated_leaders_rotation_proofs={})
+        block = Block(creator=creator, time=get_utc_timestamp_millis(), epoch=EPOCH_FULL_ID, transactions=transactions, extra_data=extra_data, index=index, prev_hash=prev_hash)
+        block_hash = block.get_hash(NETWORK_ID)
+        now = time.perf_counter()
+        timings["hash"].append(now - stage_started)
+
+        stage_started = now
+        block.sign_block(private_key, NETWORK_ID)
+        now = time.perf_counter()
+        timings["sign"].append(now - stage_started)
+
+        stage_started = now
+        global_vars.BLOCK_STORE.put_block(block)
+        now = time.perf_counter()
+        timings["persist"].append(now - stage_started)
+
+        stage_started = now
+        peer_sockets.broadcast(encode_frame(index, {"command": "accept_block", "block": block.to_dict()}))
+        now = time.perf_counter()
+        timings["broadcast"].append(now - stage_started)
+
+        prev_hash = block_hash
+        included += len(transactions)
+
+    elapsed = time.perf_counter() - started
+
+    peer_sockets.close()
+    global_vars.BLOCKS_DB.flush()
+
+    # The chain that was produced has to be intact, otherwise the numbers mean nothing
+    assert included == txs_per_block * blocks, f"only {included} txs made it into blocks"
+    assert verify_signature(block_hash, creator, block.sig)
+    stored = global_vars.BLOCK_STORE.get_block(0, creator, blocks - 1)
+    assert stored is not None and stored.get_hash(NETWORK_ID) == block_hash and stored.verify_signature(NETWORK_ID)
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+
+    print(f"{blocks} blocks x {txs_per_block} txs, {payload_bytes} byte payloads, {peers} peers, BLOCKS_DB {type(global_vars.BLOCKS_DB).__name__}")
+    print(f"{blocks / elapsed:,.1f} blocks/s, {included / elapsed:,.0f} tx/s, peak RSS {peak_rss_mb:,.0f} MB")
+    print(f"{'stage':<10} {'p50 ms':>10} {'p99 ms':>10} {'share':>8}")
+    total = sum(sum(samples) for samples in timings.values())
+    for stage in STAGES:
+        samples = timings[stage]
+        print(f"{stage:<10} {percentile(samples, 0.5) * 1000:>10.2f} {percentile(samples, 0.99) * 1000:>10.2f} {sum(samples) / total:>8.0%}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        close_databases()
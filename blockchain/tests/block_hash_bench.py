@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import dataclasses
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from structures.block import Block
+from structures.transaction import Transaction
+
+
+# Block hashing: the previous JSON based get_hash against the binary header committing to a Merkle root.
+# Run from the blockchain directory:
+#   python tests/block_hash_bench.py [transactions]
+
+
+NETWORK_ID = "test_network"
+
+
+def json_block_hash(block: Block, network_id: str) -> str:
+    # What Block.get_hash used to do on every call
+    jsoned_transactions = json.dumps([dataclasses.asdict(t) for t in block.transactions], sort_keys=True)
+    data_to_hash = (
+        block.creator +
+        str(block.time) +
+        jsoned_transactions +
+        network_id +
+        block.epoch +
+        str(block.index) +
+        block.prev_hash
+    )
+    return hashlib.sha256(data_to_hash.encode()).hexdigest()
+
+
+def make_block(tx_count: int) -> Block:
+    transactions = [
+        Transaction(
+            v=1, fee="100", creator="9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK", sig="s" * 128,
+            tx_type="TX", sig_type="D", nonce=n, payload={"to": "x" * 44, "amount": n * 10}
+        )
+        for n in range(tx_count)
+    ]
+    return Block(
+        creator="9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK", time=1749254009203, epoch="a" * 64 + "#0",
+        transactions=transactions, extra_data=None, index=0, prev_hash="f" * 64 # type: ignore
+    )
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    tx_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = 20
+
+    json_seconds = timed(lambda: json_block_hash(make_block(tx_count), NETWORK_ID), repeat)
+    # Cold: a freshly built block, every transaction is encoded once
+    cold_seconds = timed(lambda: make_block(tx_count).get_hash(NETWORK_ID), repeat)
+
+    block = make_block(tx_count)
+    block.get_hash(NETWORK_ID)
+
+    def rehash():
+        # Header change, the Merkle root over the transactions is reused
+        block.index += 1
+        block.get_hash(NETWORK_ID)
+
+    warm_seconds = timed(rehash, repeat)
+    memo_seconds = timed(lambda: block.get_hash(NETWORK_ID), repeat * 100)
+
+    build_seconds = timed(lambda: make_block(tx_count), repeat)
+
+    print(f"block with {tx_count} transactions (block construction, {build_seconds * 1000:.2f} ms, excluded)")
+    print(f"json get_hash           {(json_seconds - build_seconds) * 1000:>10.2f} ms")
+    print(f"binary, cold            {(cold_seconds - build_seconds) * 1000:>10.2f} ms")
+    print(f"binary, header change   {warm_seconds * 1000:>10.2f} ms")
+    print(f"binary, memoized        {memo_seconds * 1000:>10.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
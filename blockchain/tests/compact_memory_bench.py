@@ -0,0 +1,71 @@
+import os
+import sys
+import gc
+import base64
+import random
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from structures.transaction import Transaction
+from structures.compact import CompactTransaction, PubkeyRegistry
+
+
+# Memory held per mempool entry, regular Transaction against CompactTransaction.
+# Run from the blockchain directory:
+#   python tests/compact_memory_bench.py [transactions] [distinct senders]
+
+
+def make_transactions(count: int, senders: int):
+    rng = random.Random(7)
+    creators = [base64.b32encode(rng.randbytes(28)).decode().rstrip('=')[:44] for _ in range(senders)]
+    for nonce in range(count):
+        yield Transaction(
+            v=1,
+            fee=str(rng.randrange(1, 10_000)),
+            creator=creators[nonce % senders],
+            sig=rng.randbytes(64).hex(),
+            tx_type="TX",
+            sig_type="D",
+            nonce=nonce,
+            payload={"to": creators[rng.randrange(senders)], "amount": rng.randrange(1, 10 ** 9)}
+        )
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    senders = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    def build_regular():
+        txs = list(make_transactions(count, senders))
+        # The mempool needs hashes for lookups, so both sides pay for one
+        for tx in txs:
+            tx.get_hash_bytes()
+        return txs
+
+    def build_compact():
+        registry = PubkeyRegistry()
+        return registry, [CompactTransaction.from_transaction(tx, registry) for tx in make_transactions(count, senders)]
+
+    regular = measure(build_regular)
+    compact = measure(build_compact)
+
+    print(f"{count} transactions from {senders} senders")
+    print(f"Transaction         {regular / 2 ** 20:>8.1f} MiB  {regular / count:>7.0f} B/tx")
+    print(f"CompactTransaction  {compact / 2 ** 20:>8.1f} MiB  {compact / count:>7.0f} B/tx  ({compact / regular:.0%})")
+
+
+if __name__ == "__main__":
+    main()
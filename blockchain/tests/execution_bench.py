@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from execution import ExecutionEngine, execute_serial, to_execution_tx
+from structures.transaction import Transaction
+
+
+# Block execution throughput against the number of workers, with a share of transactions hitting a few
+# hot accounts so there are real conflicts. Every run is checked against serial execution.
+# Run from the blockchain directory:
+#   python tests/execution_bench.py [transactions] [accounts] [hot share]
+
+
+def make_block(transactions: int, accounts: int, hot_share: float, rng: random.Random):
+    next_nonce = {}
+    block = []
+    for _ in range(transactions):
+        creator = f"Account{rng.randrange(accounts)}"
+        receiver = f"Hot{rng.randrange(4)}" if rng.random() < hot_share else f"Account{rng.randrange(accounts)}"
+        nonce = next_nonce.get(creator, 0)
+        next_nonce[creator] = nonce + 1
+        block.append(Transaction(v=1, fee="1", creator=creator, sig="", tx_type="TX", sig_type="D", nonce=nonce, payload={"to": receiver, "amount": rng.randrange(1, 100)}))
+    return block
+
+
+def genesis_state(accounts: int):
+    return {f"Account{i}": {"balance": 1_000_000, "nonce": 0} for i in range(accounts)}
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    accounts = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    hot_share = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    block = make_block(transactions, accounts, hot_share, random.Random(7))
+
+    expected_state = genesis_state(accounts)
+    started = time.perf_counter()
+    expected = execute_serial([to_execution_tx(tx) for tx in block], expected_state)
+    serial_seconds = time.perf_counter() - started
+
+    print(f"{transactions} txs, {accounts} accounts, {hot_share:.0%} to hot accounts, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'groups':>8} {'tx/s':>12}")
+    print(f"{'serial':>8} {1:>8} {transactions / serial_seconds:>12,.0f}")
+
+    for workers in (1, 2, 4, 8):
+        engine = ExecutionEngine(workers)
+        engine.execute(block[:engine.parallel_threshold], genesis_state(accounts)) # warm the pool up
+
+        state = genesis_state(accounts)
+        started = time.perf_counter()
+        result = engine.execute(block, state)
+        seconds = time.perf_counter() - started
+        engine.close()
+
+        assert result.receipts == expected.receipts and result.fees == expected.fees and state == expected_state, "parallel result differs from serial"
+
+        print(f"{workers:>8} {result.groups:>8} {transactions / seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kv_storage import SimpleSQLiteDB
+from kv_log_storage import LogStructuredDB
+from kv_storage_bench import fake_block
+
+
+# Block storage workloads against each backend: sequential block appends, then random block reads.
+# Run from the blockchain directory:
+#   python tests/kv_backend_bench.py [blocks] [reads]
+
+
+CREATOR = "9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK"
+
+
+def open_backends(directory: str) -> dict:
+    return {
+        "sqlite (wal)": SimpleSQLiteDB(os.path.join(directory, "wal.db"), profile="wal"),
+        "sqlite (high_throughput)": SimpleSQLiteDB(os.path.join(directory, "high_throughput.db"), profile="high_throughput"),
+        "log": LogStructuredDB(os.path.join(directory, "log"))
+    }
+
+
+def bench_backend(db, blocks: list, reads: int) -> dict:
+    start = time.perf_counter()
+    for index, block in enumerate(blocks):
+        db.put(f"0:{CREATOR}:{index}", block)
+    db.flush()
+    append_seconds = time.perf_counter() - start
+
+    rng = random.Random(7)
+    indexes = [rng.randrange(len(blocks)) for _ in range(reads)]
+
+    start = time.perf_counter()
+    for index in indexes:
+        db.get(f"0:{CREATOR}:{index}")
+    read_seconds = time.perf_counter() - start
+
+    return {
+        "appends_per_sec": round(len(blocks) / append_seconds),
+        "reads_per_sec": round(reads / read_seconds)
+    }
+
+
+def main():
+    block_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    reads = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    blocks = [fake_block(i) for i in range(block_count)]
+    directory = tempfile.mkdtemp(prefix="kv_backend_bench_")
+
+    try:
+        for name, db in open_backends(directory).items():
+            result = bench_backend(db, blocks, reads)
+            db.close()
+            print(f"{name:<26} {result['appends_per_sec']:>10} appends/s {result['reads_per_sec']:>10} random reads/s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
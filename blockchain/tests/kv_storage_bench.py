@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kv_storage import SimpleSQLiteDB, SQLITE_PROFILES
+
+
+# Run from the blockchain directory:
+#   python tests/kv_storage_bench.py [writes]
+
+
+def fake_block(index: int) -> str:
+    return json.dumps({
+        "creator": "9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK",
+        "time": 1749254009203 + index,
+        "epoch": "a" * 64 + "#0",
+        "transactions": [{"v": 1, "fee": "1", "creator": "x" * 44, "sig": "s" * 128, "nonce": n} for n in range(5)],
+        "index": index,
+        "prev_hash": "f" * 64,
+        "sig": "s" * 128
+    })
+
+
+def fake_voting_stat(index: int) -> str:
+    return json.dumps({"index": index, "hash": "a" * 64, "afp": {"prev_block_hash": "b" * 64, "block_id": f"0:pool:{index}", "block_hash": "c" * 64, "proofs": {}}})
+
+
+def bench_writes(profile: str, directory: str, writes: int) -> dict:
+    db = SimpleSQLiteDB(os.path.join(directory, f"{profile}.db"), profile=profile)
+    blocks = [fake_block(i) for i in range(writes)]
+    stats = [fake_voting_stat(i) for i in range(writes)]
+
+    start = time.perf_counter()
+    for i in range(writes):
+        db.put(f"0:9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK:{i}", blocks[i])
+        db.put(f"9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK(POOL)_STATS_{i % 100}", stats[i])
+    # Writes only count once they are committed
+    db.flush()
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(writes):
+        db.get(f"0:9GQ46rqY238rk2neSwgidap9ww5zbAN4dyqyC7j5ZnBK:{i}")
+    read_seconds = time.perf_counter() - start
+
+    db.close()
+
+    return {
+        "profile": profile,
+        "writes_per_sec": round(2 * writes / write_seconds),
+        "reads_per_sec": round(writes / read_seconds)
+    }
+
+
+def main():
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    directory = tempfile.mkdtemp(prefix="kv_bench_")
+
+    try:
+        for profile in SQLITE_PROFILES:
+            result = bench_writes(profile, directory, writes)
+            print(f"{result['profile']:<16} {result['writes_per_sec']:>10} puts/s {result['reads_per_sec']:>10} gets/s")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import atexit
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# global_vars needs a chaindata directory with a genesis file before it's imported
+CHAINDATA = tempfile.mkdtemp(prefix="snapshot_bench_")
+with open(os.path.join(CHAINDATA, "genesis.toml"), "w") as f:
+    f.write('NETWORK_ID = "bench_network"\n')
+os.environ["CHAINDATA_PATH"] = CHAINDATA
+atexit.register(shutil.rmtree, CHAINDATA, True)
+
+import global_vars
+from snapshots import capture_state, get_snapshots_dir, load_latest_snapshot, replay_generation_tail, restore_state, write_snapshot
+from structures.block import Block, DelayedTxsBatch, ExtraData
+from structures.transaction import Transaction
+
+
+# Restart time against chain length: rebuilding the GT from every stored block versus loading the
+# newest snapshot and replaying only the blocks stored after it.
+# Run from the blockchain directory:
+#   python tests/snapshot_restart_bench.py [tail blocks]
+
+
+NETWORK_ID = "bench_network"
+CREATOR = "BenchCreator"
+EPOCH_FULL_ID = "0" * 64 + "#0"
+TXS_PER_BLOCK = 20
+
+
+def make_block(index: int, prev_hash: str) -> Block:
+    transactions = [
+        Transaction(v=1, fee="1", creator=f"Account{i}", sig="sig", tx_type="TX", sig_type="D", nonce=index, payload={"to": "Receiver", "amount": i})
+        for i in range(TXS_PER_BLOCK)
+    ]
+    extra_data = ExtraData(rest={}, aefp_for_previous_epoch=None, delayed_txs_batch=DelayedTxsBatch(0, [], {}), aggregated_leaders_rotation_proofs={})
+    return Block(creator=CREATOR, time=index, epoch=EPOCH_FULL_ID, transactions=transactions, extra_data=extra_data, index=index, prev_hash=prev_hash)
+
+
+def reset_generation_thread():
+    global_vars.GENERATION_THREAD.epoch_full_id = EPOCH_FULL_ID
+    global_vars.GENERATION_THREAD.prev_hash = "0" * 64
+    global_vars.GENERATION_THREAD.next_index = 0
+
+
+def close_databases():
+    # Flushes the write-behind queues and stops their threads before the directory goes away
+    for db in (global_vars.BLOCKS_DB, global_vars.EPOCH_DATA_DB, global_vars.APPROVEMENT_THREAD_METADATA_DB, global_vars.FINALIZATION_VOTING_STATS_DB):
+        db.close()
+
+
+def main():
+    tail = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    stored = 0
+    prev_hash = "0" * 64
+
+    print(f"{'blocks':>8} {'full replay ms':>15} {'snapshot + tail ms':>19}")
+
+    for chain_length in (1_000, 5_000, 20_000):
+
+        while stored < chain_length:
+            block = make_block(stored, prev_hash)
+            global_vars.BLOCK_STORE.put_block(block)
+            prev_hash = block.get_hash(NETWORK_ID)
+            stored += 1
+
+            # The node snapshots periodically, here right before the last `tail` blocks
+            if stored == chain_length - tail:
+                reset_generation_thread()
+                replay_generation_tail(global_vars.GENERATION_THREAD, CREATOR, NETWORK_ID)
+                write_snapshot(get_snapshots_dir(), capture_state())
+
+        global_vars.BLOCKS_DB.flush()
+
+        reset_generation_thread()
+        started = time.perf_counter()
+        replay_generation_tail(global_vars.GENERATION_THREAD, CREATOR, NETWORK_ID)
+        full_ms = (time.perf_counter() - started) * 1000
+        expected = (global_vars.GENERATION_THREAD.next_index, global_vars.GENERATION_THREAD.prev_hash)
+
+        reset_generation_thread()
+        started = time.perf_counter()
+        restore_state(load_latest_snapshot(get_snapshots_dir()))
+        replay_generation_tail(global_vars.GENERATION_THREAD, CREATOR, NETWORK_ID)
+        snapshot_ms = (time.perf_counter() - started) * 1000
+
+        assert (global_vars.GENERATION_THREAD.next_index, global_vars.GENERATION_THREAD.prev_hash) == expected
+
+        print(f"{chain_length:>8} {full_ms:>15.1f} {snapshot_ms:>19.1f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        close_databases()
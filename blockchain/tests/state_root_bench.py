@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from execution import execute_serial, to_execution_tx
+from state_store import AuthenticatedState, hash_account, verify_account_proof
+from structures.sparse_merkle import build_state_root, hash_state_key
+from structures.transaction import Transaction
+
+
+# State root cost per block against state size: the incremental trie, which rehashes only the paths of
+# accounts the block touched, versus rebuilding the root from every account. Both roots are compared.
+# Run from the blockchain directory:
+#   python tests/state_root_bench.py [txs per block] [blocks]
+
+
+def make_block(transactions: int, accounts: int, next_nonce, rng: random.Random):
+    block = []
+    for _ in range(transactions):
+        creator = f"Account{rng.randrange(accounts)}"
+        nonce = next_nonce.get(creator, 0)
+        next_nonce[creator] = nonce + 1
+        block.append(Transaction(v=1, fee="1", creator=creator, sig="", tx_type="TX", sig_type="D", nonce=nonce, payload={"to": f"Account{rng.randrange(accounts)}", "amount": rng.randrange(1, 100)}))
+    return block
+
+
+def run(accounts: int, transactions: int, blocks: int):
+    rng = random.Random(accounts)
+
+    started = time.perf_counter()
+    state = AuthenticatedState({f"Account{i}": {"balance": 1_000_000, "nonce": 0} for i in range(accounts)})
+    genesis_seconds = time.perf_counter() - started
+
+    next_nonce = {}
+    commit_seconds = 0.0
+    touched = 0
+
+    for _ in range(blocks):
+        execute_serial([to_execution_tx(tx) for tx in make_block(transactions, accounts, next_nonce, rng)], state)
+        touched += state.dirty_count
+        started = time.perf_counter()
+        root = state.commit()
+        commit_seconds += time.perf_counter() - started
+
+    started = time.perf_counter()
+    full_root = build_state_root({hash_state_key(account): hash_account(value) for account, value in state.items()})
+    rebuild_seconds = time.perf_counter() - started
+
+    assert full_root == root, "incremental root differs from rebuilt root"
+
+    account = "Account0"
+    proof = state.get_proof(account)
+    assert verify_account_proof(root, account, state.peek(account), proof)
+
+    print(f"{accounts:>10,} {genesis_seconds:>10.2f}s {touched / blocks:>10,.0f} {commit_seconds / blocks * 1000:>12.2f}ms {rebuild_seconds * 1000:>12.1f}ms {len(proof.siblings):>8}")
+
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"{transactions} txs per block, {blocks} blocks")
+    print(f"{'accounts':>10} {'genesis':>11} {'touched':>10} {'commit/block':>14} {'full rebuild':>14} {'proof len':>8}")
+
+    for accounts in (10_000, 100_000, 500_000):
+        run(accounts, transactions, blocks)
+
+
+if __name__ == "__main__":
+    main()
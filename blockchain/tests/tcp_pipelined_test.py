@@ -0,0 +1,17 @@
+import asyncio
+import time
+
+from tcp_server.client import PipelinedClient
+
+async def tcp_pipelined_client():
+    async with PipelinedClient('127.0.0.1', 9000) as client:
+
+        print(f"Received: {await client.request({'command': 'ping'})}")
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.request({"command": "ping"}) for _ in range(1000)))
+        elapsed = time.perf_counter() - started
+
+        print(f"{len(responses)} pipelined pings in {elapsed * 1000:.1f} ms")
+
+asyncio.run(tcp_pipelined_client())
@@ -0,0 +1,105 @@
+import os
+import sys
+import copy
+import unittest
+from concurrent.futures import Future, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from execution import ExecutionEngine, execute_serial, to_execution_tx
+from structures.transaction import Transaction
+
+'''
+Run these tests from the blockchain directory:
+python -m unittest tests.test_execution
+'''
+
+
+def make_block(transactions: int):
+    # Pairs of accounts paying each other, so the block splits into many groups
+    return [
+        Transaction(v=1, fee="1", creator=f"Account{i % 64}", sig="", tx_type="TX", sig_type="D", nonce=i // 64, payload={"to": f"Account{(i % 64) ^ 1}", "amount": 5})
+        for i in range(transactions)
+    ]
+
+
+def genesis_state():
+    return {f"Account{i}": {"balance": 1_000, "nonce": 0} for i in range(64)}
+
+
+class FailingLastBinPool:
+
+    # Runs bins in process, except the last one submitted, which fails like a crashing worker would
+
+    def __init__(self, bins: int):
+        self.bins = bins
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        future = Future()
+        if self.submitted % self.bins == 0:
+            future.set_exception(RuntimeError("worker failed"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class KilledWorkerPool(ProcessPoolExecutor):
+
+    # A real pool whose last bin of a block kills its worker process instead of running
+
+    def __init__(self, workers: int):
+        super().__init__(workers)
+        self.workers = workers
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted % self.workers == 0:
+            return super().submit(os._exit, 1)
+        return super().submit(fn, *args)
+
+
+class TestParallelExecutionFailure(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.block = make_block(512)
+        self.expected_state = genesis_state()
+        self.expected = execute_serial([to_execution_tx(tx) for tx in self.block], self.expected_state)
+
+    def run_with_pool(self, pool) -> ExecutionEngine:
+        engine = ExecutionEngine(workers=4, parallel_threshold=1)
+        engine._pool = pool
+        self.addCleanup(engine.close)
+
+        state = genesis_state()
+        untouched = copy.deepcopy(state)
+        result = engine.execute(self.block, state)
+
+        self.assertNotEqual(state, untouched)
+        self.assertEqual(state, self.expected_state)
+        self.assertEqual(result.receipts, self.expected.receipts)
+        self.assertEqual(result.fees, self.expected.fees)
+        self.assertFalse(result.parallel)
+        return engine
+
+    def test_failed_bin_falls_back_to_serial_on_untouched_state(self):
+        self.run_with_pool(FailingLastBinPool(bins=4))
+
+    def test_dead_worker_replaces_the_pool(self):
+        engine = self.run_with_pool(KilledWorkerPool(workers=4))
+        self.assertIsNone(engine._pool)
+
+        # The next block gets a fresh pool and runs in parallel again
+        state = genesis_state()
+        result = engine.execute(self.block, state)
+        self.assertTrue(result.parallel)
+        self.assertEqual(state, self.expected_state)
+
+
+if __name__ == "__main__":
+    unittest.main()
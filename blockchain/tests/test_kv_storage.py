@@ -0,0 +1,61 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from kv_storage import SimpleSQLiteDB
+
+'''
+Run these tests from the blockchain directory:
+python -m unittest tests.test_kv_storage
+'''
+
+
+class TestAtomicBatchOrdering(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp(prefix="kv_storage_test_")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def open_db(self, profile: str) -> SimpleSQLiteDB:
+        db = SimpleSQLiteDB(os.path.join(self.dir, f"{profile}.db"), profile=profile)
+        self.addCleanup(db.close)
+        return db
+
+    def test_last_write_wins_inside_atomic_batch(self):
+        for profile in ('default', 'wal', 'high_throughput'):
+            with self.subTest(profile=profile):
+                db = self.open_db(profile)
+                db.atomic_put('k', 'atomic1')
+                db.put('k', 'plain')
+                db.atomic_put('k', 'atomic2')
+                self.assertTrue(db.atomic_commit())
+                db.flush()
+                self.assertEqual(db.get('k'), 'atomic2')
+
+    def test_writes_inside_atomic_batch_roll_back_with_it(self):
+        # close() rolls back a batch that was never committed
+        for profile in ('default', 'wal', 'high_throughput'):
+            with self.subTest(profile=profile):
+                db = self.open_db(profile)
+                db.put('gone', 'before')
+                db.atomic_put('k', 'atomic')
+                db.put('plain', 'value')
+                db.put_many({'many': 'value'})
+                db.delete('gone')
+                db.close()
+
+                db = self.open_db(profile)
+                self.assertIsNone(db.get('k'))
+                self.assertIsNone(db.get('plain'))
+                self.assertIsNone(db.get('many'))
+                self.assertEqual(db.get('gone'), 'before')
+
+
+if __name__ == "__main__":
+    unittest.main()
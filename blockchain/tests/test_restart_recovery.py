@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import atexit
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# global_vars needs a chaindata directory with a genesis file before it's imported
+if "CHAINDATA_PATH" not in os.environ:
+    CHAINDATA = tempfile.mkdtemp(prefix="restart_recovery_test_")
+    with open(os.path.join(CHAINDATA, "genesis.toml"), "w") as f:
+        f.write('NETWORK_ID = "test_network"\n')
+    os.environ["CHAINDATA_PATH"] = CHAINDATA
+    atexit.register(shutil.rmtree, CHAINDATA, True)
+
+import global_vars
+from prepare_blockchain import prepare_blockchain
+from snapshots import capture_state, get_snapshots_dir, write_snapshot
+from structures.threads_metadata_handlers import EpochHandler
+from utils import rotate_leader, store_approvement_thread
+
+'''
+Run these tests from the blockchain directory:
+python -m unittest tests.test_restart_recovery
+'''
+
+
+class TestRestartRecovery(unittest.TestCase):
+
+    def setUp(self) -> None:
+        shutil.rmtree(get_snapshots_dir(), ignore_errors=True)
+        global_vars.BLOCKS_DB.delete("GT")
+        global_vars.APPROVEMENT_THREAD.core_major_version = 0
+        global_vars.APPROVEMENT_THREAD.network_parameters = {"LEADERSHIP_TIMEFRAME": 1000}
+        global_vars.APPROVEMENT_THREAD.epoch = EpochHandler(id=3, hash="e" * 64, leaders_sequence=["a", "b", "c"])
+        store_approvement_thread(global_vars.APPROVEMENT_THREAD)
+
+    def restart(self) -> None:
+        # What a fresh process starts from before prepare_blockchain
+        global_vars.APPROVEMENT_THREAD.core_major_version = -1
+        global_vars.APPROVEMENT_THREAD.network_parameters = {}
+        global_vars.APPROVEMENT_THREAD.epoch = EpochHandler()
+        global_vars.GENERATION_THREAD.epoch_full_id = "0" * 64 + "#-1"
+        global_vars.GENERATION_THREAD.next_index = 0
+        prepare_blockchain()
+
+    def test_leader_rotation_after_snapshot_survives_restart(self) -> None:
+        write_snapshot(get_snapshots_dir(), capture_state())
+        rotate_leader(global_vars.APPROVEMENT_THREAD)
+
+        self.restart()
+
+        self.assertEqual(global_vars.APPROVEMENT_THREAD.epoch.id, 3)
+        self.assertEqual(global_vars.APPROVEMENT_THREAD.epoch.current_leader_index, 1)
+        self.assertEqual(global_vars.APPROVEMENT_THREAD.core_major_version, 0)
+
+    def test_newer_snapshot_wins_over_older_db_records(self) -> None:
+        global_vars.BLOCKS_DB.put("GT", json.dumps({"epochFullId": "e" * 64 + "#3", "prevHash": "old", "nextIndex": 5}))
+        global_vars.GENERATION_THREAD.epoch_full_id = "e" * 64 + "#3"
+        global_vars.GENERATION_THREAD.prev_hash = "new"
+        global_vars.GENERATION_THREAD.next_index = 9
+        global_vars.APPROVEMENT_THREAD.epoch.current_leader_index = 2
+        write_snapshot(get_snapshots_dir(), capture_state())
+
+        self.restart()
+
+        self.assertEqual(global_vars.APPROVEMENT_THREAD.epoch.current_leader_index, 2)
+        self.assertEqual((global_vars.GENERATION_THREAD.next_index, global_vars.GENERATION_THREAD.prev_hash), (9, "new"))
+
+
+if __name__ == '__main__':
+    unittest.main()
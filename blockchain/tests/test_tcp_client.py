@@ -0,0 +1,76 @@
+import os
+import sys
+import asyncio
+import unittest
+from typing import Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tcp_server.client import PipelinedClient
+from tcp_server.protocol import BINARY_MAGIC, read_frame
+
+'''
+Run these tests from the blockchain directory:
+python -m unittest tests.test_tcp_client
+'''
+
+
+class TestPipelinedClientConnectionLoss(unittest.IsolatedAsyncioTestCase):
+
+    async def start_peer(self, close_after_frames: Optional[int]):
+        # Reads the magic and the given number of frames without answering, then hangs up.
+        # None keeps the connection open and silent
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            await reader.readexactly(len(BINARY_MAGIC))
+            if close_after_frames is None:
+                await reader.read()
+            else:
+                for _ in range(close_after_frames):
+                    await read_frame(reader)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+
+        client = PipelinedClient("127.0.0.1", server.sockets[0].getsockname()[1], max_in_flight=1)
+        await client.connect()
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_pending_and_later_requests_fail_once_the_peer_hangs_up(self):
+        client = await self.start_peer(close_after_frames=1)
+
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(client.request({"command": "get_block", "block_id": "x"}), 5)
+
+        # The read loop is gone, nothing would ever answer these
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(client.request({"command": "get_block", "block_id": "y"}), 5)
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(client.stream({"command": "sync_blocks"}).__anext__(), 5)
+
+    async def test_request_waiting_for_a_slot_fails_when_the_peer_hangs_up(self):
+        client = await self.start_peer(close_after_frames=1)
+
+        first = asyncio.create_task(client.request({"command": "get_block", "block_id": "x"}))
+        second = asyncio.create_task(client.request({"command": "get_block", "block_id": "y"}))
+
+        for task in (first, second):
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(task, 5)
+
+    async def test_timeout_covers_waiting_for_a_slot(self):
+        client = await self.start_peer(close_after_frames=None)
+
+        first = asyncio.create_task(client.request({"command": "get_block", "block_id": "x"}))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.request({"command": "get_block", "block_id": "y"}, timeout=0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(first, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ed25519 import generate_keypair, generate_signature
+from mempool import Mempool
+from structures.transaction import Transaction
+from tx_ingestion import TxIngestionPipeline, verify_batch
+
+
+# Admitted tx/s through TxIngestionPipeline for 1..N worker processes.
+# Run from the blockchain directory:
+#   python tests/tx_ingestion_bench.py [transactions] [max workers]
+
+
+def make_signed_transactions(count: int, senders: int = 100):
+    keys = [generate_keypair() for _ in range(senders)]
+    transactions = []
+    for i in range(count):
+        pubkey, private_key = keys[i % senders]
+        tx = Transaction(v=1, fee=str(1 + i % 1000), creator=pubkey, sig="", tx_type="TX", sig_type="D", nonce=i // senders, payload={"to": keys[(i + 1) % senders][0], "amount": i})
+        tx.sig = generate_signature(private_key, tx.get_signing_bytes())
+        transactions.append(tx)
+    return transactions
+
+
+def bench_pipeline(transactions, workers: int) -> float:
+    pipeline = TxIngestionPipeline(Mempool(max_size=len(transactions)), workers=workers)
+    pipeline.start()
+    # Process start up isn't part of the steady state
+    pipeline.submit(transactions[0])
+    pipeline.wait_idle()
+
+    start = time.perf_counter()
+    for tx in transactions[1:]:
+        pipeline.submit(tx)
+    pipeline.wait_idle()
+    elapsed = time.perf_counter() - start
+
+    metrics = pipeline.get_metrics()
+    pipeline.stop()
+    assert metrics["admitted"] == len(transactions), metrics
+    return (len(transactions) - 1) / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    transactions = make_signed_transactions(count)
+
+    start = time.perf_counter()
+    verify_batch([(tx.sig_type, tx.creator, tx.sig, tx.get_signing_bytes()) for tx in transactions])
+    print(f"{'serial verify only':<24} {count / (time.perf_counter() - start):>10.0f} tx/s")
+
+    for workers in range(1, max_workers + 1):
+        rate = bench_pipeline(transactions, workers)
+        print(f"{f'pipeline, {workers} worker(s)':<24} {rate:>10.0f} tx/s admitted {rate / workers:>10.0f} tx/s per core")
+
+
+if __name__ == "__main__":
+    main()
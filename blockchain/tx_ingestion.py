@@ -0,0 +1,176 @@
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ed25519 import verify_signature
+from mempool import Mempool
+from structures.transaction import Transaction
+
+
+BATCH_SIZE = 256
+BATCH_TIMEOUT_MS = 5
+MAX_IN_FLIGHT_BATCHES = 64
+
+# Signature schemes by Transaction.sig_type
+SIG_TYPE_ED25519 = "D"
+
+
+def verify_batch(items: List[Tuple[str, str, str, bytes]]) -> List[bool]:
+    # Runs on the worker pool, items are (sig_type, creator, sig, signed bytes) so they pickle cheaply
+    results = []
+    for sig_type, creator, sig, message in items:
+        if sig_type == SIG_TYPE_ED25519:
+            results.append(verify_signature(message, creator, sig))
+        else:
+            results.append(False)
+    return results
+
+
+class TxIngestionPipeline:
+
+    """
+    Verifies incoming transactions in parallel and admits the valid ones into the mempool.
+
+    submit() dedups by hash (against the mempool and everything still in the pipeline)
+    before any signature work. A batcher thread groups transactions into batches of
+    batch_size (or whatever arrived within batch_timeout_ms) and hands them to the worker
+    pool. An admitter thread collects the batch results in submission order, so
+    transactions reach the mempool in the order they arrived no matter which worker
+    finished first.
+
+    Signature checks are CPU bound, so the default pool is processes (one per core).
+    """
+
+    def __init__(
+        self,
+        mempool: Mempool,
+        workers: Optional[int] = None,
+        batch_size: int = BATCH_SIZE,
+        batch_timeout_ms: int = BATCH_TIMEOUT_MS,
+        max_in_flight: int = MAX_IN_FLIGHT_BATCHES,
+        use_processes: bool = True
+    ):
+        self.mempool = mempool
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout_ms / 1000
+        self.use_processes = use_processes
+
+        self._incoming: "queue.Queue[Optional[Transaction]]" = queue.Queue()
+        # Bounded, so a slow pool pushes back on the batcher instead of piling up batches
+        self._in_flight: "queue.Queue[Optional[Tuple[List[Transaction], Future]]]" = queue.Queue(maxsize=max_in_flight)
+        self._pending_hashes = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+        self._executor: Optional[Executor] = None
+        self._threads: List[threading.Thread] = []
+
+        self._received = 0
+        self._duplicates = 0
+        self._invalid = 0
+        self._admitted = 0
+        self._rejected = 0 # valid, but the mempool refused them (full, underpriced, stale nonce)
+
+    def start(self):
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(self.workers) if self.use_processes else ThreadPoolExecutor(self.workers, thread_name_prefix='TxVerify')
+        self._threads = [
+            threading.Thread(target=self._batch_loop, name='TxBatcher', daemon=True),
+            threading.Thread(target=self._admit_loop, name='TxAdmitter', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        # Everything already submitted is still verified and admitted before the threads exit
+        if self._executor is None:
+            return
+        self._incoming.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._executor.shutdown()
+        self._executor = None
+        self._threads = []
+
+    def submit(self, tx: Transaction) -> bool:
+        # False when the transaction is a duplicate and was dropped without verification
+        tx_hash = tx.get_hash_bytes()
+        with self._lock:
+            self._received += 1
+            if tx_hash in self._pending_hashes or tx.get_hash() in self.mempool:
+                self._duplicates += 1
+                return False
+            self._pending_hashes.add(tx_hash)
+        self._incoming.put(tx)
+        return True
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        # Blocks until every submitted transaction went through admission
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending_hashes, timeout)
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "received": self._received,
+                "duplicates": self._duplicates,
+                "invalid": self._invalid,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "pending": len(self._pending_hashes)
+            }
+
+    def _batch_loop(self):
+        stopping = False
+        while not stopping:
+            first = self._incoming.get()
+            if first is None:
+                break
+            batch = [first]
+
+            # Top the batch up with whatever arrives before the timeout
+            while len(batch) < self.batch_size:
+                try:
+                    tx = self._incoming.get(timeout=self.batch_timeout)
+                except queue.Empty:
+                    break
+                if tx is None:
+                    stopping = True
+                    break
+                batch.append(tx)
+
+            items = [(tx.sig_type, tx.creator, tx.sig, tx.get_signing_bytes()) for tx in batch]
+            self._in_flight.put((batch, self._executor.submit(verify_batch, items)))
+
+        self._in_flight.put(None)
+
+    def _admit_loop(self):
+        while True:
+            job = self._in_flight.get()
+            if job is None:
+                return
+            batch, future = job
+            try:
+                results = future.result()
+            except Exception:
+                # A broken worker counts against the batch, it can be resubmitted
+                results = [False] * len(batch)
+
+            for tx, valid in zip(batch, results):
+                admitted = valid and self.mempool.add(tx)
+                with self._lock:
+                    if not valid:
+                        self._invalid += 1
+                    elif admitted:
+                        self._admitted += 1
+                    else:
+                        self._rejected += 1
+                    self._pending_hashes.discard(tx.get_hash_bytes())
+
+            with self._idle:
+                if not self._pending_hashes:
+                    self._idle.notify_all()
@@ -1,9 +1,12 @@
+import json
 import hashlib
 import time
+from typing import Dict, List, Optional
 
 from structures.threads_metadata_handlers import EpochHandler, ApprovementThreadMetadataHandler
-from global_vars import CORE_MAJOR_VERSION
-from structures.misc import QuorumMemberData
+from global_vars import CORE_MAJOR_VERSION, APPROVEMENT_THREAD, APPROVEMENT_THREAD_METADATA_DB, GLOBAL_CACHES
+from structures.misc import EpochQuorumData, QuorumMemberData, PoolStorage
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_LEADER_CHANGED
 
 def sha256(data: str) -> str:
     return hashlib.sha256(data.encode()).hexdigest()
@@ -15,11 +18,26 @@ def is_my_core_version_old(thread: ApprovementThreadMetadataHandler) -> bool:
     return thread.core_major_version > CORE_MAJOR_VERSION
 
 def epoch_still_fresh(thread: ApprovementThreadMetadataHandler) -> bool:
-    return thread.epoch.start_timestamp+thread.network_parameters.get("EPOCH_TIME") > get_utc_timestamp()
+    return get_epoch_end_timestamp(thread) > get_utc_timestamp()
+
+def get_epoch_end_timestamp(thread: ApprovementThreadMetadataHandler) -> int:
+    return thread.epoch.start_timestamp+thread.network_parameters.get("EPOCH_TIME", 0)
+
+def get_leader_timeframe_end(thread: ApprovementThreadMetadataHandler) -> int:
+    # When the current leader's timeframe runs out
+    return thread.epoch.start_timestamp+(thread.epoch.current_leader_index+1)*thread.network_parameters.get("LEADERSHIP_TIMEFRAME", 0)
 
 def get_quorum_majority(thread: ApprovementThreadMetadataHandler) -> int:
-    
-    quorum_size = len(thread.epoch.quorum)
+
+    return get_epoch_quorum_data(thread.epoch).majority
+
+
+def get_epoch_quorum_majority(epoch_handler: EpochHandler) -> int:
+
+    return get_epoch_quorum_data(epoch_handler).majority
+
+
+def compute_quorum_majority(quorum_size: int) -> int:
 
     majority = (2 * quorum_size) // 3 + 1
 
@@ -27,19 +45,126 @@ def get_quorum_majority(thread: ApprovementThreadMetadataHandler) -> int:
 
 
 def get_quorum_urls_and_pubkeys(thread: ApprovementThreadMetadataHandler) -> list[QuorumMemberData]:
-    
-    quorum_data = []
 
-    for pubkey in thread.epoch.quorum:
-        pool_storage = get_from_approvement_thread_state(f"{pubkey}(POOL)_STORAGE_POOL")
-        quorum_data.append(QuorumMemberData(PubKey=pubkey, Url=pool_storage.pool_url))
+    return get_epoch_quorum_data(thread.epoch).members
+
+
+def get_epoch_quorum_data(epoch_handler: EpochHandler) -> EpochQuorumData:
+
+    # Built once per epoch, afterwards every quorum check is a dict lookup. Keyed by the epoch full id,
+    # so rotation to a new epoch rebuilds it, and the current plus previous epoch stay cached (AEFPs
+    # for the previous epoch are still checked after rotation)
+
+    cache = GLOBAL_CACHES["EPOCH_QUORUM"]
+
+    epoch_full_id = f"{epoch_handler.hash}#{epoch_handler.id}"
+
+    quorum_data = cache.get(epoch_full_id)
+
+    if quorum_data is not None and quorum_data.quorum is epoch_handler.quorum:
+        return quorum_data
+
+    # One batched lookup for the whole quorum instead of a DB round trip per member
+    pools = get_many_from_approvement_thread_state([f"{pubkey}(POOL)_STORAGE_POOL" for pubkey in epoch_handler.quorum])
+
+    members = []
+
+    for pubkey in epoch_handler.quorum:
+        pool_storage = pools.get(f"{pubkey}(POOL)_STORAGE_POOL")
+        members.append(QuorumMemberData(PubKey=pubkey, Url=pool_storage.pool_url if pool_storage else ""))
+
+    positions: Dict[str, int] = {}
+
+    for position, pubkey in enumerate(epoch_handler.quorum):
+        positions.setdefault(pubkey.lower(), position)
+
+    quorum_data = EpochQuorumData(
+        epoch_full_id=epoch_full_id,
+        quorum=epoch_handler.quorum,
+        members=members,
+        positions=positions,
+        majority=compute_quorum_majority(len(epoch_handler.quorum))
+    )
+
+    for cached_id in [cached_id for cached_id in cache if not _is_recent_epoch(cached_id, epoch_handler.id)]:
+        del cache[cached_id]
+
+    cache[epoch_full_id] = quorum_data
 
     return quorum_data
 
 
+def _is_recent_epoch(epoch_full_id: str, epoch_index: int) -> bool:
 
-def get_from_approvement_thread_state(validator_id: str):
-    pass
+    return int(epoch_full_id.rsplit("#", 1)[1]) >= epoch_index - 1
+
+
+def invalidate_epoch_quorum_cache():
+
+    # For when pool URLs change mid epoch, rotation itself is picked up by get_epoch_quorum_data
+    GLOBAL_CACHES["EPOCH_QUORUM"].clear()
+
+
+def get_quorum_position(epoch_handler: EpochHandler, pubkey: str) -> int:
+
+    # Position of the pubkey in the epoch quorum, -1 when it isn't a member
+    return get_epoch_quorum_data(epoch_handler).positions.get(pubkey.lower(), -1)
+
+
+
+def get_from_approvement_thread_state(pool_id: str) -> Optional[PoolStorage]:
+
+    return get_many_from_approvement_thread_state([pool_id]).get(pool_id)
+
+
+def get_many_from_approvement_thread_state(pool_ids: List[str]) -> Dict[str, PoolStorage]:
+
+    cache = APPROVEMENT_THREAD.cache
+
+    found: Dict[str, PoolStorage] = {}
+
+    missing = []
+
+    for pool_id in pool_ids:
+        pool = cache.get(pool_id)
+        if pool is not None:
+            found[pool_id] = pool
+        else:
+            missing.append(pool_id)
+
+    if missing:
+
+        for pool_id, raw in APPROVEMENT_THREAD_METADATA_DB.get_many(missing).items():
+            try:
+                pool = PoolStorage.from_dict(json.loads(raw))
+            except (ValueError, TypeError):
+                continue
+            cache[pool_id] = pool
+            found[pool_id] = pool
+
+    return found
+
+
+def store_approvement_thread(thread: ApprovementThreadMetadataHandler):
+    APPROVEMENT_THREAD_METADATA_DB.put("AT", json.dumps(thread.to_dict()))
+
+
+def rotate_leader(thread: ApprovementThreadMetadataHandler):
+
+    # Moves leadership to the next pool in the sequence, same as the Go node: stored, then announced
+
+    thread.epoch.current_leader_index += 1
+    store_approvement_thread(thread)
+    SCHEDULER.notify(EVENT_LEADER_CHANGED)
+
+
+def set_new_epoch(thread: ApprovementThreadMetadataHandler, epoch_handler: EpochHandler):
+
+    # Every change of the AT epoch goes through here, so epoch scoped state follows it
+
+    thread.epoch = epoch_handler
+    GLOBAL_CACHES.on_epoch_change(epoch_handler.id)
+    SCHEDULER.notify(EVENT_EPOCH_CHANGED)
 
 
 def set_leaders_sequence(thread: ApprovementThreadMetadataHandler, epoch_seed: str):
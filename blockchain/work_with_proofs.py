@@ -1,26 +1,228 @@
+import os
+import json
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple, Union
+
+from ed25519 import verify_signature
+from global_vars import BLOCK_STORE, EPOCH_DATA_DB, GLOBAL_CACHES
+from scheduler import SCHEDULER, EVENT_NEW_PROOF
+from utils import get_epoch_quorum_data
 from structures.block import Block
+from structures.proofs import AggregatedEpochFinalizationProof, AggregatedFinalizationProof, AggregatedLeaderRotationProof
 from structures.threads_metadata_handlers import EpochHandler
 
-def get_block(epoch_index: int, block_creator: str, block_index: int) -> Block:
-    pass
 
+# Proofs with fewer candidate signatures than this are checked inline, a process round trip costs more
+PARALLEL_VERIFICATION_THRESHOLD = 16
 
-def verify_aggregated_epoch_finalization_proof() -> bool:
-    pass
+# Signatures per task sent to the pool. Smaller chunks stop sooner once the majority is in
+VERIFICATION_CHUNK_SIZE = 8
 
+# Keys in GLOBAL_CACHES["FINALIZATION_PROOFS"] for proofs that already passed verification
+VERIFIED_PROOF_PREFIX = "VERIFIED:"
 
-def verify_aggregated_finalization_proof() -> bool:
-    pass
+_verification_pool: Optional[ProcessPoolExecutor] = None
 
-def verify_aggregated_leader_rotation_proof() -> bool:
-    pass
 
-def check_alrp_chain_validity() -> bool:
-    pass
+def get_verification_pool() -> ProcessPoolExecutor:
+    global _verification_pool
+    if _verification_pool is None:
+        _verification_pool = ProcessPoolExecutor(os.cpu_count() or 1)
+    return _verification_pool
+
+
+def _count_valid_signatures(data_that_should_be_signed: str, signatures: List[Tuple[str, str]]) -> int:
+    return sum(1 for pubkey, signature in signatures if verify_signature(data_that_should_be_signed, pubkey, signature))
+
+
+def _proof_digest(kind: str, data_that_should_be_signed: str, majority: int, proofs: Dict[str, str]) -> str:
+    # Same signed data, same signatures and same majority always give the same answer
+    hasher = hashlib.sha256(f"{kind}\0{data_that_should_be_signed}\0{majority}".encode())
+    for pubkey in sorted(proofs):
+        hasher.update(f"\0{pubkey}:{proofs[pubkey]}".encode())
+    return hasher.hexdigest()
+
+
+def verify_quorum_signatures(kind: str, data_that_should_be_signed: str, proofs: Dict[str, str], quorum: Union[List[str], Dict[str, int]], majority: int) -> bool:
+
+    """
+    True when at least majority distinct quorum members signed the data.
+
+    Signers outside the quorum and repeated signers (compared lowercased, like the Go node)
+    are dropped before any signature is checked. quorum is either the pubkey list or the
+    lowercased pubkey -> position map from get_epoch_quorum_data. The rest are verified in
+    chunks on the process pool and the check stops as soon as the outcome is settled, either
+    the majority is reached or too few unchecked signatures remain to reach it.
+
+    Positive results are cached by proof digest in GLOBAL_CACHES["FINALIZATION_PROOFS"],
+    invalid proofs are not, so junk can't fill the cache.
+    """
+
+    cache = GLOBAL_CACHES["FINALIZATION_PROOFS"]
+    cache_key = VERIFIED_PROOF_PREFIX + _proof_digest(kind, data_that_should_be_signed, majority, proofs)
+    if cache.get(cache_key):
+        return True
+
+    quorum_set = quorum if isinstance(quorum, dict) else {pubkey.lower() for pubkey in quorum}
+    candidates: List[Tuple[str, str]] = []
+    seen = set()
+    for pubkey, signature in proofs.items():
+        lowered = pubkey.lower()
+        if lowered in quorum_set and lowered not in seen:
+            seen.add(lowered)
+            candidates.append((pubkey, signature))
+
+    if len(candidates) < majority:
+        return False
+
+    if len(candidates) < PARALLEL_VERIFICATION_THRESHOLD:
+        ok_signatures = 0
+        for position, (pubkey, signature) in enumerate(candidates):
+            if verify_signature(data_that_should_be_signed, pubkey, signature):
+                ok_signatures += 1
+                if ok_signatures >= majority:
+                    break
+            if ok_signatures + len(candidates) - position - 1 < majority:
+                return False
+        verified = ok_signatures >= majority
+    else:
+        verified = _verify_in_parallel(data_that_should_be_signed, candidates, majority)
+
+    if verified:
+        cache[cache_key] = True
+    return verified
+
+
+def _verify_in_parallel(data_that_should_be_signed: str, candidates: List[Tuple[str, str]], majority: int) -> bool:
+    pool = get_verification_pool()
+    pending = {
+        pool.submit(_count_valid_signatures, data_that_should_be_signed, candidates[start:start + VERIFICATION_CHUNK_SIZE]):
+        len(candidates[start:start + VERIFICATION_CHUNK_SIZE])
+        for start in range(0, len(candidates), VERIFICATION_CHUNK_SIZE)
+    }
+
+    ok_signatures = 0
+    unchecked = len(candidates)
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                unchecked -= pending.pop(future)
+                ok_signatures += future.result()
+            if ok_signatures >= majority:
+                return True
+            if ok_signatures + unchecked < majority:
+                return False
+        return ok_signatures >= majority
+    finally:
+        # Chunks that haven't started yet are no longer needed
+        for future in pending:
+            future.cancel()
+
+
+def get_epoch_full_id(epoch_handler: EpochHandler) -> str:
+    return f"{epoch_handler.hash}#{epoch_handler.id}"
+
+
+def get_block(epoch_index: int, block_creator: str, block_index: int) -> Optional[Block]:
+
+    # Local store only for now, fetching missing blocks from the quorum comes with block sync
+    return BLOCK_STORE.get_block(epoch_index, block_creator, block_index)
+
+
+def store_aggregated_finalization_proof(block_id: str, proof: AggregatedFinalizationProof):
+
+    # Same key and JSON as the Go node, waiting workers are woken up right away
+    EPOCH_DATA_DB.put("AFP:" + block_id, json.dumps(proof.to_dict()))
+    SCHEDULER.notify(EVENT_NEW_PROOF)
+
+
+def store_aggregated_epoch_finalization_proof(epoch_index: int, proof: AggregatedEpochFinalizationProof):
+
+    EPOCH_DATA_DB.put("AEFP:" + str(epoch_index), json.dumps(proof.to_dict()))
+    SCHEDULER.notify(EVENT_NEW_PROOF)
+
+
+def verify_aggregated_epoch_finalization_proof(proof: AggregatedEpochFinalizationProof, quorum: List[str], majority: int, epoch_full_id: str) -> bool:
+
+    data_that_should_be_signed = (
+        f"EPOCH_DONE:{proof.last_leader}:{proof.last_index}:{proof.last_hash}:"
+        f"{proof.hash_of_first_block_by_last_leader}:{epoch_full_id}"
+    )
+
+    return verify_quorum_signatures("AEFP", data_that_should_be_signed, proof.proofs, quorum, majority)
+
+
+def verify_aggregated_finalization_proof(proof: AggregatedFinalizationProof, epoch_handler: EpochHandler) -> bool:
+
+    data_that_should_be_signed = proof.prev_block_hash + proof.block_id + proof.block_hash + get_epoch_full_id(epoch_handler)
+
+    quorum_data = get_epoch_quorum_data(epoch_handler)
+
+    return verify_quorum_signatures("AFP", data_that_should_be_signed, proof.proofs, quorum_data.positions, quorum_data.majority)
+
+
+def verify_aggregated_leader_rotation_proof(pubkey_of_some_previous_leader: str, proof: AggregatedLeaderRotationProof, epoch_handler: EpochHandler) -> bool:
+
+    data_that_should_be_signed = (
+        f"LEADER_ROTATION_PROOF:{pubkey_of_some_previous_leader}:{proof.first_block_hash}:"
+        f"{proof.skip_index}:{proof.skip_hash}:{get_epoch_full_id(epoch_handler)}"
+    )
+
+    quorum_data = get_epoch_quorum_data(epoch_handler)
+
+    return verify_quorum_signatures("ALRP", data_that_should_be_signed, proof.proofs, quorum_data.positions, quorum_data.majority)
+
+
+def check_alrp_chain_validity(first_block_in_this_epoch_by_pool: Block, epoch_handler: EpochHandler, position: int) -> bool:
+
+    # Walks back from the pool at `position` through the previous leaders. Each needs a valid ALRP
+    # until one of them is found that created at least one block (skip_index >= 0)
+
+    aggregated_leaders_rotation_proofs = first_block_in_this_epoch_by_pool.extra_data.aggregated_leaders_rotation_proofs
+
+    checked = 0
+
+    for pool_pubkey in reversed(epoch_handler.leaders_sequence[:position]):
+
+        alrp_for_this_pool = aggregated_leaders_rotation_proofs.get(pool_pubkey)
+
+        if alrp_for_this_pool is None or not verify_aggregated_leader_rotation_proof(pool_pubkey, alrp_for_this_pool, epoch_handler):
+            return False
+
+        checked += 1
+
+        if alrp_for_this_pool.skip_index >= 0:
+            return True
+
+    return checked == position
 
 
 def get_verified_aggregated_finalization_proof_by_block_id(block_id:str) -> bool:
     pass
 
-def get_first_block_in_epoch(epoch_handler: EpochHandler) -> Block:
-    pass
+def get_first_block_in_epoch(epoch_handler: EpochHandler) -> Optional[Block]:
+
+    # The first block of an epoch is block 0 of the earliest leader that produced one. A later
+    # leader's block 0 only counts when its ALRPs prove every leader before it skipped without
+    # creating a block (skip_index == -1)
+
+    for position, leader in enumerate(epoch_handler.leaders_sequence):
+
+        block = BLOCK_STORE.get_block(epoch_handler.id, leader, 0)
+
+        if block is None:
+            continue
+
+        if position == 0:
+            return block
+
+        alrps = block.extra_data.aggregated_leaders_rotation_proofs
+
+        skipped_by_all = all(previous in alrps and alrps[previous].skip_index < 0 for previous in epoch_handler.leaders_sequence[:position])
+
+        if skipped_by_all and check_alrp_chain_validity(block, epoch_handler, position):
+            return block
+
+    return None
@@ -1,6 +1,10 @@
-import asyncio
+from global_vars import APPROVEMENT_THREAD
+from utils import get_utc_timestamp
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_LEADER_CHANGED, FALLBACK_RECHECK_MS
 
 async def block_generation():
     while True:
         print("Message from thread 1")
-        await asyncio.sleep(3)
\ No newline at end of file
+        # Next block slot, or sooner when leadership moves
+        block_time = APPROVEMENT_THREAD.network_parameters.get("BLOCK_TIME") or FALLBACK_RECHECK_MS
+        await SCHEDULER.wait(get_utc_timestamp() + block_time, (EVENT_LEADER_CHANGED, EVENT_EPOCH_CHANGED))
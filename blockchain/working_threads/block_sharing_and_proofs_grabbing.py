@@ -1,6 +1,7 @@
-import asyncio
+from utils import get_utc_timestamp
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_NEW_BLOCK, EVENT_NEW_PROOF, FALLBACK_RECHECK_MS
 
 async def block_sharing():
     while True:
         print("Message from thread 2")
-        await asyncio.sleep(3)
\ No newline at end of file
+        await SCHEDULER.wait(get_utc_timestamp() + FALLBACK_RECHECK_MS, (EVENT_NEW_BLOCK, EVENT_NEW_PROOF, EVENT_EPOCH_CHANGED))
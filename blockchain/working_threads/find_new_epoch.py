@@ -1,6 +1,14 @@
-import asyncio
+from global_vars import APPROVEMENT_THREAD
+from utils import get_epoch_end_timestamp, get_utc_timestamp
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_NEW_PROOF
+
+NEW_EPOCH_RECHECK_MS = 1000
 
 async def find_new_epoch():
     while True:
         print("Message from thread 3")
-        await asyncio.sleep(3)
\ No newline at end of file
+        # Nothing to find before the epoch ends, after that check again every NEW_EPOCH_RECHECK_MS or on new proofs (AEFPs)
+        now = get_utc_timestamp()
+        epoch_end = get_epoch_end_timestamp(APPROVEMENT_THREAD)
+        deadline = epoch_end if epoch_end > now else now + NEW_EPOCH_RECHECK_MS
+        await SCHEDULER.wait(deadline, (EVENT_EPOCH_CHANGED, EVENT_NEW_PROOF))
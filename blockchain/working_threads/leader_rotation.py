@@ -1,15 +1,11 @@
-import asyncio
-
 from structures.threads_metadata_handlers import ApprovementThreadMetadataHandler
-from utils import get_utc_timestamp
+from utils import get_utc_timestamp, get_leader_timeframe_end, rotate_leader
 from global_vars import APPROVEMENT_THREAD
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_LEADER_CHANGED, FALLBACK_RECHECK_MS
 
 
 def time_is_out_for_current_leader(thread: ApprovementThreadMetadataHandler) -> bool:
-    leadership_timeframe = thread.network_parameters.get("LEADERSHIP_TIMEFRAME")
-    current_leader_index = thread.epoch.current_leader_index
-
-    return get_utc_timestamp() >= thread.epoch.start_timestamp+(current_leader_index+1)*leadership_timeframe
+    return get_utc_timestamp() >= get_leader_timeframe_end(thread)
 
 
 async def leader_rotation():
@@ -23,6 +19,15 @@ async def leader_rotation():
         have_next_candidate = epochHandlerRef.current_leader_index + 1 < len(epochHandlerRef.leaders_sequence)
 
         if have_next_candidate and time_is_out_for_current_leader(APPROVEMENT_THREAD):
-            pass
+            rotate_leader(APPROVEMENT_THREAD)
+            continue
+
+        # Sleep until the current leader's timeframe ends. Without a future deadline (no next
+        # candidate, network parameters not loaded yet) recheck every FALLBACK_RECHECK_MS
+        now = get_utc_timestamp()
+        deadline = get_leader_timeframe_end(APPROVEMENT_THREAD)
+
+        if not have_next_candidate or deadline <= now:
+            deadline = now + FALLBACK_RECHECK_MS
 
-        await asyncio.sleep(3)
\ No newline at end of file
+        await SCHEDULER.wait(deadline, (EVENT_LEADER_CHANGED, EVENT_EPOCH_CHANGED))
@@ -1,6 +1,14 @@
-import asyncio
+from global_vars import APPROVEMENT_THREAD
+from utils import get_epoch_end_timestamp, get_utc_timestamp
+from scheduler import SCHEDULER, EVENT_EPOCH_CHANGED, EVENT_NEW_PROOF
+
+PROPOSAL_RETRY_MS = 1000
 
 async def next_epoch_proposer():
     while True:
         print("Message from thread 5")
-        await asyncio.sleep(3)
\ No newline at end of file
+        # Proposals start once the epoch time is over and are resent every PROPOSAL_RETRY_MS until it rotates
+        now = get_utc_timestamp()
+        epoch_end = get_epoch_end_timestamp(APPROVEMENT_THREAD)
+        deadline = epoch_end if epoch_end > now else now + PROPOSAL_RETRY_MS
+        await SCHEDULER.wait(deadline, (EVENT_EPOCH_CHANGED, EVENT_NEW_PROOF))
@@ -1,23 +1,28 @@
 import os
 import tomllib
 import tomli_w
-from typing import Tuple, Dict
+from typing import Any, Tuple, Dict, Optional
 from crypto_factory import CryptoFactory
+from key_agent import KeyAgent
 
 class AccountManager:
     '''
     This class is meant to create, maintain and load accounts
     (key pairs) that are used for UndChain.
     '''
-    def __init__(self, accounts_dir: str = 'accounts') -> None:
+    def __init__(self, accounts_dir: str = 'accounts', key_agent: Optional[KeyAgent] = None) -> None:
         self.accounts_dir: str = accounts_dir
+        # Unlocked private keys are kept here so the passphrase / KDF is only paid once
+        self.key_agent: KeyAgent = key_agent or KeyAgent()
         if not os.path.exists(accounts_dir):
             os.makedirs(accounts_dir)
 
-    def create_account(self, username: str) -> str:
+    def create_account(self, username: str, passphrase: Optional[bytes] = None) -> str:
         '''
         Create a new account with a given username; we generate a 
-        key pair and saves it to a file.
+        key pair and saves it to a file. The new private key is also
+        handed to the key agent so it is ready to use. The user is
+        prompted for a passphrase if one is not passed in.
 
         Returns:
             str: Path to the created account directory
@@ -30,7 +35,8 @@ class AccountManager:
 
         private_key, public_key = CryptoFactory.generate_keys()
 
-        self.save_keys(username, private_key, public_key, account_path)
+        self.save_keys(username, private_key, public_key, account_path, passphrase)
+        self.key_agent.add_key(username, private_key)
 
         account_info: Dict[str, str] = {
             'username': username,
@@ -43,11 +49,32 @@ class AccountManager:
 
         return account_path
     
-    def save_keys(self, username: str, private_key, public_key, directory: str) -> None:
+    def save_keys(self, username: str, private_key, public_key, directory: str, passphrase: Optional[bytes] = None) -> None:
         '''
         Saves the key pair in the same folder as the username
         '''
-        CryptoFactory.get_crypto_handler().save_keys(private_key, public_key, file_name=username, directory=directory)
+        CryptoFactory.get_crypto_handler().save_keys(private_key, public_key, file_name=username, directory=directory, passphrase=passphrase)
+
+    def unlock_account(self, username: str, passphrase: Optional[bytes] = None) -> Any:
+        '''
+        Loads the private key for an account through the key agent. Only
+        the first call (or the first after the agent's TTL runs out) reads
+        the key file and prompts for the passphrase if none is given.
+
+        Returns:
+            Any: The private key
+        '''
+        account_path: str = os.path.join(self.accounts_dir, username)
+        if not os.path.exists(account_path):
+            raise ValueError(f'Account {username} does not exist')
+
+        self.key_agent.unlock(
+            username,
+            os.path.join(account_path, f'{username}_private_key.PEM'),
+            os.path.join(account_path, f'{username}_salt.bin'),
+            passphrase
+        )
+        return self.key_agent.get_private_key(username)
 
     def load_account(self, username: str) -> Dict[str, str]:
         '''
@@ -95,6 +122,7 @@ class AccountManager:
             for name in dirs:
                 os.rmdir(os.path.join(root, name))
         os.rmdir(account_path)
+        self.key_agent.lock(username)
 
         return f'Account {username} has been deleted.'
     
@@ -131,6 +159,8 @@ class AccountManager:
             raise ValueError(f'Username: {new_username} already exists.')
         
         os.rename(old_account_path, new_account_path)
+        # Key files keep the old username in their names, so force a fresh unlock
+        self.key_agent.lock(old_username)
 
         account_info_path: str = os.path.join(new_account_path, 'account_info.toml')
         with open(account_info_path, 'rb') as file:
@@ -0,0 +1,290 @@
+'''
+AsyncCryptoFactory
+
+Async front end for CryptoFactory. The validator and the blockchain node run
+on asyncio, while every CryptoFactory call is synchronous and CPU bound, so a
+signature check made straight from a coroutine blocks all network I/O until
+it finishes. These methods hand the work to a dedicated, bounded thread pool
+and await the result instead.
+
+Whether an operation is offloaded depends on what it does, not on how big its
+payload is. Signing, verifying and anything with an ECDH exchange costs the
+same for a 64 byte message as for a 64 KB one, so those always go to the pool,
+as do key generation and file I/O. Only purely symmetric work (stream chunk
+updates) on buffers at or below the inline threshold runs on the calling
+thread, where a hand off would cost more than the work. Set the threshold to 0
+to always offload.
+
+The number of operations allowed in the pool at once is capped. Once the cap
+is reached further callers wait (without blocking the loop) for a free slot,
+and that waiting is reported in the metrics as queue depth.
+'''
+
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from crypto_factory import CryptoFactory
+from stream_encryption import DEFAULT_CHUNK_SIZE, StreamDecryptor, StreamEncryptor
+
+class AsyncCryptoFactory:
+
+    _max_workers: int = min(4, os.cpu_count() or 1)
+    _max_pending: int = 64
+    _inline_threshold: int = 256
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+    _slots: 'WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = WeakKeyDictionary()
+
+    _metrics_lock = threading.Lock()
+    _metrics: Dict[str, int] = {
+        'inline': 0,
+        'offloaded': 0,
+        'completed': 0,
+        'in_flight': 0,
+        'queued': 0,
+        'max_queued': 0
+    }
+
+    @staticmethod
+    def configure(max_workers: Optional[int] = None, max_pending: Optional[int] = None, inline_threshold: Optional[int] = None) -> None:
+        '''
+        Changes the pool settings. The current pool (if any) is shut down
+        after its running work finishes and a new one is created on the next call.
+        '''
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f'max_workers must be at least 1, got {max_workers}')
+        if max_pending is not None and max_pending < 1:
+            raise ValueError(f'max_pending must be at least 1, got {max_pending}')
+        if inline_threshold is not None and inline_threshold < 0:
+            raise ValueError(f'inline_threshold can not be negative, got {inline_threshold}')
+
+        AsyncCryptoFactory.shutdown()
+        if max_workers is not None:
+            AsyncCryptoFactory._max_workers = max_workers
+        if max_pending is not None:
+            AsyncCryptoFactory._max_pending = max_pending
+        if inline_threshold is not None:
+            AsyncCryptoFactory._inline_threshold = inline_threshold
+
+    @staticmethod
+    def shutdown() -> None:
+        '''
+        Stops the worker pool, waiting for operations already running.
+        '''
+        with AsyncCryptoFactory._executor_lock:
+            executor: Optional[ThreadPoolExecutor] = AsyncCryptoFactory._executor
+            AsyncCryptoFactory._executor = None
+            AsyncCryptoFactory._slots = WeakKeyDictionary()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def get_metrics() -> Dict[str, int]:
+        '''
+        Counters for the async crypto pool.
+
+        Returns:
+            Dict[str, int]: inline / offloaded / completed totals, operations currently
+            in the pool (in_flight), callers waiting for a slot (queued) and the
+            highest queued value seen
+        '''
+        with AsyncCryptoFactory._metrics_lock:
+            metrics: Dict[str, int] = dict(AsyncCryptoFactory._metrics)
+        metrics['max_workers'] = AsyncCryptoFactory._max_workers
+        metrics['max_pending'] = AsyncCryptoFactory._max_pending
+        return metrics
+
+    @staticmethod
+    def reset_metrics() -> None:
+        '''
+        Zeroes the totals. Gauges for work currently running are kept.
+        '''
+        with AsyncCryptoFactory._metrics_lock:
+            for name in ('inline', 'offloaded', 'completed', 'max_queued'):
+                AsyncCryptoFactory._metrics[name] = 0
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        with AsyncCryptoFactory._executor_lock:
+            if AsyncCryptoFactory._executor is None:
+                AsyncCryptoFactory._executor = ThreadPoolExecutor(
+                    max_workers=AsyncCryptoFactory._max_workers,
+                    thread_name_prefix='AsyncCrypto'
+                )
+            return AsyncCryptoFactory._executor
+
+    @staticmethod
+    def _get_slots(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop, so keep a semaphore per loop
+        slots: Optional[asyncio.Semaphore] = AsyncCryptoFactory._slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(AsyncCryptoFactory._max_pending)
+            AsyncCryptoFactory._slots[loop] = slots
+        return slots
+
+    @staticmethod
+    def _count(name: str, amount: int = 1) -> None:
+        with AsyncCryptoFactory._metrics_lock:
+            AsyncCryptoFactory._metrics[name] += amount
+            if name == 'queued':
+                AsyncCryptoFactory._metrics['max_queued'] = max(AsyncCryptoFactory._metrics['max_queued'], AsyncCryptoFactory._metrics['queued'])
+
+    @staticmethod
+    async def _run(symmetric_size: Optional[int], func: Callable[..., Any], *args: Any) -> Any:
+        '''
+        Runs func inline if it is symmetric work on a tiny buffer, otherwise on the worker pool.
+        symmetric_size is None for everything else (EC operations, key generation, file I/O),
+        which always goes to the pool.
+        '''
+        if symmetric_size is not None and symmetric_size <= AsyncCryptoFactory._inline_threshold:
+            AsyncCryptoFactory._count('inline')
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        slots: asyncio.Semaphore = AsyncCryptoFactory._get_slots(loop)
+
+        if slots.locked():
+            AsyncCryptoFactory._count('queued')
+            try:
+                await slots.acquire()
+            finally:
+                AsyncCryptoFactory._count('queued', -1)
+        else:
+            await slots.acquire()
+
+        AsyncCryptoFactory._count('offloaded')
+        AsyncCryptoFactory._count('in_flight')
+        try:
+            return await loop.run_in_executor(AsyncCryptoFactory._get_executor(), func, *args)
+        finally:
+            AsyncCryptoFactory._count('in_flight', -1)
+            AsyncCryptoFactory._count('completed')
+            slots.release()
+
+    @staticmethod
+    async def generate_keys_async() -> Tuple[Any, Any]:
+        '''
+        Generates a key pair on the worker pool.
+
+        Returns:
+            tuple[Any, Any]: The private and public key (in that order)
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.generate_keys)
+
+    @staticmethod
+    async def load_private_key_async(filepath: str, salt_file_path: str, passphrase: Optional[bytes] = None) -> Any:
+        '''
+        Loads (and decrypts) a private key on the worker pool. Pass the passphrase
+        here, a worker thread can't prompt for it.
+
+        Returns:
+            Any: Private key
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.load_private_key, filepath, salt_file_path, passphrase)
+
+    @staticmethod
+    async def load_public_key_async(filepath: str) -> Any:
+        '''
+        Loads a public key on the worker pool.
+
+        Returns:
+            Any: Public key
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.load_public_key, filepath)
+
+    @staticmethod
+    async def sign_async(private_key: Any, message: bytes) -> bytes:
+        '''
+        Signs a message without blocking the event loop.
+
+        Returns:
+            bytes: The signature
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.sign_message, private_key, message)
+
+    @staticmethod
+    async def verify_async(public_key: Any, message: bytes, signature: bytes) -> bool:
+        '''
+        Verifies a signature without blocking the event loop.
+
+        Returns:
+            bool: True if the signature is valid
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.verify_signature, public_key, message, signature)
+
+    @staticmethod
+    async def symmetric_encrypt_async(public_key: Any, message: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
+        '''
+        Async version of CryptoFactory.symmetric_encrypt_message.
+
+        Returns:
+            Tuple[bytes, bytes, bytes, bytes]: The encrypted message, ephemeral public key, nonce and authentication tag.
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.symmetric_encrypt_message, public_key, message)
+
+    @staticmethod
+    async def symmetric_decrypt_async(private_key: Any, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        '''
+        Async version of CryptoFactory.symmetric_decrypt_message.
+
+        Returns:
+            bytes: The decrypted message.
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.symmetric_decrypt_message, private_key, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    @staticmethod
+    async def asymmetric_encrypt_async(public_key: Any, message: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
+        '''
+        Async version of CryptoFactory.asymmetric_encrypt_message.
+
+        Returns:
+            Tuple[bytes, bytes, bytes, bytes]: The encrypted message, ephemeral public key, nonce and authentication tag.
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.asymmetric_encrypt_message, public_key, message)
+
+    @staticmethod
+    async def asymmetric_decrypt_async(private_key: Any, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        '''
+        Async version of CryptoFactory.asymmetric_decrypt_message.
+
+        Returns:
+            bytes: The decrypted message.
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.asymmetric_decrypt_message, private_key, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    @staticmethod
+    async def stream_update_async(stream: Union[StreamEncryptor, StreamDecryptor], data: bytes) -> bytes:
+        '''
+        Feeds data to a stream encryptor or decryptor. The key exchange happened
+        when the stream was created, so this is symmetric work only and tiny
+        buffers are handled inline. Calls on one stream must not overlap.
+
+        Returns:
+            bytes: The records (or plaintext) the stream produced
+        '''
+        return await AsyncCryptoFactory._run(len(data), stream.update, data)
+
+    @staticmethod
+    async def encrypt_file_async(public_key: Any, source_path: str, destination_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        '''
+        Async version of CryptoFactory.encrypt_file.
+
+        Returns:
+            int: Number of bytes encrypted
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.encrypt_file, public_key, source_path, destination_path, chunk_size)
+
+    @staticmethod
+    async def decrypt_file_async(private_key: Any, source_path: str, destination_path: str) -> int:
+        '''
+        Async version of CryptoFactory.decrypt_file.
+
+        Returns:
+            int: Number of bytes decrypted
+        '''
+        return await AsyncCryptoFactory._run(None, CryptoFactory.decrypt_file, private_key, source_path, destination_path)
@@ -1,6 +1,7 @@
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 from crypto_handler import CryptoHandler
 from ecdsa_handler import ECDSAHandler
+from stream_encryption import StreamEncryptor, StreamDecryptor, DEFAULT_CHUNK_SIZE, encrypt_file, decrypt_file
 
 class CryptoFactory:
 
@@ -55,24 +56,24 @@ class CryptoFactory:
         return CryptoFactory.get_crypto_handler().serialize_public_key(public_key)
     
     @staticmethod
-    def save_keys(private_key: Any, public_key: Any, filename: str, directory: str = '.') -> str:
+    def save_keys(private_key: Any, public_key: Any, filename: str, directory: str = '.', passphrase: Optional[bytes] = None) -> str:
         '''
         Saves the key pair locally using the PEM format.
 
         Returns:
             str: Returns if file was saved with where it was saved to
         '''
-        return CryptoFactory.get_crypto_handler().save_keys(private_key, public_key, filename, directory)
+        return CryptoFactory.get_crypto_handler().save_keys(private_key, public_key, filename, directory, passphrase)
     
     @staticmethod
-    def load_private_key(filepath: str, salt_file_path: str) -> Any:
+    def load_private_key(filepath: str, salt_file_path: str, passphrase: Optional[bytes] = None) -> Any:
         '''
         Loads the private key from the PEM file
 
         Returns:
             Any: Private key
         '''
-        return CryptoFactory.get_crypto_handler().load_private_key(filepath, salt_file_path)
+        return CryptoFactory.get_crypto_handler().load_private_key(filepath, salt_file_path, passphrase)
     
     @staticmethod
     def load_public_key(filepath: str) -> Any:
@@ -145,6 +146,47 @@ class CryptoFactory:
         '''
         return CryptoFactory.get_crypto_handler().asymmetric_decrypt_message(private_key, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
 
+    @staticmethod
+    def create_stream_encryptor(public_key: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamEncryptor:
+        '''
+        Creates a chunked encryptor for large payloads such as sectors or job files.
+
+        Returns:
+            StreamEncryptor: Encryptor for a stream addressed to public_key
+        '''
+        return CryptoFactory.get_crypto_handler().create_stream_encryptor(public_key, chunk_size)
+
+    @staticmethod
+    def create_stream_decryptor(private_key: Any) -> StreamDecryptor:
+        '''
+        Creates a decryptor for a stream made with create_stream_encryptor.
+
+        Returns:
+            StreamDecryptor: Decryptor for streams addressed to private_key
+        '''
+        return CryptoFactory.get_crypto_handler().create_stream_decryptor(private_key)
+
+    @staticmethod
+    def encrypt_file(public_key: Any, source_path: str, destination_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        '''
+        Encrypts a file to another file without loading it into memory.
+
+        Returns:
+            int: Number of bytes encrypted
+        '''
+        return encrypt_file(CryptoFactory.create_stream_encryptor(public_key, chunk_size), source_path, destination_path)
+
+    @staticmethod
+    def decrypt_file(private_key: Any, source_path: str, destination_path: str) -> int:
+        '''
+        Decrypts a file made by encrypt_file. The destination is only created
+        once the whole stream has been authenticated.
+
+        Returns:
+            int: Number of bytes decrypted
+        '''
+        return decrypt_file(CryptoFactory.create_stream_decryptor(private_key), source_path, destination_path)
+
     
 # Example Usage of the factory
 if __name__ == '__main__':
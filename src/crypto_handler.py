@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional
+from stream_encryption import StreamEncryptor, StreamDecryptor, DEFAULT_CHUNK_SIZE
 
 class CryptoHandler(ABC):
     '''
@@ -29,9 +30,10 @@ class CryptoHandler(ABC):
         '''
 
     @abstractmethod
-    def save_keys(self, private_key: Any, public_key: Any, file_name: str, directory: str = '.') -> str:
+    def save_keys(self, private_key: Any, public_key: Any, file_name: str, directory: str = '.', passphrase: Optional[bytes] = None) -> str:
         '''
         Saves the private and public keys to a PEM file. Encrypts the private key.
+        The user is prompted for the passphrase when one is not passed in.
 
         Returns:
             bool: A message indicating the keys were saved successfully.
@@ -39,9 +41,10 @@ class CryptoHandler(ABC):
         pass
 
     @abstractmethod
-    def load_private_key(self, filepath: str, salt_filepath: str) -> Any:
+    def load_private_key(self, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> Any:
         '''
-        Loads an encrypted private key from a PEM file.
+        Loads an encrypted private key from a PEM file. The user is prompted
+        for the passphrase when one is not passed in.
 
         Returns:
             Any: The private key
@@ -128,3 +131,24 @@ class CryptoHandler(ABC):
             bytes: Decrypted message in bytes.
         '''
         pass
+
+    @abstractmethod
+    def create_stream_encryptor(self, public_key: Any, chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamEncryptor:
+        '''
+        Creates a chunked encryptor for payloads too large to hold in memory.
+        The key exchange is the same as symmetric_encrypt_message.
+
+        Returns:
+            StreamEncryptor: Encryptor bound to a freshly derived key
+        '''
+        pass
+
+    @abstractmethod
+    def create_stream_decryptor(self, private_key: Any) -> StreamDecryptor:
+        '''
+        Creates a decryptor for a stream made by create_stream_encryptor.
+
+        Returns:
+            StreamDecryptor: Decryptor that derives its key from the stream header
+        '''
+        pass
@@ -14,8 +14,11 @@ from cryptography.hazmat.backends import default_backend
 
 import os
 import getpass
+import threading
 from crypto_handler import CryptoHandler
-from typing import Tuple
+from ephemeral_key_pool import EphemeralKeyPool
+from stream_encryption import StreamEncryptor, StreamDecryptor, DEFAULT_CHUNK_SIZE
+from typing import Dict, Optional, Tuple
 
 def generate_salt(length: int = 16) -> bytes:
     '''
@@ -31,12 +34,58 @@ class ECDSAHandler(CryptoHandler):
     ECSDA implementation of the CryptoHandler base class.
     '''
 
-    def __init__(self, curve: ec.EllipticCurve = ec.SECP521R1(), hash_algorithm= hashes.SHA512) -> None:
+    def __init__(self, curve: ec.EllipticCurve = ec.SECP521R1(), hash_algorithm= hashes.SHA512, ephemeral_pool_size: int = 32, ephemeral_low_water_mark: int = 8) -> None:
         '''
         Initialize the ECSDAHandler with the specific elliptic curve and hash algorithm.
+        The ephemeral pool settings control how many ECDH keys are generated ahead
+        of time (per curve) for the encrypt methods.
         '''
         self.curve: ec.EllipticCurve = curve
         self.hash_algorithm = hash_algorithm
+        self.ephemeral_pool_size: int = ephemeral_pool_size
+        self.ephemeral_low_water_mark: int = ephemeral_low_water_mark
+        self._ephemeral_pools: Dict[str, EphemeralKeyPool] = {}
+        self._ephemeral_pools_lock = threading.Lock()
+
+    def get_ephemeral_key_pool(self, curve: Optional[ec.EllipticCurve] = None) -> EphemeralKeyPool:
+        '''
+        Returns the ephemeral key pool for the given curve (defaults to the
+        handler's curve), starting its background worker the first time it
+        is requested. Call this at startup to warm the pool before the first
+        message is encrypted.
+
+        Returns:
+            EphemeralKeyPool: The running pool for that curve
+        '''
+        curve = curve or self.curve
+        with self._ephemeral_pools_lock:
+            pool: EphemeralKeyPool | None = self._ephemeral_pools.get(curve.name)
+            if pool is None:
+                pool = EphemeralKeyPool(curve, self.ephemeral_pool_size, self.ephemeral_low_water_mark)
+                pool.start()
+                self._ephemeral_pools[curve.name] = pool
+        return pool
+
+    def get_ephemeral_pool_metrics(self) -> Dict[str, Dict[str, int]]:
+        '''
+        Metrics for every ephemeral key pool this handler has started.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Curve name mapped to that pool's metrics
+        '''
+        with self._ephemeral_pools_lock:
+            pools: Dict[str, EphemeralKeyPool] = dict(self._ephemeral_pools)
+        return {name: pool.get_metrics() for name, pool in pools.items()}
+
+    def stop_ephemeral_key_pools(self) -> None:
+        '''
+        Stops all of the background key generation workers.
+        '''
+        with self._ephemeral_pools_lock:
+            pools: Dict[str, EphemeralKeyPool] = self._ephemeral_pools
+            self._ephemeral_pools = {}
+        for pool in pools.values():
+            pool.stop()
 
     def generate_keys(self) -> Tuple[ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey]:
         '''
@@ -59,15 +108,17 @@ class ECDSAHandler(CryptoHandler):
         ).decode('utf-8')
         return public_key_pem
     
-    def save_keys(self, private_key: ec.EllipticCurvePrivateKey, public_key: ec.EllipticCurvePublicKey, file_name: str, directory: str = '.') -> str:
+    def save_keys(self, private_key: ec.EllipticCurvePrivateKey, public_key: ec.EllipticCurvePublicKey, file_name: str, directory: str = '.', passphrase: Optional[bytes] = None) -> str:
         '''
         Saves the private / public key pair to PEM files. Encrypts the
-        private key using a passphrase and a salt.
+        private key using a passphrase and a salt. Prompts for the passphrase
+        if one is not passed in.
 
         Returns:
             str: Message indicating that the save happened successfully.
         '''
-        passphrase: bytes = getpass.getpass(prompt="Please enter a pass phrase to encrypt the private key: ").encode()
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt="Please enter a pass phrase to encrypt the private key: ").encode()
         salt: bytes = generate_salt()
 
         kdf = PBKDF2HMAC(
@@ -90,29 +141,31 @@ class ECDSAHandler(CryptoHandler):
             format=serialization.PublicFormat.SubjectPublicKeyInfo
         )
 
-        private_key_path: str = f'{directory}\\{file_name}_private_key.PEM'
+        private_key_path: str = os.path.join(directory, f'{file_name}_private_key.PEM')
         with open(private_key_path, 'wb') as private_key_file:
             private_key_file.write(encrypted_private_key)
 
-        public_key_path: str = f'{directory}\\{file_name}_public_key.PEM'
+        public_key_path: str = os.path.join(directory, f'{file_name}_public_key.PEM')
         with open(public_key_path, 'wb') as public_key_file:
             public_key_file.write(public_key_bytes)
 
         # Need to save the salt
-        salt_path = f'{directory}\\{file_name}_salt.bin'
+        salt_path = os.path.join(directory, f'{file_name}_salt.bin')
         with open(salt_path, 'wb') as salty_file:
             salty_file.write(salt)
 
         return f'{file_name} wallet keys have been saved in directory: {directory}'
     
-    def load_private_key(self, filepath: str, salt_filepath: str) -> ec.EllipticCurvePrivateKey:
+    def load_private_key(self, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> ec.EllipticCurvePrivateKey:
         '''
-        Load the specified private key passed in by filename.
+        Load the specified private key passed in by filename. Prompts for the
+        passphrase if one is not passed in.
 
         Returns:
             Private key in bytes
         '''
-        passphrase: bytes = getpass.getpass(prompt='Please enter the passphrase for the private key: ').encode()
+        if passphrase is None:
+            passphrase = getpass.getpass(prompt='Please enter the passphrase for the private key: ').encode()
 
         # Load the salt
         with open(salt_filepath, 'rb') as salty_file:
@@ -209,8 +262,7 @@ class ECDSAHandler(CryptoHandler):
         Returns:
             Tuple[bytes, bytes, bytes, bytes]: The cipher text, ephemeral key, nonce and authentication tag
         '''
-        ephemeral_private_key = ec.generate_private_key(public_key.curve, default_backend())
-        ephemeral_public_key = ephemeral_private_key.public_key()
+        ephemeral_private_key, ephemeral_public_key_bytes = self.get_ephemeral_key_pool(public_key.curve).acquire()
 
         derived_key: bytes = self.derive_symmetric_key(ephemeral_private_key, public_key)
 
@@ -222,10 +274,7 @@ class ECDSAHandler(CryptoHandler):
         ).encryptor()
         ciphertext = encryptor.update(message) + encryptor.finalize()
 
-        return ciphertext, ephemeral_public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-            ), nonce, encryptor.tag
+        return ciphertext, ephemeral_public_key_bytes, nonce, encryptor.tag
     
     def symmetric_decrypt_message(self, private_key: ec.EllipticCurvePrivateKey, cipher_text: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
         '''
@@ -257,8 +306,7 @@ class ECDSAHandler(CryptoHandler):
         Returns:
             Tuple[bytes, bytes, bytes]: The encrypted message, ephemeral public key, and nonce.
         '''
-        ephemeral_private_key = ec.generate_private_key(public_key.curve, default_backend())
-        ephemeral_public_key = ephemeral_private_key.public_key()
+        ephemeral_private_key, ephemeral_public_key_bytes = self.get_ephemeral_key_pool(public_key.curve).acquire()
 
         shared_secret = ephemeral_private_key.exchange(ec.ECDH(), public_key)
         derived_key = HKDF(
@@ -278,10 +326,7 @@ class ECDSAHandler(CryptoHandler):
         ciphertext = encryptor.update(message) + encryptor.finalize()
         tag = encryptor.tag
 
-        return ciphertext, ephemeral_public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ), nonce, tag
+        return ciphertext, ephemeral_public_key_bytes, nonce, tag
     
     def asymmetric_decrypt_message(self, private_key: ec.EllipticCurvePrivateKey, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
         '''
@@ -314,6 +359,36 @@ class ECDSAHandler(CryptoHandler):
 
         return decrypted_message
     
+    def create_stream_encryptor(self, public_key: ec.EllipticCurvePublicKey, chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamEncryptor:
+        '''
+        Creates a chunked AES-GCM encryptor keyed through an ECDH exchange
+        with an ephemeral key, the same as symmetric_encrypt_message.
+
+        Returns:
+            StreamEncryptor: The stream encryptor
+        '''
+        ephemeral_private_key, ephemeral_public_key_bytes = self.get_ephemeral_key_pool(public_key.curve).acquire()
+        derived_key: bytes = self.derive_symmetric_key(ephemeral_private_key, public_key)
+
+        return StreamEncryptor(derived_key, ephemeral_public_key_bytes, chunk_size)
+
+    def create_stream_decryptor(self, private_key: ec.EllipticCurvePrivateKey) -> StreamDecryptor:
+        '''
+        Creates a decryptor which derives the stream key from the ephemeral
+        public key found in the stream header.
+
+        Returns:
+            StreamDecryptor: The stream decryptor
+        '''
+        def derive_key(ephemeral_public_key_bytes: bytes) -> bytes:
+            ephemeral_public_key = serialization.load_pem_public_key(
+                ephemeral_public_key_bytes,
+                backend=default_backend()
+            )
+            return self.derive_symmetric_key(private_key, ephemeral_public_key) # type: ignore
+
+        return StreamDecryptor(derive_key)
+
 # Test usage
 if __name__ == '__main__':
     handler = ECDSAHandler()
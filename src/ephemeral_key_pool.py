@@ -0,0 +1,142 @@
+'''
+EphemeralKeyPool
+
+Keeps a prefilled supply of single-use elliptic curve key pairs for the
+ECDH step of symmetric / asymmetric encryption. Generating a key on P-521
+is the most expensive part of encrypting a message, so a background worker
+thread does that work ahead of time and the encrypt call only has to pop a
+ready key off the pool.
+
+Every key handed out is removed from the pool, so an ephemeral key is never
+used twice. When the pool runs dry the caller generates a key inline and the
+miss is recorded in the metrics so the pool size can be tuned.
+'''
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.backends import default_backend
+
+# Private key object and its public key already serialized to PEM
+EphemeralKeyPair = Tuple[ec.EllipticCurvePrivateKey, bytes]
+
+class EphemeralKeyPool:
+    def __init__(self, curve: ec.EllipticCurve, size: int = 32, low_water_mark: int = 8) -> None:
+        if size < 1:
+            raise ValueError(f'Ephemeral key pool size must be at least 1, got {size}')
+        if not 0 <= low_water_mark < size:
+            raise ValueError(f'Low water mark must be between 0 and {size - 1}, got {low_water_mark}')
+
+        self.curve: ec.EllipticCurve = curve
+        self.size: int = size
+        self.low_water_mark: int = low_water_mark
+
+        self._keys: Deque[EphemeralKeyPair] = deque()
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._running: bool = False
+
+        self._hits: int = 0
+        self._misses: int = 0
+        self._generated: int = 0
+
+    def start(self) -> None:
+        '''
+        Starts the background worker which fills the pool up to its size
+        and tops it back up whenever it drops to the low water mark.
+        '''
+
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+
+        self._worker = threading.Thread(target=self._replenish, name=f'EphemeralKeyPool-{self.curve.name}', daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        '''
+        Stops the background worker. Keys already in the pool are dropped.
+        '''
+
+        with self._condition:
+            self._running = False
+            self._keys.clear()
+            self._condition.notify_all()
+
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def acquire(self) -> EphemeralKeyPair:
+        '''
+        Takes a key pair out of the pool. If the pool is empty a key is
+        generated on the calling thread and counted as a miss.
+
+        Returns:
+            Tuple[ec.EllipticCurvePrivateKey, bytes]: The ephemeral private key and its PEM encoded public key
+        '''
+
+        with self._condition:
+            if self._keys:
+                key_pair: EphemeralKeyPair = self._keys.popleft()
+                self._hits += 1
+                if len(self._keys) <= self.low_water_mark:
+                    self._condition.notify()
+                return key_pair
+
+            self._misses += 1
+            self._condition.notify()
+
+        return self._generate()
+
+    def get_metrics(self) -> Dict[str, int]:
+        '''
+        Snapshot of how the pool has been performing.
+
+        Returns:
+            Dict[str, int]: Available keys, hits, misses and keys generated by the worker
+        '''
+
+        with self._condition:
+            return {
+                'available': len(self._keys),
+                'hits': self._hits,
+                'misses': self._misses,
+                'generated': self._generated
+            }
+
+    def _generate(self) -> EphemeralKeyPair:
+        private_key: ec.EllipticCurvePrivateKey = ec.generate_private_key(self.curve, default_backend())
+        public_key_pem: bytes = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return private_key, public_key_pem
+
+    def _replenish(self) -> None:
+        '''
+        Worker loop. Sleeps until the pool drops to the low water mark and
+        then generates keys until the pool is full again. Key generation
+        happens outside of the lock so acquire() never waits on it.
+        '''
+
+        while True:
+            with self._condition:
+                while self._running and len(self._keys) > self.low_water_mark:
+                    self._condition.wait()
+                if not self._running:
+                    return
+
+            while True:
+                key_pair: EphemeralKeyPair = self._generate()
+                with self._condition:
+                    if not self._running:
+                        return
+                    self._keys.append(key_pair)
+                    self._generated += 1
+                    if len(self._keys) >= self.size:
+                        break
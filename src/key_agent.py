@@ -0,0 +1,353 @@
+'''
+KeyAgent
+
+Holds unlocked private keys in memory so they only have to be decrypted
+once. Loading a key runs PBKDF2 (100,000 iterations) and, without a
+passphrase, prompts on the TTY; a validator that signs every few seconds or
+a test that juggles several accounts can not afford either on each use.
+
+Keys are kept for a time-to-live (refreshed on every use) and then dropped.
+The agent serves sign and decrypt requests itself, so callers only refer to
+a key by id and never need to hold the private key object.
+
+KeyAgentServer exposes an agent over a Unix socket so several local processes
+(e.g. the validator and the UI) can share keys that were unlocked once.
+Requests and responses are one JSON object per line with bytes hex encoded.
+KeyAgentClient is the matching blocking client.
+
+NOTE: Python can not reliably wipe key material from memory, dropping a key
+only removes our reference to it.
+'''
+
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from crypto_factory import CryptoFactory
+
+from logging import Logger
+from logger_util import setup_logger
+logger: Logger = setup_logger('KeyAgent', 'key_agent.log')
+
+DEFAULT_TTL: float = 15 * 60
+
+class KeyAgent:
+    def __init__(self, ttl: float = DEFAULT_TTL) -> None:
+        if ttl <= 0:
+            raise ValueError(f'Key agent TTL must be positive, got {ttl}')
+        self.ttl: float = ttl
+        self._keys: Dict[str, Tuple[Any, float]] = {} # key_id -> (private key, expires at)
+        self._lock = threading.Lock()
+
+    def unlock(self, key_id: str, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> None:
+        '''
+        Decrypts the private key on disk and keeps it under key_id. If the key
+        is already unlocked its TTL is refreshed and the file is not touched.
+        '''
+        if self._get(key_id) is not None:
+            return
+
+        private_key: Any = CryptoFactory.load_private_key(filepath, salt_filepath, passphrase)
+        self.add_key(key_id, private_key)
+        logger.info(f'Unlocked key {key_id} for {self.ttl} seconds')
+
+    def add_key(self, key_id: str, private_key: Any) -> None:
+        '''
+        Stores an already loaded private key (e.g. one that was just generated).
+        '''
+        with self._lock:
+            self._keys[key_id] = (private_key, time.monotonic() + self.ttl)
+
+    def is_unlocked(self, key_id: str) -> bool:
+        '''
+        Returns:
+            bool: True if the key is held and has not expired
+        '''
+        with self._lock:
+            entry: Optional[Tuple[Any, float]] = self._keys.get(key_id)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def get_private_key(self, key_id: str) -> Any:
+        '''
+        Returns the private key for in-process callers that need the key
+        object itself. Prefer sign / decrypt where possible.
+
+        Returns:
+            Any: The private key
+        '''
+        private_key: Any = self._get(key_id)
+        if private_key is None:
+            raise KeyError(f'Key {key_id} is not unlocked')
+        return private_key
+
+    def lock(self, key_id: str) -> bool:
+        '''
+        Drops a key before its TTL runs out.
+
+        Returns:
+            bool: True if the key was held
+        '''
+        with self._lock:
+            return self._keys.pop(key_id, None) is not None
+
+    def lock_all(self) -> None:
+        '''
+        Drops every key held by the agent.
+        '''
+        with self._lock:
+            self._keys.clear()
+
+    def purge_expired(self) -> int:
+        '''
+        Drops keys whose TTL has run out.
+
+        Returns:
+            int: Number of keys dropped
+        '''
+        now: float = time.monotonic()
+        with self._lock:
+            expired = [key_id for key_id, (_, expires_at) in self._keys.items() if expires_at <= now]
+            for key_id in expired:
+                del self._keys[key_id]
+        return len(expired)
+
+    def list_keys(self) -> Tuple[str, ...]:
+        '''
+        Returns:
+            Tuple[str, ...]: Ids of the keys currently unlocked
+        '''
+        self.purge_expired()
+        with self._lock:
+            return tuple(self._keys)
+
+    def sign(self, key_id: str, message: bytes) -> bytes:
+        '''
+        Signs a message with an unlocked key.
+
+        Returns:
+            bytes: The signature
+        '''
+        return CryptoFactory.sign_message(self.get_private_key(key_id), message)
+
+    def symmetric_decrypt(self, key_id: str, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        '''
+        Decrypts a message made by symmetric_encrypt_message with an unlocked key.
+
+        Returns:
+            bytes: The decrypted message
+        '''
+        return CryptoFactory.symmetric_decrypt_message(self.get_private_key(key_id), encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    def asymmetric_decrypt(self, key_id: str, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        '''
+        Decrypts a message made by asymmetric_encrypt_message with an unlocked key.
+
+        Returns:
+            bytes: The decrypted message
+        '''
+        return CryptoFactory.asymmetric_decrypt_message(self.get_private_key(key_id), encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    def _get(self, key_id: str) -> Any:
+        # Returns the key and slides its expiry forward, or None if missing / expired
+        now: float = time.monotonic()
+        with self._lock:
+            entry: Optional[Tuple[Any, float]] = self._keys.get(key_id)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._keys[key_id]
+                return None
+            self._keys[key_id] = (entry[0], now + self.ttl)
+            return entry[0]
+
+
+class KeyAgentServer:
+    '''
+    Serves a KeyAgent over a Unix socket that only the current user can open.
+    '''
+
+    def __init__(self, agent: KeyAgent, socket_path: str, purge_interval: float = 30) -> None:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError('The key agent daemon needs Unix socket support')
+        self.agent: KeyAgent = agent
+        self.socket_path: str = socket_path
+        self.purge_interval: float = purge_interval
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._purge_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        '''
+        Starts listening on the socket path, replacing a stale socket file.
+        '''
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        old_umask: int = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+
+        self._purge_task = asyncio.create_task(self._purge_loop())
+        logger.info(f'Key agent listening on {self.socket_path}')
+
+    async def stop(self) -> None:
+        '''
+        Stops the server and removes the socket file. Keys stay in the agent.
+        '''
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        logger.info('Key agent stopped')
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    response: Dict[str, Any] = await asyncio.get_running_loop().run_in_executor(None, self.handle_request, json.loads(line.decode()))
+                except Exception as e:
+                    response = {'error': str(e)}
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+        Runs a single request against the agent.
+
+        Returns:
+            Dict[str, Any]: The response to send back
+        '''
+        command: Optional[str] = request.get('command')
+        key_id: str = request.get('key_id', '')
+
+        if command == 'unlock':
+            # The daemon has no TTY to prompt on, so the passphrase must come with the request
+            if 'passphrase' not in request and not self.agent.is_unlocked(key_id):
+                return {'error': f'Key {key_id} is locked and no passphrase was sent'}
+            passphrase: Optional[str] = request.get('passphrase')
+            self.agent.unlock(key_id, request['filepath'], request['salt_filepath'], passphrase.encode() if passphrase is not None else None)
+            return {'response': 'unlocked'}
+        if command == 'sign':
+            return {'signature': self.agent.sign(key_id, bytes.fromhex(request['message'])).hex()}
+        if command in ('symmetric_decrypt', 'asymmetric_decrypt'):
+            decrypt = self.agent.symmetric_decrypt if command == 'symmetric_decrypt' else self.agent.asymmetric_decrypt
+            message: bytes = decrypt(
+                key_id,
+                bytes.fromhex(request['encrypted_message']),
+                bytes.fromhex(request['ephemeral_public_key']),
+                bytes.fromhex(request['nonce']),
+                bytes.fromhex(request['tag'])
+            )
+            return {'message': message.hex()}
+        if command == 'is_unlocked':
+            return {'unlocked': self.agent.is_unlocked(key_id)}
+        if command == 'lock':
+            return {'locked': self.agent.lock(key_id)}
+        if command == 'list':
+            return {'keys': list(self.agent.list_keys())}
+        return {'error': 'Unknown command'}
+
+    async def _purge_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            dropped: int = self.agent.purge_expired()
+            if dropped:
+                logger.info(f'Dropped {dropped} expired key(s)')
+
+
+class KeyAgentClient:
+    '''
+    Blocking client for a KeyAgentServer running on this machine.
+    '''
+
+    def __init__(self, socket_path: str, timeout: float = 10) -> None:
+        self.socket_path: str = socket_path
+        self.timeout: float = timeout
+
+    def unlock(self, key_id: str, filepath: str, salt_filepath: str, passphrase: Optional[bytes] = None) -> None:
+        request: Dict[str, Any] = {'command': 'unlock', 'key_id': key_id, 'filepath': os.path.abspath(filepath), 'salt_filepath': os.path.abspath(salt_filepath)}
+        if passphrase is not None:
+            request['passphrase'] = passphrase.decode()
+        self._request(request)
+
+    def sign(self, key_id: str, message: bytes) -> bytes:
+        return bytes.fromhex(self._request({'command': 'sign', 'key_id': key_id, 'message': message.hex()})['signature'])
+
+    def symmetric_decrypt(self, key_id: str, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        return self._decrypt('symmetric_decrypt', key_id, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    def asymmetric_decrypt(self, key_id: str, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        return self._decrypt('asymmetric_decrypt', key_id, encrypted_message, ephemeral_public_key_bytes, nonce, tag)
+
+    def is_unlocked(self, key_id: str) -> bool:
+        return self._request({'command': 'is_unlocked', 'key_id': key_id})['unlocked']
+
+    def lock(self, key_id: str) -> bool:
+        return self._request({'command': 'lock', 'key_id': key_id})['locked']
+
+    def list_keys(self) -> Tuple[str, ...]:
+        return tuple(self._request({'command': 'list'})['keys'])
+
+    def _decrypt(self, command: str, key_id: str, encrypted_message: bytes, ephemeral_public_key_bytes: bytes, nonce: bytes, tag: bytes) -> bytes:
+        response: Dict[str, Any] = self._request({
+            'command': command,
+            'key_id': key_id,
+            'encrypted_message': encrypted_message.hex(),
+            'ephemeral_public_key': ephemeral_public_key_bytes.hex(),
+            'nonce': nonce.hex(),
+            'tag': tag.hex()
+        })
+        return bytes.fromhex(response['message'])
+
+    def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(self.timeout)
+            client.connect(self.socket_path)
+            client.sendall((json.dumps(request) + '\n').encode())
+            with client.makefile('rb') as stream:
+                response: Dict[str, Any] = json.loads(stream.readline().decode())
+
+        if 'error' in response:
+            raise RuntimeError(f'Key agent error: {response["error"]}')
+        return response
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the UndChain key agent daemon')
+    parser.add_argument('--socket', default=os.path.join(os.path.expanduser('~'), '.undchain_agent.sock'))
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL, help='Seconds an unused key stays unlocked')
+    args = parser.parse_args()
+
+    async def main() -> None:
+        server = KeyAgentServer(KeyAgent(ttl=args.ttl), args.socket)
+        await server.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print('Key agent stopped')
@@ -0,0 +1,311 @@
+'''
+StreamEncryption
+
+Chunked AEAD encryption for payloads that are too large to hold in memory,
+such as a full storage sector or a job file being synced between partners.
+The payload is cut into fixed size chunks and each chunk is sealed with
+AES-GCM under its own nonce, so memory use stays at roughly one chunk no
+matter how big the payload is.
+
+Stream layout:
+    header  = MAGIC | version (1) | chunk size (4) | nonce prefix (7) | key length (2) | ephemeral public key
+    record  = flag (1) | length (4) | cipher text + tag
+
+Each chunk nonce is the nonce prefix, a 4 byte chunk counter and the record
+flag. Every record also authenticates the header. The stream always ends
+with a FINAL record that carries the total plain text length, so reordered,
+dropped, truncated or extended streams fail to decrypt.
+
+The stream classes only deal with the symmetric key. Agreeing on that key
+(ECDH with an ephemeral key) is left to the CryptoHandler, see
+create_stream_encryptor / create_stream_decryptor.
+'''
+
+import os
+import struct
+import socket
+import asyncio
+from typing import Callable, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC: bytes = b'UNDS'
+VERSION: int = 1
+DEFAULT_CHUNK_SIZE: int = 64 * 1024
+MIN_CHUNK_SIZE: int = 8 # the FINAL record's length field has to fit in a record
+MAX_CHUNK_SIZE: int = 16 * 1024 * 1024
+
+NONCE_PREFIX_SIZE: int = 7
+TAG_SIZE: int = 16
+
+RECORD_DATA: int = 0
+RECORD_FINAL: int = 1
+
+_HEADER_FORMAT: str = f'>4sBI{NONCE_PREFIX_SIZE}sH'
+_HEADER_SIZE: int = struct.calcsize(_HEADER_FORMAT)
+_RECORD_FORMAT: str = '>BI'
+_RECORD_SIZE: int = struct.calcsize(_RECORD_FORMAT)
+_MAX_CHUNKS: int = 2 ** 32
+
+
+def _chunk_nonce(nonce_prefix: bytes, counter: int, flag: int) -> bytes:
+    if counter >= _MAX_CHUNKS:
+        raise OverflowError('Stream has too many chunks for a single key')
+    return nonce_prefix + struct.pack('>IB', counter, flag)
+
+
+class StreamEncryptor:
+    '''
+    Encrypts a stream chunk by chunk. Feed plain text to update() as it
+    becomes available and call finalize() once at the end; the returned
+    bytes from both (header included) make up the encrypted stream.
+    '''
+
+    def __init__(self, key: bytes, ephemeral_public_key_bytes: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f'Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes, got {chunk_size}')
+
+        self.chunk_size: int = chunk_size
+        self._aead = AESGCM(key)
+        self._nonce_prefix: bytes = os.urandom(NONCE_PREFIX_SIZE)
+        self._header: bytes = struct.pack(
+            _HEADER_FORMAT, MAGIC, VERSION, chunk_size, self._nonce_prefix, len(ephemeral_public_key_bytes)
+        ) + ephemeral_public_key_bytes
+
+        self._buffer = bytearray()
+        self._counter: int = 0
+        self._total_length: int = 0
+        self._header_sent: bool = False
+        self._finalized: bool = False
+
+    def update(self, data: bytes) -> bytes:
+        '''
+        Buffers plain text and seals every full chunk.
+
+        Returns:
+            bytes: Encrypted stream data ready to be written (may be empty)
+        '''
+        if self._finalized:
+            raise ValueError('Stream encryptor has already been finalized')
+
+        output = bytearray(self._take_header())
+        self._buffer += data
+        self._total_length += len(data)
+
+        offset: int = 0
+        while len(self._buffer) - offset >= self.chunk_size:
+            output += self._seal(RECORD_DATA, bytes(self._buffer[offset:offset + self.chunk_size]))
+            offset += self.chunk_size
+        del self._buffer[:offset]
+
+        return bytes(output)
+
+    def finalize(self) -> bytes:
+        '''
+        Seals whatever is left in the buffer followed by the FINAL record.
+
+        Returns:
+            bytes: The last of the encrypted stream
+        '''
+        if self._finalized:
+            raise ValueError('Stream encryptor has already been finalized')
+
+        output = bytearray(self._take_header())
+        if self._buffer:
+            output += self._seal(RECORD_DATA, bytes(self._buffer))
+            self._buffer.clear()
+        output += self._seal(RECORD_FINAL, struct.pack('>Q', self._total_length))
+        self._finalized = True
+
+        return bytes(output)
+
+    def _take_header(self) -> bytes:
+        if self._header_sent:
+            return b''
+        self._header_sent = True
+        return self._header
+
+    def _seal(self, flag: int, chunk: bytes) -> bytes:
+        nonce: bytes = _chunk_nonce(self._nonce_prefix, self._counter, flag)
+        self._counter += 1
+        sealed: bytes = self._aead.encrypt(nonce, chunk, self._header)
+        return struct.pack(_RECORD_FORMAT, flag, len(sealed)) + sealed
+
+
+class StreamDecryptor:
+    '''
+    Decrypts a stream produced by StreamEncryptor. The symmetric key is not
+    known until the header (and the ephemeral public key inside it) has been
+    read, so the decryptor is given a callback that turns that public key
+    into the key.
+
+    Plain text is released one authenticated chunk at a time. It is not
+    known that the stream is complete until finalize() succeeds, so callers
+    writing to disk should only keep the output after that.
+    '''
+
+    def __init__(self, derive_key: Callable[[bytes], bytes]) -> None:
+        self._derive_key: Callable[[bytes], bytes] = derive_key
+        self._aead: Optional[AESGCM] = None
+        self._header: bytes = b''
+        self._nonce_prefix: bytes = b''
+        self.chunk_size: int = 0
+
+        self._buffer = bytearray()
+        self._counter: int = 0
+        self._total_length: int = 0
+        self._finished: bool = False
+
+    def update(self, data: bytes) -> bytes:
+        '''
+        Buffers encrypted data and opens every complete record.
+
+        Returns:
+            bytes: Authenticated plain text (may be empty)
+        '''
+        if self._finished and data:
+            raise ValueError('Unexpected data after the end of the encrypted stream')
+
+        self._buffer += data
+        output = bytearray()
+
+        if self._aead is None and not self._read_header():
+            return b''
+
+        offset: int = 0
+        while not self._finished and len(self._buffer) - offset >= _RECORD_SIZE:
+            flag, length = struct.unpack_from(_RECORD_FORMAT, self._buffer, offset)
+            if flag not in (RECORD_DATA, RECORD_FINAL) or not TAG_SIZE <= length <= self.chunk_size + TAG_SIZE:
+                raise ValueError('Malformed record in encrypted stream')
+            if len(self._buffer) - offset - _RECORD_SIZE < length:
+                break
+
+            start: int = offset + _RECORD_SIZE
+            chunk: bytes = self._open(flag, bytes(self._buffer[start:start + length]))
+            offset = start + length
+
+            if flag == RECORD_FINAL:
+                if len(chunk) != 8 or struct.unpack('>Q', chunk)[0] != self._total_length:
+                    raise ValueError('Encrypted stream length does not match its final record')
+                self._finished = True
+            else:
+                self._total_length += len(chunk)
+                output += chunk
+
+        del self._buffer[:offset]
+        if self._finished and self._buffer:
+            raise ValueError('Unexpected data after the end of the encrypted stream')
+
+        return bytes(output)
+
+    def finalize(self) -> None:
+        '''
+        Confirms the FINAL record was received, raising if the stream was cut short.
+        '''
+        if not self._finished:
+            raise ValueError('Encrypted stream is truncated')
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < _HEADER_SIZE:
+            return False
+
+        magic, version, chunk_size, nonce_prefix, key_length = struct.unpack_from(_HEADER_FORMAT, self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not an UndChain encrypted stream or unsupported version')
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f'Invalid chunk size in stream header: {chunk_size}')
+        if len(self._buffer) < _HEADER_SIZE + key_length:
+            return False
+
+        self._header = bytes(self._buffer[:_HEADER_SIZE + key_length])
+        self._nonce_prefix = nonce_prefix
+        self.chunk_size = chunk_size
+        self._aead = AESGCM(self._derive_key(self._header[_HEADER_SIZE:]))
+        del self._buffer[:_HEADER_SIZE + key_length]
+        return True
+
+    def _open(self, flag: int, sealed: bytes) -> bytes:
+        nonce: bytes = _chunk_nonce(self._nonce_prefix, self._counter, flag)
+        self._counter += 1
+        return self._aead.decrypt(nonce, sealed, self._header) # type: ignore
+
+
+def encrypt_file(encryptor: StreamEncryptor, source_path: str, destination_path: str) -> int:
+    '''
+    Encrypts source_path into destination_path one chunk at a time.
+
+    Returns:
+        int: Number of plain text bytes encrypted
+    '''
+    total: int = 0
+    with open(source_path, 'rb') as source, open(destination_path, 'wb') as destination:
+        while chunk := source.read(encryptor.chunk_size):
+            destination.write(encryptor.update(chunk))
+            total += len(chunk)
+        destination.write(encryptor.finalize())
+    return total
+
+
+def decrypt_file(decryptor: StreamDecryptor, source_path: str, destination_path: str, read_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    '''
+    Decrypts source_path into destination_path. The plain text is written to
+    a temporary file next to the destination and only moved into place once
+    the whole stream has been authenticated.
+
+    Returns:
+        int: Number of plain text bytes written
+    '''
+    total: int = 0
+    partial_path: str = f'{destination_path}.part'
+    try:
+        with open(source_path, 'rb') as source, open(partial_path, 'wb') as destination:
+            while chunk := source.read(read_size):
+                plain_text: bytes = decryptor.update(chunk)
+                destination.write(plain_text)
+                total += len(plain_text)
+            decryptor.finalize()
+        os.replace(partial_path, destination_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return total
+
+
+async def encrypt_socket(encryptor: StreamEncryptor, source: socket.socket, destination: socket.socket) -> int:
+    '''
+    Reads plain text from the source socket until the peer stops sending and
+    forwards it encrypted to the destination socket. Both sockets must be
+    non-blocking, the same as the ones used by IPCommunication.
+
+    Returns:
+        int: Number of plain text bytes encrypted
+    '''
+    loop = asyncio.get_event_loop()
+    total: int = 0
+    while chunk := await loop.sock_recv(source, encryptor.chunk_size):
+        encrypted: bytes = encryptor.update(chunk)
+        if encrypted:
+            await loop.sock_sendall(destination, encrypted)
+        total += len(chunk)
+    await loop.sock_sendall(destination, encryptor.finalize())
+    return total
+
+
+async def decrypt_socket(decryptor: StreamDecryptor, source: socket.socket, destination: socket.socket, read_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    '''
+    Reads an encrypted stream from the source socket and forwards the plain
+    text to the destination socket, raising if the stream ends early.
+
+    Returns:
+        int: Number of plain text bytes forwarded
+    '''
+    loop = asyncio.get_event_loop()
+    total: int = 0
+    while chunk := await loop.sock_recv(source, read_size):
+        plain_text: bytes = decryptor.update(chunk)
+        if plain_text:
+            await loop.sock_sendall(destination, plain_text)
+        total += len(plain_text)
+    decryptor.finalize()
+    return total
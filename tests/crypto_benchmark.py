@@ -0,0 +1,241 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import json
+import time
+import argparse
+import platform
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cryptography
+from cryptography.hazmat.primitives.asymmetric import ec
+from crypto_handler import CryptoHandler
+from ecdsa_handler import ECDSAHandler
+
+'''
+Crypto microbenchmarks and regression check.
+
+Measures every CryptoHandler operation across message sizes and curves and
+writes the results as JSON. When a baseline is given, any case whose
+throughput drops more than the threshold below the baseline is reported and
+the script exits with status 1, so it can gate crypto changes in CI.
+
+Run these benchmarks:
+python tests/crypto_benchmark.py --output crypto_results.json
+python tests/crypto_benchmark.py --save-baseline tests/crypto_baseline.json
+python tests/crypto_benchmark.py --baseline tests/crypto_baseline.json --threshold 0.15
+
+Baselines are machine specific, record one on the machine doing the comparison.
+'''
+
+SIZES: Tuple[int, ...] = (64, 1024, 16 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2)
+
+CURVES: Dict[str, ec.EllipticCurve] = {
+    'secp256r1': ec.SECP256R1(),
+    'secp384r1': ec.SECP384R1(),
+    'secp521r1': ec.SECP521R1()
+}
+
+# Operations that do not depend on the message size are only run once per curve
+SIZELESS_OPERATIONS: Tuple[str, ...] = ('generate_keys',)
+SIZED_OPERATIONS: Tuple[str, ...] = (
+    'sign_message',
+    'verify_signature',
+    'symmetric_encrypt_message',
+    'symmetric_decrypt_message',
+    'asymmetric_encrypt_message',
+    'asymmetric_decrypt_message',
+    'stream_encrypt',
+    'stream_decrypt'
+)
+
+
+def time_operation(operation: Callable[[], Any], min_time: float, min_iterations: int) -> Tuple[int, float]:
+    '''
+    Runs the operation until both min_time and min_iterations are reached.
+
+    Returns:
+        Tuple[int, float]: Iterations run and the total seconds taken
+    '''
+    operation() # Warm up (first calls build caches / start the ephemeral pool)
+    iterations: int = 0
+    start: float = time.perf_counter()
+    elapsed: float = 0.0
+    while iterations < min_iterations or elapsed < min_time:
+        operation()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+    return iterations, elapsed
+
+
+def build_operations(handler: CryptoHandler, message: bytes) -> Dict[str, Callable[[], Any]]:
+    '''
+    Prepares a zero argument callable for every sized operation. Inputs for
+    the decrypt / verify side are made once up front so only the operation
+    itself is timed.
+
+    Returns:
+        Dict[str, Callable[[], Any]]: Operation name to callable
+    '''
+    private_key, public_key = handler.generate_keys()
+    signature: bytes = handler.sign_message(private_key, message)
+    symmetric: Tuple[bytes, bytes, bytes, bytes] = handler.symmetric_encrypt_message(public_key, message)
+    asymmetric: Tuple[bytes, bytes, bytes, bytes] = handler.asymmetric_encrypt_message(public_key, message)
+
+    def stream_encrypt() -> bytes:
+        encryptor = handler.create_stream_encryptor(public_key)
+        return encryptor.update(message) + encryptor.finalize()
+
+    stream: bytes = stream_encrypt()
+
+    def stream_decrypt() -> bytes:
+        decryptor = handler.create_stream_decryptor(private_key)
+        plain_text: bytes = decryptor.update(stream)
+        decryptor.finalize()
+        return plain_text
+
+    return {
+        'sign_message': lambda: handler.sign_message(private_key, message),
+        'verify_signature': lambda: handler.verify_signature(public_key, message, signature),
+        'symmetric_encrypt_message': lambda: handler.symmetric_encrypt_message(public_key, message),
+        'symmetric_decrypt_message': lambda: handler.symmetric_decrypt_message(private_key, *symmetric),
+        'asymmetric_encrypt_message': lambda: handler.asymmetric_encrypt_message(public_key, message),
+        'asymmetric_decrypt_message': lambda: handler.asymmetric_decrypt_message(private_key, *asymmetric),
+        'stream_encrypt': stream_encrypt,
+        'stream_decrypt': stream_decrypt
+    }
+
+
+def make_result(handler_name: str, curve_name: str, operation: str, size: int, iterations: int, elapsed: float) -> Dict[str, Any]:
+    ops_per_sec: float = iterations / elapsed
+    return {
+        'handler': handler_name,
+        'curve': curve_name,
+        'operation': operation,
+        'size': size,
+        'iterations': iterations,
+        'seconds': round(elapsed, 6),
+        'ops_per_sec': round(ops_per_sec, 3),
+        'mb_per_sec': round(ops_per_sec * size / 1024 ** 2, 3)
+    }
+
+
+def run_benchmarks(curves: List[str], sizes: List[int], operations: List[str], min_time: float, min_iterations: int) -> Dict[str, Any]:
+    '''
+    Runs the selected benchmarks for the ECDSA handler on each curve.
+
+    Returns:
+        Dict[str, Any]: Metadata and one result entry per case
+    '''
+    results: List[Dict[str, Any]] = []
+    pool_metrics: Dict[str, Any] = {}
+
+    for curve_name in curves:
+        handler = ECDSAHandler(curve=CURVES[curve_name])
+        handler_name: str = type(handler).__name__
+
+        for operation in SIZELESS_OPERATIONS:
+            if operation in operations:
+                iterations, elapsed = time_operation(handler.generate_keys, min_time, min_iterations)
+                results.append(make_result(handler_name, curve_name, operation, 0, iterations, elapsed))
+                print_result(results[-1])
+
+        for size in sizes:
+            sized: Dict[str, Callable[[], Any]] = build_operations(handler, os.urandom(size))
+            for operation in SIZED_OPERATIONS:
+                if operation not in operations:
+                    continue
+                # Very large messages are slow, don't force the minimum iteration count on them
+                iterations, elapsed = time_operation(sized[operation], min_time, min_iterations if size <= 1024 ** 2 else 1)
+                results.append(make_result(handler_name, curve_name, operation, size, iterations, elapsed))
+                print_result(results[-1])
+
+        pool_metrics[curve_name] = handler.get_ephemeral_pool_metrics()
+        handler.stop_ephemeral_key_pools()
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'cryptography': cryptography.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'timestamp': int(time.time()),
+            'min_time': min_time,
+            'ephemeral_pools': pool_metrics
+        },
+        'results': results
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"{result['curve']:<10} {result['operation']:<28} {result['size']:>10} B  {result['ops_per_sec']:>12.1f} ops/s  {result['mb_per_sec']:>10.2f} MB/s")
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, str, str, int]:
+    return result['handler'], result['curve'], result['operation'], result['size']
+
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    '''
+    Compares throughput against the baseline. Cases missing from either
+    side are ignored.
+
+    Returns:
+        List[str]: A description of every case that regressed past the threshold
+    '''
+    baseline_results: Dict[Tuple[str, str, str, int], Dict[str, Any]] = {result_key(r): r for r in baseline['results']}
+    regressions: List[str] = []
+
+    for result in current['results']:
+        previous: Optional[Dict[str, Any]] = baseline_results.get(result_key(result))
+        if previous is None or previous['ops_per_sec'] <= 0:
+            continue
+        change: float = result['ops_per_sec'] / previous['ops_per_sec'] - 1
+        if change < -threshold:
+            regressions.append(
+                f"{result['curve']} {result['operation']} @ {result['size']} B: "
+                f"{previous['ops_per_sec']:.1f} -> {result['ops_per_sec']:.1f} ops/s ({change:+.1%})"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the UndChain crypto handlers')
+    parser.add_argument('--curves', nargs='+', choices=sorted(CURVES), default=sorted(CURVES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help='Message sizes in bytes')
+    parser.add_argument('--operations', nargs='+', choices=SIZELESS_OPERATIONS + SIZED_OPERATIONS, default=list(SIZELESS_OPERATIONS + SIZED_OPERATIONS))
+    parser.add_argument('--min-time', type=float, default=0.5, help='Minimum seconds spent on each case')
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--save-baseline', help='Write the results as the new baseline to this JSON file')
+    parser.add_argument('--baseline', help='Compare against this baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed throughput drop before failing (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = run_benchmarks(args.curves, args.sizes, args.operations, args.min_time, args.min_iterations)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as file:
+                json.dump(report, file, indent=2)
+            print(f'Results written to {path}')
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline: Dict[str, Any] = json.load(file)
+        regressions: List[str] = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} case(s) regressed more than {args.threshold:.0%}:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'\nNo regressions beyond {args.threshold:.0%} against {args.baseline}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
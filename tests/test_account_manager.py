@@ -1,9 +1,17 @@
+import sys
 import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
 import shutil
 import time
 import unittest
 from src.accounts_manager import AccountManager
 
+# Passed to create_account so the tests never stop to prompt on the TTY
+PASSPHRASE = b'test passphrase'
+
 '''
 Run these tests using:
 python -m unittest discover -s tests
@@ -28,7 +36,7 @@ class TestAccountsManager(unittest.TestCase):
         print(f'{self.id()} took {duration:.6f} seconds')
 
     def test_create_account(self) -> None:
-        account_path = self.manager.create_account('user1')
+        account_path = self.manager.create_account('user1', PASSPHRASE)
         self.assertTrue(os.path.exists(account_path))
         account_info = self.manager.load_account('user1')
         self.assertEqual(account_info['username'], 'user1')
@@ -38,17 +46,17 @@ class TestAccountsManager(unittest.TestCase):
             self.manager.load_account('does_not_exist')
 
     def test_save_keys(self) -> None:
-        self.manager.create_account('user1')
+        self.manager.create_account('user1', PASSPHRASE)
         account_info = self.manager.load_account('user1')
         self.assertEqual(account_info['username'], 'user1')
 
     def test_username_request_message(self) -> None:
-        self.manager.create_account('user1')
+        self.manager.create_account('user1', PASSPHRASE)
         request_message = self.manager.username_request_message('user1')
         self.assertIn('[Username_Request]', request_message)
 
     def test_rename_account(self) -> None:
-        self.manager.create_account('user1')
+        self.manager.create_account('user1', PASSPHRASE)
         rename_result = self.manager.rename_account('user1', 'user2')
         self.assertEqual(rename_result, 'Account user1 has been renamed to user2')
         account_info = self.manager.load_account('user2')
@@ -57,15 +65,22 @@ class TestAccountsManager(unittest.TestCase):
             self.manager.load_account('user1')
 
     def test_delete_account(self) -> None:
-        self.manager.create_account('user1')
+        self.manager.create_account('user1', PASSPHRASE)
         deletion_result = self.manager.delete_account('user1')
         self.assertEqual(deletion_result, 'Account user1 has been deleted.')
         with self.assertRaises(ValueError):
             self.manager.load_account('user1')
 
+    def test_unlock_account_uses_key_agent(self) -> None:
+        self.manager.create_account('user1', PASSPHRASE)
+        self.manager.key_agent.lock('user1')
+        private_key = self.manager.unlock_account('user1', PASSPHRASE)
+        # Second unlock is served from the agent, no passphrase needed
+        self.assertIs(self.manager.unlock_account('user1'), private_key)
+
     def test_list_accounts(self) -> None:
-        self.manager.create_account('user1')
-        self.manager.create_account('user2')
+        self.manager.create_account('user1', PASSPHRASE)
+        self.manager.create_account('user2', PASSPHRASE)
         accounts = self.manager.list_accounts()
         self.assertIn('user1', accounts)
         self.assertIn('user2', accounts)
@@ -0,0 +1,86 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import unittest
+from src.crypto_factory import CryptoFactory
+from src.async_crypto_factory import AsyncCryptoFactory
+
+'''
+Run these tests:
+python -m unittest tests.test_async_crypto_factory
+'''
+
+
+class TestAsyncCryptoFactory(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.private_key, cls.public_key = CryptoFactory.generate_keys()
+
+    def setUp(self) -> None:
+        AsyncCryptoFactory.configure(max_workers=2, max_pending=2, inline_threshold=16)
+        AsyncCryptoFactory.reset_metrics()
+
+    def tearDown(self) -> None:
+        AsyncCryptoFactory.shutdown()
+
+    def test_sign_and_verify_offloaded(self) -> None:
+        message = b'x' * 1024
+
+        async def run() -> bool:
+            signature = await AsyncCryptoFactory.sign_async(self.private_key, message)
+            return await AsyncCryptoFactory.verify_async(self.public_key, message, signature)
+
+        self.assertTrue(asyncio.run(run()))
+        metrics = AsyncCryptoFactory.get_metrics()
+        self.assertEqual(metrics['offloaded'], 2)
+        self.assertEqual(metrics['inline'], 0)
+        self.assertEqual(metrics['in_flight'], 0)
+
+    def test_ec_operations_always_offloaded(self) -> None:
+        async def run() -> bytes:
+            signature = await AsyncCryptoFactory.sign_async(self.private_key, b'tiny')
+            self.assertTrue(await AsyncCryptoFactory.verify_async(self.public_key, b'tiny', signature))
+            encrypted, ephemeral_key, nonce, tag = await AsyncCryptoFactory.symmetric_encrypt_async(self.public_key, b'tiny')
+            return await AsyncCryptoFactory.symmetric_decrypt_async(self.private_key, encrypted, ephemeral_key, nonce, tag)
+
+        self.assertEqual(asyncio.run(run()), b'tiny')
+        metrics = AsyncCryptoFactory.get_metrics()
+        self.assertEqual(metrics['offloaded'], 4)
+        self.assertEqual(metrics['inline'], 0)
+
+    def test_tiny_stream_update_runs_inline(self) -> None:
+        encryptor = CryptoFactory.create_stream_encryptor(self.public_key, chunk_size=64)
+        decryptor = CryptoFactory.create_stream_decryptor(self.private_key)
+
+        async def run() -> bytes:
+            records = await AsyncCryptoFactory.stream_update_async(encryptor, b'tiny')
+            records += encryptor.finalize()
+            plaintext = await AsyncCryptoFactory.stream_update_async(decryptor, records[:16])
+            return plaintext + await AsyncCryptoFactory.stream_update_async(decryptor, records[16:])
+
+        self.assertEqual(asyncio.run(run()), b'tiny')
+        metrics = AsyncCryptoFactory.get_metrics()
+        self.assertEqual(metrics['inline'], 2)
+        self.assertEqual(metrics['offloaded'], 1)
+
+    def test_pending_operations_are_bounded(self) -> None:
+        message = b'y' * 512
+
+        async def run() -> list:
+            return await asyncio.gather(*(AsyncCryptoFactory.sign_async(self.private_key, message) for _ in range(8)))
+
+        signatures = asyncio.run(run())
+        self.assertEqual(len(signatures), 8)
+        metrics = AsyncCryptoFactory.get_metrics()
+        self.assertEqual(metrics['completed'], 8)
+        self.assertGreater(metrics['max_queued'], 0)
+        self.assertEqual(metrics['queued'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
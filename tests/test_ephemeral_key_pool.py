@@ -0,0 +1,74 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import time
+import unittest
+from cryptography.hazmat.primitives.asymmetric import ec
+from src.ephemeral_key_pool import EphemeralKeyPool
+from src.ecdsa_handler import ECDSAHandler
+
+'''
+Run these tests:
+python -m unittest tests.test_ephemeral_key_pool
+'''
+
+
+class TestEphemeralKeyPool(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.pool = EphemeralKeyPool(ec.SECP256R1(), size=4, low_water_mark=1)
+
+    def tearDown(self) -> None:
+        self.pool.stop()
+
+    def wait_for_keys(self, pool: EphemeralKeyPool, count: int) -> None:
+        deadline: float = time.time() + 10
+        while pool.get_metrics()['available'] < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_pool_fills_in_background(self) -> None:
+        self.pool.start()
+        self.wait_for_keys(self.pool, 4)
+        self.assertEqual(self.pool.get_metrics()['available'], 4)
+
+    def test_acquire_never_returns_the_same_key(self) -> None:
+        self.pool.start()
+        self.wait_for_keys(self.pool, 4)
+        public_keys = {self.pool.acquire()[1] for _ in range(8)}
+        self.assertEqual(len(public_keys), 8)
+
+    def test_empty_pool_counts_a_miss(self) -> None:
+        private_key, public_key_pem = self.pool.acquire()
+        self.assertIsInstance(private_key, ec.EllipticCurvePrivateKey)
+        self.assertTrue(public_key_pem.startswith(b'-----BEGIN PUBLIC KEY-----'))
+        self.assertEqual(self.pool.get_metrics()['misses'], 1)
+
+    def test_invalid_low_water_mark(self) -> None:
+        with self.assertRaises(ValueError):
+            EphemeralKeyPool(ec.SECP256R1(), size=4, low_water_mark=4)
+
+    def test_handler_encryption_uses_pool(self) -> None:
+        handler = ECDSAHandler(curve=ec.SECP256R1(), ephemeral_pool_size=4, ephemeral_low_water_mark=1)
+        try:
+            private_key, public_key = handler.generate_keys()
+            self.wait_for_keys(handler.get_ephemeral_key_pool(), 4)
+
+            message = b'pooled ephemeral keys'
+            cipher_text, ephemeral_key, nonce, tag = handler.symmetric_encrypt_message(public_key, message)
+            self.assertEqual(handler.symmetric_decrypt_message(private_key, cipher_text, ephemeral_key, nonce, tag), message)
+
+            cipher_text, ephemeral_key, nonce, tag = handler.asymmetric_encrypt_message(public_key, message)
+            self.assertEqual(handler.asymmetric_decrypt_message(private_key, cipher_text, ephemeral_key, nonce, tag), message)
+
+            metrics = handler.get_ephemeral_pool_metrics()['secp256r1']
+            self.assertEqual(metrics['hits'], 2)
+            self.assertEqual(metrics['misses'], 0)
+        finally:
+            handler.stop_ephemeral_key_pools()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from src.crypto_factory import CryptoFactory
+from src.key_agent import KeyAgent, KeyAgentServer, KeyAgentClient
+
+'''
+Run these tests:
+python -m unittest tests.test_key_agent
+'''
+
+PASSPHRASE = b'agent passphrase'
+
+
+class TestKeyAgent(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.key_dir = tempfile.mkdtemp()
+        cls.private_key, cls.public_key = CryptoFactory.generate_keys()
+        CryptoFactory.save_keys(cls.private_key, cls.public_key, 'agent', cls.key_dir, PASSPHRASE)
+        cls.key_file = os.path.join(cls.key_dir, 'agent_private_key.PEM')
+        cls.salt_file = os.path.join(cls.key_dir, 'agent_salt.bin')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.key_dir)
+
+    def test_unlock_once_then_sign(self) -> None:
+        agent = KeyAgent()
+        agent.unlock('agent', self.key_file, self.salt_file, PASSPHRASE)
+        # Already unlocked, so a wrong passphrase is never even tried
+        agent.unlock('agent', self.key_file, self.salt_file, b'wrong')
+
+        signature = agent.sign('agent', b'block hash')
+        self.assertTrue(CryptoFactory.verify_signature(self.public_key, b'block hash', signature))
+
+    def test_keys_expire_after_ttl(self) -> None:
+        agent = KeyAgent(ttl=0.05)
+        agent.add_key('agent', self.private_key)
+        self.assertTrue(agent.is_unlocked('agent'))
+        time.sleep(0.1)
+        self.assertFalse(agent.is_unlocked('agent'))
+        with self.assertRaises(KeyError):
+            agent.sign('agent', b'too late')
+
+    def test_decrypt(self) -> None:
+        agent = KeyAgent()
+        agent.add_key('agent', self.private_key)
+        sealed = CryptoFactory.asymmetric_encrypt_message(self.public_key, b'secret')
+        self.assertEqual(agent.asymmetric_decrypt('agent', *sealed), b'secret')
+
+    @unittest.skipUnless(hasattr(__import__('socket'), 'AF_UNIX'), 'Unix sockets not available')
+    def test_daemon_round_trip(self) -> None:
+        socket_path = os.path.join(self.key_dir, 'agent.sock')
+        loop = asyncio.new_event_loop()
+        server = KeyAgentServer(KeyAgent(), socket_path)
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        try:
+            client = KeyAgentClient(socket_path)
+            with self.assertRaises(RuntimeError):
+                client.unlock('agent', self.key_file, self.salt_file)
+            client.unlock('agent', self.key_file, self.salt_file, PASSPHRASE)
+            self.assertEqual(client.list_keys(), ('agent',))
+
+            signature = client.sign('agent', b'over the socket')
+            self.assertTrue(CryptoFactory.verify_signature(self.public_key, b'over the socket', signature))
+
+            sealed = CryptoFactory.symmetric_encrypt_message(self.public_key, b'for the daemon')
+            self.assertEqual(client.symmetric_decrypt('agent', *sealed), b'for the daemon')
+            self.assertTrue(client.lock('agent'))
+        finally:
+            asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
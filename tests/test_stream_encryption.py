@@ -0,0 +1,147 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import shutil
+import socket
+import unittest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.asymmetric import ec
+from src.ecdsa_handler import ECDSAHandler
+from src.stream_encryption import MIN_CHUNK_SIZE, encrypt_file, decrypt_file, encrypt_socket, decrypt_socket
+
+'''
+Run these tests:
+python -m unittest tests.test_stream_encryption
+'''
+
+
+class TestStreamEncryption(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.handler = ECDSAHandler(curve=ec.SECP256R1())
+        cls.private_key, cls.public_key = cls.handler.generate_keys()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.handler.stop_ephemeral_key_pools()
+
+    def setUp(self) -> None:
+        os.makedirs('test_streams', exist_ok=True)
+
+    def tearDown(self) -> None:
+        shutil.rmtree('test_streams', ignore_errors=True)
+
+    def encrypt(self, message: bytes, chunk_size: int) -> bytes:
+        encryptor = self.handler.create_stream_encryptor(self.public_key, chunk_size)
+        # Feed in odd sized pieces so chunks never line up with update() calls
+        pieces = [encryptor.update(message[i:i + 7]) for i in range(0, len(message), 7)]
+        return b''.join(pieces) + encryptor.finalize()
+
+    def decrypt(self, stream: bytes) -> bytes:
+        decryptor = self.handler.create_stream_decryptor(self.private_key)
+        plain_text = b''.join(decryptor.update(stream[i:i + 5]) for i in range(0, len(stream), 5))
+        decryptor.finalize()
+        return plain_text
+
+    def test_round_trip(self) -> None:
+        for message in (b'', b'a', os.urandom(64), os.urandom(1000)):
+            self.assertEqual(self.decrypt(self.encrypt(message, chunk_size=64)), message)
+
+    def test_round_trip_at_minimum_chunk_size(self) -> None:
+        for message in (b'', b'a', os.urandom(100)):
+            self.assertEqual(self.decrypt(self.encrypt(message, chunk_size=MIN_CHUNK_SIZE)), message)
+
+    def test_chunk_size_below_minimum(self) -> None:
+        with self.assertRaises(ValueError):
+            self.handler.create_stream_encryptor(self.public_key, MIN_CHUNK_SIZE - 1)
+
+    def test_truncated_stream(self) -> None:
+        stream = self.encrypt(os.urandom(256), chunk_size=64)
+        decryptor = self.handler.create_stream_decryptor(self.private_key)
+        decryptor.update(stream[:-40])
+        with self.assertRaises(ValueError):
+            decryptor.finalize()
+
+    def test_tampered_chunk(self) -> None:
+        stream = bytearray(self.encrypt(os.urandom(256), chunk_size=64))
+        stream[-60] ^= 1
+        with self.assertRaises(InvalidTag):
+            self.decrypt(bytes(stream))
+
+    def test_trailing_data(self) -> None:
+        stream = self.encrypt(b'payload', chunk_size=64)
+        with self.assertRaises(ValueError):
+            self.decrypt(stream + b'extra')
+
+    def test_file_round_trip(self) -> None:
+        source = os.path.join('test_streams', 'sector.bin')
+        encrypted = os.path.join('test_streams', 'sector.enc')
+        restored = os.path.join('test_streams', 'sector.out')
+        data = os.urandom(300_000)
+        with open(source, 'wb') as file:
+            file.write(data)
+
+        encrypt_file(self.handler.create_stream_encryptor(self.public_key, 4096), source, encrypted)
+        self.assertEqual(decrypt_file(self.handler.create_stream_decryptor(self.private_key), encrypted, restored), len(data))
+        with open(restored, 'rb') as file:
+            self.assertEqual(file.read(), data)
+
+    def test_failed_file_decrypt_leaves_no_output(self) -> None:
+        source = os.path.join('test_streams', 'job.bin')
+        encrypted = os.path.join('test_streams', 'job.enc')
+        restored = os.path.join('test_streams', 'job.out')
+        with open(source, 'wb') as file:
+            file.write(os.urandom(10_000))
+        encrypt_file(self.handler.create_stream_encryptor(self.public_key, 1024), source, encrypted)
+        with open(encrypted, 'r+b') as file:
+            file.truncate(os.path.getsize(encrypted) - 10)
+
+        with self.assertRaises(ValueError):
+            decrypt_file(self.handler.create_stream_decryptor(self.private_key), encrypted, restored)
+        self.assertFalse(os.path.exists(restored))
+        self.assertFalse(os.path.exists(f'{restored}.part'))
+
+    def test_socket_round_trip(self) -> None:
+        data = os.urandom(50_000)
+
+        async def run() -> bytes:
+            loop = asyncio.get_event_loop()
+            plain_in, plain_source = socket.socketpair()
+            cipher_out, cipher_in = socket.socketpair()
+            plain_sink, plain_out = socket.socketpair()
+            for sock in (plain_in, plain_source, cipher_out, cipher_in, plain_sink, plain_out):
+                sock.setblocking(False)
+
+            async def feed() -> None:
+                await loop.sock_sendall(plain_in, data)
+                plain_in.shutdown(socket.SHUT_WR)
+
+            async def encrypt() -> None:
+                await encrypt_socket(self.handler.create_stream_encryptor(self.public_key, 2048), plain_source, cipher_out)
+                cipher_out.shutdown(socket.SHUT_WR)
+
+            async def decrypt() -> None:
+                await decrypt_socket(self.handler.create_stream_decryptor(self.private_key), cipher_in, plain_sink)
+                plain_sink.shutdown(socket.SHUT_WR)
+
+            async def collect() -> bytes:
+                received = bytearray()
+                while chunk := await loop.sock_recv(plain_out, 65536):
+                    received += chunk
+                return bytes(received)
+
+            results = await asyncio.gather(feed(), encrypt(), decrypt(), collect())
+            for sock in (plain_in, plain_source, cipher_out, cipher_in, plain_sink, plain_out):
+                sock.close()
+            return results[-1]
+
+        self.assertEqual(asyncio.run(run()), data)
+
+
+if __name__ == '__main__':
+    unittest.main()